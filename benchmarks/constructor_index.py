@@ -0,0 +1,132 @@
+"""
+Regression benchmark of the per-panel constructor_data lookups on a synthetic 10 unit x 8 panel tree.
+
+Looks up the direction and the muntin shape of every panel with ConstructorIndex (index build included) and with
+the recursive tree searches it replaced, checks that both find the same values and fails when the index is slower
+than BUDGET_MS.
+
+    python -m benchmarks.constructor_index [units] [panels per unit]
+"""
+import sys
+import time
+
+from components.config import PANEL_DIRECTION_PARAM_NAME
+from components.constructor_index import ConstructorIndex
+
+BUDGET_MS = 20
+REPEAT = 5
+
+
+def synthetic_tree(units=10, panels=8):
+    """
+    constructor_data with the units side by side, each one a frame holding its panels
+    """
+    return {
+        'name': 'assembly',
+        'assembly_version': {'product_category_id': 1},
+        'children': [{
+            'name': f'U{unit}',
+            'panel_type': 'unit',
+            'parameters': [{'name': 'frame category', 'value_name': 'std'}],
+            'children': [{
+                'name': f'U{unit}F',
+                'panel_type': 'frame',
+                'children': [{
+                    'name': f'U{unit}P{panel}',
+                    'panel_type': 'panel',
+                    'parameters': [
+                        {'name': 'panel - track number', 'value_name': str(panel % 3 + 1)},
+                        {'name': PANEL_DIRECTION_PARAM_NAME, 'value_name': 'left' if panel % 2 else 'right'},
+                    ],
+                    'muntin_shape': {'sides': [{'segment': {'p1': [0, 0], 'b1': [1, 1], 'b2': [2, 1],
+                                                            'p2': [3, 0]}}]} if panel % 4 == 0 else {},
+                    'children': [],
+                } for panel in range(panels)],
+            }],
+        } for unit in range(units)],
+    }
+
+
+def recursive_panel_direction(tree, panel_name):
+    """
+    The search ConstructorIndex.panel_direction replaced, every sibling searched again for each child that
+    doesn't match
+    """
+    for child in tree.get('children', []):
+        if child.get('name') == panel_name:
+            for parameter in child.get('parameters', []):
+                if parameter.get('name') == PANEL_DIRECTION_PARAM_NAME:
+                    return parameter.get('value_name')
+        else:
+            for inner_child in tree.get('children', []):
+                direction = recursive_panel_direction(inner_child, panel_name)
+                if direction:
+                    return direction
+
+    return None
+
+
+def recursive_panel_muntin_shape(tree, panel_name):
+    """
+    The search ConstructorIndex.panel_muntin_shape replaced
+    """
+    for child in tree.get('children', []):
+        if child.get('panel_type', '') == 'panel' and child.get('name') == panel_name:
+            return child.get('muntin_shape', {})
+        else:
+            for inner_child in tree.get('children', []):
+                muntin_shape = recursive_panel_muntin_shape(inner_child, panel_name)
+                if muntin_shape:
+                    return muntin_shape
+
+    return None
+
+
+def lookup_with_index(tree, panel_names):
+    index = ConstructorIndex(tree)
+
+    return [(index.panel_direction(_), index.panel_muntin_shape(_)) for _ in panel_names]
+
+
+def lookup_recursively(tree, panel_names):
+    return [(recursive_panel_direction(tree, _), recursive_panel_muntin_shape(tree, _)) for _ in panel_names]
+
+
+def best_time_ms(function, *args):
+    times = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        function(*args)
+        times.append((time.perf_counter() - started) * 1000)
+
+    return min(times)
+
+
+def main(units=10, panels=8):
+    tree = synthetic_tree(units, panels)
+    panel_names = [f'U{unit}P{panel}' for unit in range(units) for panel in range(panels)]
+
+    # the old search returns {} (falsy) as "not found" in the middle of the walk, so the shapes are compared
+    # for the panels it does find
+    indexed = lookup_with_index(tree, panel_names)
+    recursive = lookup_recursively(tree, panel_names)
+    for name, (direction, muntin_shape), (expected_direction, expected_muntin_shape) in \
+            zip(panel_names, indexed, recursive):
+        assert direction == expected_direction, (name, direction, expected_direction)
+        assert not expected_muntin_shape or muntin_shape == expected_muntin_shape, name
+
+    index_ms = best_time_ms(lookup_with_index, tree, panel_names)
+    recursive_ms = best_time_ms(lookup_recursively, tree, panel_names)
+
+    print(f'{units} units x {panels} panels, {len(panel_names)} panels: index {index_ms:.2f} ms, '
+          f'recursive search {recursive_ms:.2f} ms')
+
+    if index_ms > BUDGET_MS:
+        print(f'FAIL: the index lookups took more than {BUDGET_MS} ms')
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(*[int(_) for _ in sys.argv[1:3]]))
@@ -0,0 +1,111 @@
+import cairo
+
+from components.scene import Scene, PathItem, DEFAULT_STYLE, LINE_JOINS, LINE_CAPS
+
+
+class CairoBackend:
+    """
+    Draws a Scene onto a cairo context (svg or image surface)
+    """
+
+    def __init__(self, context: cairo.Context):
+        self.context = context
+
+        self._style = None
+        self._clip = None
+
+    def draw(self, scene: Scene):
+        if scene.background is not None:
+            self.context.set_source_rgba(*scene.background)
+            self.context.paint()
+
+        self.context.transform(cairo.Matrix(*scene.matrix))
+
+        self._style = None
+        self._clip = None
+        self._apply_style(DEFAULT_STYLE)
+
+        for item in scene.items:
+            self._apply_clip(scene, item.clip)
+            self._apply_style(scene.styles[item.style])
+
+            if isinstance(item, PathItem):
+                self._draw_path(item)
+            else:
+                self._draw_text(item)
+
+    def _apply_style(self, style):
+        previous = self._style
+        self._style = style
+
+        if previous is not None and previous == style:
+            return
+
+        if previous is None or previous.rgba != style.rgba:
+            self.context.set_source_rgba(*style.rgba)
+        if previous is None or previous.line_width != style.line_width:
+            self.context.set_line_width(style.line_width)
+        if previous is None or previous.dash != style.dash:
+            self.context.set_dash(style.dash)
+        if previous is None or previous.line_join != style.line_join:
+            self.context.set_line_join(cairo.LineJoin(LINE_JOINS.index(style.line_join)))
+        if previous is None or previous.line_cap != style.line_cap:
+            self.context.set_line_cap(cairo.LineCap(LINE_CAPS.index(style.line_cap)))
+
+    def _apply_clip(self, scene, clip):
+        if clip == self._clip:
+            return
+
+        self._clip = clip
+        self.context.reset_clip()
+
+        # intersect the chain from the outermost clip in
+        chain = []
+        while clip is not None:
+            chain.append(scene.clips[clip])
+            clip = scene.clips[clip].parent
+
+        for _ in reversed(chain):
+            self._add_segments(_.segments)
+            self.context.clip()
+
+    def _add_segments(self, segments):
+        context = self.context
+
+        for segment in segments:
+            kind = segment[0]
+            if kind == 'M':
+                context.move_to(*segment[1:])
+            elif kind == 'L':
+                context.line_to(*segment[1:])
+            elif kind == 'C':
+                context.curve_to(*segment[1:])
+            elif kind == 'A':
+                context.arc(*segment[1:])
+            elif kind == 'R':
+                context.rectangle(*segment[1:])
+            elif kind == 'N':
+                context.new_sub_path()
+            elif kind == 'Z':
+                context.close_path()
+
+    def _draw_path(self, item):
+        self._add_segments(item.segments)
+
+        if item.op == 'fill':
+            self.context.fill()
+        else:
+            self.context.stroke()
+
+    def _draw_text(self, item):
+        size = self._style.font_size
+
+        self.context.save()
+        self.context.set_font_matrix(cairo.Matrix(xx=size, yy=-size))
+        self.context.move_to(item.x, item.y)
+        if item.angle:
+            self.context.rotate(item.angle)
+        self.context.show_text(item.text)
+        self.context.restore()
+
+        self.context.new_path()
@@ -0,0 +1,256 @@
+import math
+
+from components.scene import Scene, PathItem, LAYERS, LAYER_PANELS, LAYER_DLO, LAYER_MUNTINS, LAYER_LABELS
+
+
+class DxfBackend:
+    """
+    Writes a Scene as an ASCII dxf (R12) drawing into a binary stream, one layer per kind of item (see LAYERS).
+
+    Uses the scene user space, which is y up like dxf, divided by scale: with the scale factor of the drawing
+    the coordinates are in the units of the payload. Lines become POLYLINEs, arcs ARCs/CIRCLEs, Bézier curves
+    are flattened into CURVE_STEPS lines and labels are TEXT entities. dxf has no clipping: lines are cut to
+    rectangular clips, other clips are ignored.
+    """
+
+    # AutoCAD color index of the layers
+    LAYER_COLORS = {
+        LAYER_PANELS: 7,
+        LAYER_DLO: 5,
+        LAYER_MUNTINS: 3,
+        LAYER_LABELS: 1,
+    }
+
+    CURVE_STEPS = 16
+
+    def __init__(self, stream, scale=1.0):
+        self.stream = stream
+        self.scale = scale
+
+    def draw(self, scene: Scene):
+        self._write_header()
+
+        self._group(0, 'SECTION')
+        self._group(2, 'ENTITIES')
+
+        for item in scene.items:
+            style = scene.styles[item.style]
+            if isinstance(item, PathItem):
+                self._write_path(item, style, self._clip_box(scene, item.clip))
+            else:
+                self._write_text(item, style)
+
+        self._group(0, 'ENDSEC')
+        self._group(0, 'EOF')
+
+    def _group(self, code, value):
+        if isinstance(value, float):
+            value = f'{value:.6f}'.rstrip('0').rstrip('.')
+            value = '0' if value == '-0' else value
+
+        self.stream.write(f'{code}\n{value}\n'.encode())
+
+    def _write_header(self):
+        self._group(0, 'SECTION')
+        self._group(2, 'HEADER')
+        self._group(9, '$ACADVER')
+        self._group(1, 'AC1009')
+        self._group(0, 'ENDSEC')
+
+        self._group(0, 'SECTION')
+        self._group(2, 'TABLES')
+
+        self._group(0, 'TABLE')
+        self._group(2, 'LTYPE')
+        self._group(70, 2)
+        self._write_line_type('CONTINUOUS', 'Solid line', [])
+        self._write_line_type('DASHED', 'Dashed __ __ __', [0.25, -0.125])
+        self._group(0, 'ENDTAB')
+
+        self._group(0, 'TABLE')
+        self._group(2, 'LAYER')
+        self._group(70, len(LAYERS))
+        for layer in LAYERS:
+            self._group(0, 'LAYER')
+            self._group(2, layer)
+            self._group(70, 0)
+            self._group(62, self.LAYER_COLORS[layer])
+            self._group(6, 'CONTINUOUS')
+        self._group(0, 'ENDTAB')
+
+        self._group(0, 'ENDSEC')
+
+    def _write_line_type(self, name, description, pattern):
+        self._group(0, 'LTYPE')
+        self._group(2, name)
+        self._group(70, 0)
+        self._group(3, description)
+        self._group(72, 65)
+        self._group(73, len(pattern))
+        self._group(40, float(sum(abs(_) for _ in pattern)))
+        for length in pattern:
+            self._group(49, float(length))
+
+    def _entity(self, kind, item, style):
+        self._group(0, kind)
+        self._group(8, item.layer)
+        if style.dash:
+            self._group(6, 'DASHED')
+
+    @staticmethod
+    def _clip_box(scene, clip_id):
+        """
+        :return: (min_x, min_y, max_x, max_y) of the clip chain if all of it is axis aligned rectangles, else None
+        """
+        box = None
+        while clip_id is not None:
+            clip = scene.clips[clip_id]
+            points = [_[1:] for _ in clip.segments if _[0] in ('M', 'L')]
+            if [_[0] for _ in clip.segments] == ['R']:
+                x, y, width, height = clip.segments[0][1:]
+                points = [(x, y), (x + width, y + height)]
+            elif [_[0] for _ in clip.segments] not in (['M', 'L', 'L', 'L', 'Z'], ['M', 'L', 'L', 'L', 'L']) or \
+                    len({_[0] for _ in points}) != 2 or len({_[1] for _ in points}) != 2:
+                return None
+
+            xs, ys = [_[0] for _ in points], [_[1] for _ in points]
+            clip_box = (min(xs), min(ys), max(xs), max(ys))
+            box = clip_box if box is None else (max(box[0], clip_box[0]), max(box[1], clip_box[1]),
+                                                min(box[2], clip_box[2]), min(box[3], clip_box[3]))
+            clip_id = clip.parent
+
+        return box
+
+    @staticmethod
+    def _clip_line(box, x1, y1, x2, y2):
+        """
+        Liang-Barsky: the part of the line inside the box or None
+        """
+        min_x, min_y, max_x, max_y = box
+        dx, dy = x2 - x1, y2 - y1
+        t0, t1 = 0.0, 1.0
+        for p, q in ((-dx, x1 - min_x), (dx, max_x - x1), (-dy, y1 - min_y), (dy, max_y - y1)):
+            if p == 0:
+                if q < 0:
+                    return None
+                continue
+            t = q / p
+            if p < 0:
+                t0 = max(t0, t)
+            else:
+                t1 = min(t1, t)
+            if t0 > t1:
+                return None
+
+        return x1 + t0 * dx, y1 + t0 * dy, x1 + t1 * dx, y1 + t1 * dy
+
+    def _write_path(self, item, style, clip_box=None):
+        # the lines of the current sub path, written as a polyline when it ends
+        points = []
+
+        def flush(closed=False):
+            if len(points) > 1 and clip_box:
+                for start_point, end_point in zip(points, points[1:] + (points[:1] if closed else [])):
+                    line = self._clip_line(clip_box, *start_point, *end_point)
+                    if line:
+                        self._write_polyline(item, style, [line[:2], line[2:]], False)
+            elif len(points) > 1:
+                self._write_polyline(item, style, points, closed)
+            points.clear()
+
+        current = None
+        start = None
+        for segment in item.segments:
+            kind = segment[0]
+            if kind == 'M':
+                flush()
+                current = start = segment[1:]
+                points.append(current)
+            elif kind == 'L':
+                current = segment[1:]
+                points.append(current)
+            elif kind == 'C':
+                x1, y1, x2, y2, x3, y3 = segment[1:]
+                x0, y0 = current
+                for step in range(1, self.CURVE_STEPS + 1):
+                    t = step / self.CURVE_STEPS
+                    a, b, c, d = (1 - t) ** 3, 3 * t * (1 - t) ** 2, 3 * t ** 2 * (1 - t), t ** 3
+                    points.append((a * x0 + b * x1 + c * x2 + d * x3, a * y0 + b * y1 + c * y2 + d * y3))
+                current = (x3, y3)
+            elif kind == 'R':
+                flush()
+                x, y, width, height = segment[1:]
+                points.extend([(x, y), (x + width, y), (x + width, y + height), (x, y + height)])
+                flush(closed=True)
+                current = start = (x, y)
+            elif kind == 'A':
+                xc, yc, radius, angle1, angle2 = segment[1:]
+                arc_start = (xc + radius * math.cos(angle1), yc + radius * math.sin(angle1))
+                # like cairo, an arc is joined to the current point by a line
+                if current is not None:
+                    points.append(arc_start)
+                else:
+                    start = arc_start
+                flush()
+                self._write_arc(item, style, xc, yc, radius, angle1, angle2)
+                current = (xc + radius * math.cos(angle2), yc + radius * math.sin(angle2))
+                points.append(current)
+            elif kind == 'N':
+                flush()
+                current = None
+            elif kind == 'Z':
+                if points and points[0] == start:
+                    flush(closed=True)
+                else:
+                    points.append(start)
+                    flush()
+                current = start
+                points.append(current)
+
+        flush()
+
+    def _write_polyline(self, item, style, points, closed):
+        if len(points) == 2 and not closed:
+            (x1, y1), (x2, y2) = points
+            self._entity('LINE', item, style)
+            self._group(10, x1 / self.scale)
+            self._group(20, y1 / self.scale)
+            self._group(11, x2 / self.scale)
+            self._group(21, y2 / self.scale)
+            return
+
+        self._entity('POLYLINE', item, style)
+        self._group(66, 1)
+        self._group(10, 0.0)
+        self._group(20, 0.0)
+        self._group(70, 1 if closed else 0)
+        for x, y in points:
+            self._group(0, 'VERTEX')
+            self._group(8, item.layer)
+            self._group(10, x / self.scale)
+            self._group(20, y / self.scale)
+        self._group(0, 'SEQEND')
+        self._group(8, item.layer)
+
+    def _write_arc(self, item, style, xc, yc, radius, angle1, angle2):
+        while angle2 < angle1:
+            angle2 += 2 * math.pi
+
+        full_turn = angle2 - angle1 >= 2 * math.pi - 1e-9
+        self._entity('CIRCLE' if full_turn else 'ARC', item, style)
+        self._group(10, xc / self.scale)
+        self._group(20, yc / self.scale)
+        self._group(40, radius / self.scale)
+        if not full_turn:
+            # counterclockwise in degrees, same direction as cairo's arc in a y up space
+            self._group(50, math.degrees(angle1) % 360)
+            self._group(51, math.degrees(angle2) % 360)
+
+    def _write_text(self, item, style):
+        self._entity('TEXT', item, style)
+        self._group(10, item.x / self.scale)
+        self._group(20, item.y / self.scale)
+        self._group(40, style.font_size / self.scale)
+        self._group(1, item.text)
+        if item.angle:
+            self._group(50, math.degrees(item.angle))
@@ -0,0 +1,204 @@
+import math
+from xml.sax.saxutils import escape
+
+from components.config import SVG_PRECISION
+from components.scene import Scene, PathItem
+
+
+class SvgBackend:
+    """
+    Writes a Scene as svg straight into a binary stream, without cairo.
+
+    Text is written as <text> elements instead of glyph outlines, consecutive items with the same style and clip
+    share one <g> and numbers are written with precision decimals. The scene matrix is applied to the coordinates
+    so that the document is in plain svg space (y down).
+    """
+
+    FONT_FAMILY = 'sans-serif'
+
+    def __init__(self, stream, precision=SVG_PRECISION):
+        self.stream = stream
+        self.precision = precision
+
+        self._matrix = (1, 0, 0, 1, 0, 0)
+        self._scale = 1
+        self._written_clips = set()
+
+    def draw(self, scene: Scene):
+        self._matrix = scene.matrix
+        xx, yx, xy, yy, _, _ = scene.matrix
+        self._scale = math.sqrt(abs(xx * yy - yx * xy))
+        self._written_clips = set()
+
+        width, height = self._number(scene.width), self._number(scene.height)
+        self._write(f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                    f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}pt" height="{height}pt" '
+                    f'viewBox="0 0 {width} {height}">\n')
+
+        if scene.background is not None:
+            self._write(f'<rect width="{width}" height="{height}" {self._paint("fill", scene.background)}/>\n')
+
+        group = None
+        for item in scene.items:
+            key = (item.style, isinstance(item, PathItem) and item.op, item.clip)
+            if key != group:
+                if group is not None:
+                    self._write('</g>\n')
+                self._open_group(scene, item)
+                group = key
+
+            if isinstance(item, PathItem):
+                self._write(f'<path d="{self._path_data(item.segments)}"/>\n')
+            else:
+                self._write_text(item)
+
+        if group is not None:
+            self._write('</g>\n')
+
+        self._write('</svg>\n')
+
+    def _write(self, text):
+        self.stream.write(text.encode())
+
+    def _number(self, value):
+        text = f'{value:.{self.precision}f}'
+        if '.' in text:
+            text = text.rstrip('0').rstrip('.')
+
+        return '0' if text == '-0' else text
+
+    def _point(self, x, y):
+        xx, yx, xy, yy, x0, y0 = self._matrix
+        return xx * x + xy * y + x0, yx * x + yy * y + y0
+
+    @staticmethod
+    def _paint(name, rgba):
+        red, green, blue = (round(_ * 255) for _ in rgba[:3])
+        alpha = rgba[3]
+        attributes = f'{name}="rgb({red},{green},{blue})"'
+        if alpha != 1:
+            attributes += f' {name}-opacity="{round(alpha, 3)}"'
+
+        return attributes
+
+    def _open_group(self, scene, item):
+        style = scene.styles[item.style]
+
+        if isinstance(item, PathItem) and item.op == 'fill':
+            attributes = self._paint('fill', style.rgba)
+        elif isinstance(item, PathItem):
+            attributes = f'fill="none" {self._paint("stroke", style.rgba)} ' \
+                         f'stroke-width="{self._number(style.line_width * self._scale)}"'
+            if style.dash:
+                attributes += f' stroke-dasharray="{",".join(self._number(_ * self._scale) for _ in style.dash)}"'
+            if style.line_join != 'miter':
+                attributes += f' stroke-linejoin="{style.line_join}"'
+            if style.line_cap != 'butt':
+                attributes += f' stroke-linecap="{style.line_cap}"'
+        else:
+            attributes = f'{self._paint("fill", style.rgba)} font-family="{self.FONT_FAMILY}" ' \
+                         f'font-size="{self._number(style.font_size * self._scale)}"'
+
+        if item.clip is not None:
+            self._write_clip(scene, item.clip)
+            attributes += f' clip-path="url(#c{item.clip})"'
+
+        self._write(f'<g {attributes}>\n')
+
+    def _write_clip(self, scene, clip_id):
+        if clip_id in self._written_clips:
+            return
+
+        # a nested clip is the intersection with its parent, the parent is clipped with the clip-path attribute
+        clip = scene.clips[clip_id]
+        attributes = f'id="c{clip_id}"'
+        if clip.parent is not None:
+            self._write_clip(scene, clip.parent)
+            attributes += f' clip-path="url(#c{clip.parent})"'
+
+        self._write(f'<clipPath {attributes}><path d="{self._path_data(clip.segments)}"/></clipPath>\n')
+        self._written_clips.add(clip_id)
+
+    def _path_data(self, segments):
+        commands = []
+        current = None
+        start = None
+
+        def point(x, y):
+            return f'{self._number(x)} {self._number(y)}'
+
+        for segment in segments:
+            kind = segment[0]
+            if kind == 'M':
+                current = start = self._point(*segment[1:])
+                commands.append('M' + point(*current))
+            elif kind == 'L':
+                current = self._point(*segment[1:])
+                commands.append('L' + point(*current))
+            elif kind == 'C':
+                x1, y1, x2, y2, x3, y3 = segment[1:]
+                current = self._point(x3, y3)
+                commands.append('C' + ' '.join((point(*self._point(x1, y1)), point(*self._point(x2, y2)),
+                                                point(*current))))
+            elif kind == 'R':
+                x, y, width, height = segment[1:]
+                corners = [self._point(x, y), self._point(x + width, y), self._point(x + width, y + height),
+                           self._point(x, y + height)]
+                commands.append('M' + point(*corners[0]) + ''.join('L' + point(*_) for _ in corners[1:]) + 'Z')
+                current = start = corners[0]
+            elif kind == 'A':
+                arc_start, arc_end, arc_commands = self._arc(current, *segment[1:])
+                if current is None:
+                    start = arc_start
+                current = arc_end
+                commands.extend(arc_commands)
+            elif kind == 'N':
+                current = None
+            elif kind == 'Z':
+                commands.append('Z')
+                current = start
+
+        # a move right before another move doesn't draw anything, e.g. the one left by a label's text
+        return ''.join(command for command, following in zip(commands, commands[1:] + [''])
+                       if not (command[0] == 'M' and following[:1] == 'M' and not command.endswith('Z')))
+
+    def _arc(self, current, xc, yc, radius, angle1, angle2):
+        """
+        Same as cairo's arc: angles increase from angle1 to angle2, joined to the current point by a line
+        :return: (start point, end point, path commands)
+        """
+        while angle2 < angle1:
+            angle2 += 2 * math.pi
+
+        def at(angle):
+            return self._point(xc + radius * math.cos(angle), yc + radius * math.sin(angle))
+
+        start = at(angle1)
+        commands = [('L' if current is not None else 'M') + f'{self._number(start[0])} {self._number(start[1])}']
+
+        # the direction of increasing angles in svg space depends on the orientation of the matrix
+        xx, yx, xy, yy, _, _ = self._matrix
+        sweep = 1 if xx * yy - yx * xy > 0 else 0
+        r = self._number(radius * self._scale)
+
+        # pieces of at most half a turn, so the large arc flag is always 0
+        pieces = max(1, math.ceil((angle2 - angle1) / math.pi - 1e-9))
+        end = start
+        for i in range(1, pieces + 1):
+            end = at(angle1 + (angle2 - angle1) * i / pieces)
+            commands.append(f'A{r} {r} 0 0 {sweep} {self._number(end[0])} {self._number(end[1])}')
+
+        return start, end, commands
+
+    def _write_text(self, item):
+        x, y = self._point(item.x, item.y)
+        attributes = f'x="{self._number(x)}" y="{self._number(y)}"'
+
+        # the direction of the baseline in svg space
+        xx, yx, xy, yy, _, _ = self._matrix
+        dx, dy = math.cos(item.angle), math.sin(item.angle)
+        angle = math.degrees(math.atan2(yx * dx + yy * dy, xx * dx + xy * dy))
+        if abs(angle) > 1e-9:
+            attributes += f' transform="rotate({self._number(angle)} {self._number(x)} {self._number(y)})"'
+
+        self._write(f'<text {attributes}>{escape(str(item.text))}</text>\n')
@@ -1,3 +1,5 @@
+import io
+import math
 import random
 import string
 from functools import cached_property
@@ -5,131 +7,153 @@ from typing import Dict
 
 import cairo
 
+from components.backends.cairo_backend import CairoBackend
+from components.backends.dxf_backend import DxfBackend
+from components.backends.svg_backend import SvgBackend
+from components.config import RENDER_TO_FILE, SVG_BACKEND
+from components.constructor_index import ConstructorIndex
+from components.payload_model import decode_payload, decode_png_scale, decode_svg_precision
+from components.payload_summary import PayloadSummary
+from components.render_style import RenderStyle
+from components.scene import Scene, SceneRecorder
 from components.shapes.arch import Arch
 from components.shapes.circle import Circle
 from components.shapes.eyebrow import Eyebrow
 from components.shapes.half_circle import HalfCircle
 from components.shapes.octagon import Octagon
 from components.shapes.quarter_circle import QuarterCircle
-from components.shapes.shape_label import ShapeLabel
 from components.shapes.tombstone import Tombstone
 from components.shapes.trapezoid import Trapezoid
 from components.shapes.triangle import Triangle
+from components.text_metrics import text_ascent
+from components.timing import phase, timed
 from components.top_view.top_view import TopView
 from components.top_view.utils import get_number_of_tracks_value, get_frame_category, get_pocket_width
-from components.utils import has_muntin_parts, find_muntin_label_offset_multipliers
+from components.utils import stable_svg_ids
 from enums.colors import Colors
 
 
+def temp_filename(extension):
+    return f"/tmp/{''.join(random.choice(string.ascii_uppercase) for _ in range(20))}.{extension}"
+
+
 class Canvas:
     BORDER_LEFT_OFFSET, BORDER_RIGHT_OFFSET, BORDER_TOP_OFFSET, BORDER_BOTTOM_OFFSET = 10, 10, 10, 10
 
-    def __init__(self, raw_params: Dict, is_top_view=False):
-        self.filename = f"/tmp/{''.join(random.choice(string.ascii_uppercase) for _ in range(20))}.svg"
-        self.raw_params = raw_params
-
-        self.is_top_view = is_top_view
-        self.scale_factor = self.calculate_scale_factor()
+    CONTENT_TYPES = {
+        'svg': 'image/svg+xml',
+        'png': 'image/png',
+        'dxf': 'application/dxf',
+    }
 
-        self.context = None
-        self.__surface = None
+    def __init__(self, raw_params: Dict, is_top_view=False, to_file=RENDER_TO_FILE, name=None, payload_spec=None):
+        """
+        By default the drawing is rendered into memory, see getvalue().
+        With to_file it is written to a /tmp file instead (self.filename), which is handy for debugging.
+        name is used in download_filename, e.g. a hash of the payload.
+        payload_spec is the payload already decoded by decode_payload, it is decoded when needed otherwise
+        """
+        with phase('canvas'):
+            self.raw_params = raw_params
+            if payload_spec is not None:
+                self.payload_spec = payload_spec
+            self.name = name
+            self.to_file = to_file
+            self.filename = temp_filename(self.image_format) if to_file else None
+            self.output = None if to_file else io.BytesIO()
+
+            self.is_top_view = is_top_view
+            self.style = RenderStyle(self.image_format)
+            self.scale_factor = self.calculate_scale_factor()
+
+            # the layout is recorded into self.scene through self.context, then drawn by a backend
+            self.scene = None
+            self.context = None
+            self.__surface = None
 
     def draw_top_view(self):
-        # set font size for shape label as 15 if image format is png
-        if self.image_format == 'png':
-            ShapeLabel.TEXT_SIZE = 15
-
-        self.context = self.__create_context()
+        self.context = self.__create_recorder()
 
         tv = TopView(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
                      raw_params=self.raw_params, scale_factor=self.scale_factor,
-                     draw_label=self.draw_label)
+                     draw_label=self.draw_label, style=self.style)
         tv.set_context(self.context)
         tv.draw()
 
-        if self.image_format == 'png':
-            self.filename = f"/tmp/{''.join(random.choice(string.ascii_uppercase) for _ in range(20))}.png"
-            self.__surface.write_to_png(self.filename)
-
-        self.__close()
+        self.__render()
 
     def draw(self):
-        # set font size for shape label as 15 if image format is png
-        if self.image_format == 'png':
-            ShapeLabel.TEXT_SIZE = 15
-
-        self.context = self.__create_context()
+        self.context = self.__create_recorder()
         shape = self.raw_params.get('shape', None)
         if not shape:
             self.__draw_frame(self.context)
         elif shape == 'halfcircle':
             hc = HalfCircle(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
                             raw_params=self.raw_params, scale_factor=self.scale_factor,
-                            draw_label=self.draw_label)
+                            draw_label=self.draw_label, style=self.style)
             hc.set_context(self.context)
             hc.draw_shape()
         elif shape == 'circle':
             c = Circle(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
-                       raw_params=self.raw_params, scale_factor=self.scale_factor, draw_label=self.draw_label)
+                       raw_params=self.raw_params, scale_factor=self.scale_factor, draw_label=self.draw_label,
+                       style=self.style)
             c.set_context(self.context)
             c.draw_shape()
         elif shape == 'octagon':
             c = Octagon(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
                         raw_params=self.raw_params, scale_factor=self.scale_factor,
-                        draw_label=self.draw_label)
+                        draw_label=self.draw_label, style=self.style)
             c.set_context(self.context)
             c.draw_shape()
         elif shape == 'eyebrow':
             e = Eyebrow(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
                         raw_params=self.raw_params, scale_factor=self.scale_factor,
-                        draw_label=self.draw_label)
+                        draw_label=self.draw_label, style=self.style)
             e.set_context(self.context)
             e.draw_shape()
         elif shape == 'arc':
             a = Arch(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
                      raw_params=self.raw_params, scale_factor=self.scale_factor,
-                     draw_label=self.draw_label)
+                     draw_label=self.draw_label, style=self.style)
             a.set_context(self.context)
             a.draw_shape()
         elif shape == 'tombstone':
             t = Tombstone(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width, y=self.BORDER_BOTTOM_OFFSET,
                           raw_params=self.raw_params, scale_factor=self.scale_factor,
-                          draw_label=self.draw_label)
+                          draw_label=self.draw_label, style=self.style)
             t.set_context(self.context)
             t.draw_shape()
         elif shape == 'triangle':
             triangle = Triangle(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width,
                                 y=self.BORDER_BOTTOM_OFFSET, raw_params=self.raw_params, scale_factor=self.scale_factor,
-                                draw_label=self.draw_label, direction=self.direction)
+                                draw_label=self.draw_label, style=self.style, direction=self.direction)
             triangle.set_context(self.context)
             triangle.draw_shape()
 
         elif shape == 'trapezoid':
             trapezoid = Trapezoid(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width,
                                   y=self.BORDER_BOTTOM_OFFSET, raw_params=self.raw_params,
-                                  scale_factor=self.scale_factor, draw_label=self.draw_label, direction=self.direction)
+                                  scale_factor=self.scale_factor, draw_label=self.draw_label, style=self.style,
+                                  direction=self.direction)
             trapezoid.set_context(self.context)
             trapezoid.draw_shape()
 
         elif shape == 'quartercircle':
             quarter_circle = QuarterCircle(x=self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width,
                                            y=self.BORDER_BOTTOM_OFFSET, raw_params=self.raw_params,
-                                           scale_factor=self.scale_factor, draw_label=self.draw_label,
+                                           scale_factor=self.scale_factor, draw_label=self.draw_label, style=self.style,
                                            direction=self.direction)
             quarter_circle.set_context(self.context)
             quarter_circle.draw_shape()
 
-        if self.image_format == 'png':
-            self.filename = f"/tmp/{''.join(random.choice(string.ascii_uppercase) for _ in range(20))}.png"
-            self.__surface.write_to_png(self.filename)
-
-        self.__close()
+        self.__render()
 
     # calculate total width with no scale factor
     def calculate_total_width(self):
         frame_width_with_labels = self.frame_width + self.left_positioned_labels_width
         return frame_width_with_labels + self.BORDER_LEFT_OFFSET + self.BORDER_RIGHT_OFFSET
 
+    @timed('scale_factor')
     def calculate_scale_factor(self):
         max_canvas_width = self.max_canvas_width
         if max_canvas_width:
@@ -137,6 +161,11 @@ class Canvas:
             return max_canvas_width / total_width
         return self.raw_params.get('scale_factor', 5)
 
+    @cached_property
+    def frame_scale_factor(self):
+        # the frames are drawn with the payload scale_factor, regardless of max_canvas_width
+        return self.raw_params.get('scale_factor') or 5
+
     @cached_property
     def number_of_tracks(self):
         number_of_tracks = get_number_of_tracks_value(self.raw_params.get('constructor_data', {}))
@@ -159,16 +188,16 @@ class Canvas:
         return pocket_width
 
     @cached_property
-    def muntin_labels_count_x(self):
-        labels_x, labels_y = find_muntin_label_offset_multipliers(self.raw_params)
+    def payload_summary(self):
+        return PayloadSummary(self.raw_params)
 
-        return labels_x
+    @cached_property
+    def muntin_labels_count_x(self):
+        return self.payload_summary.muntin_labels_count_x
 
     @cached_property
     def muntin_labels_count_y(self):
-        labels_x, labels_y = find_muntin_label_offset_multipliers(self.raw_params)
-
-        return labels_y
+        return self.payload_summary.muntin_labels_count_y
 
     @cached_property
     def max_canvas_width(self):
@@ -186,6 +215,11 @@ class Canvas:
     def constructor_data(self):
         return self.raw_params.get('constructor_data', {})
 
+    @cached_property
+    def constructor_index(self):
+        with phase('constructor_data'):
+            return ConstructorIndex(self.constructor_data)
+
     @cached_property
     def is_transparent(self):
         return self.raw_params.get('is_transparent', False)
@@ -198,10 +232,47 @@ class Canvas:
     def image_format(self):
         return self.raw_params.get('image_format', "svg")
 
+    @cached_property
+    def png_scale(self):
+        return decode_png_scale(self.raw_params)
+
+    @cached_property
+    def svg_backend(self):
+        if self.image_format != 'svg':
+            return None
+
+        return self.raw_params.get('svg_backend') or SVG_BACKEND
+
+    @cached_property
+    def svg_precision(self):
+        return decode_svg_precision(self.raw_params)
+
+    @cached_property
+    def content_type(self):
+        return self.CONTENT_TYPES.get(self.image_format, 'application/octet-stream')
+
+    @cached_property
+    def download_filename(self):
+        prefix = 'top-view' if self.is_top_view else 'cad'
+        if self.name:
+            return f"{prefix}-{self.name}.{self.image_format}"
+
+        return f"{prefix}.{self.image_format}"
+
     @cached_property
     def panel_type(self):
         return self.raw_params['panel_type']
 
+    @cached_property
+    def payload_spec(self):
+        """
+        FrameSpec/PanelSpec of the frames and panels of the payload, None for the top view
+        """
+        if self.is_top_view:
+            return None
+
+        return decode_payload(self.raw_params)
+
     @cached_property
     def child_frames(self):
         return self.raw_params.get('frames') or []
@@ -222,56 +293,79 @@ class Canvas:
     def frame_height_2(self):
         return self.raw_params.get('height_2', 0)
 
+    @cached_property
+    def size_label_extents(self):
+        """
+        SizeLabelExtents of the size labels placed around the frame layout, None when no labels are drawn and for
+        the shapes and the top view, whose padding is counted from their labels
+        """
+        if not self.draw_label or self.is_top_view or self.raw_params.get('shape'):
+            return None
+
+        with phase('size_labels'):
+            return self.arranged_frame.size_label_extents()
+
     @cached_property
     def left_positioned_labels_width(self):
         # return 0 if draw_label is false
         if not self.draw_label:
             return 0
 
-        from components.size_label import SizeLabel
-        from components.panel import Panel
+        if self.size_label_extents:
+            return self.size_label_extents.left
 
         if self.child_frames:
-            num_of_child_labels = max([_['coordinates']['x'] for _ in self.child_frames]) * Panel.LABELS_PER_FRAME
+            num_of_child_labels = self.payload_summary.max_child_frame_x * self.style.labels_per_frame
         elif self.child_panels:
             if self.orientation == 'horizontal':
-                num_of_child_labels = len(self.child_panels) * Panel.LABELS_PER_PANEL
+                num_of_child_labels = self.payload_summary.child_panel_count * self.style.labels_per_panel
             else:
-                num_of_child_labels = Panel.LABELS_PER_PANEL
+                num_of_child_labels = self.style.labels_per_panel
         else:
-            num_of_child_labels = Panel.LABELS_PER_PANEL
+            num_of_child_labels = self.style.labels_per_panel
 
-        total_number_of_labels = num_of_child_labels + Panel.LABELS_PER_FRAME
+        total_number_of_labels = num_of_child_labels + self.style.labels_per_frame
 
-        total_length_of_labels = total_number_of_labels * SizeLabel.LABEL_SIDE_LENGTH
-        length_of_first_text = SizeLabel.TEXT_SIZE
+        total_length_of_labels = total_number_of_labels * self.style.size_label.side_length
+        # the text of the outermost label, beyond its line
+        length_of_first_text = self.style.size_label.text_offset + text_ascent(self.style.size_label.text_size)
 
-        return SizeLabel.LABEL_OFFSET + length_of_first_text + total_length_of_labels
+        return self.style.size_label.offset + length_of_first_text + total_length_of_labels
 
     @cached_property
     def top_positioned_labels_height(self):
         # return 0 if draw_label is false
         if not self.draw_label:
             return 0
-        from components.panel import Panel
-        from components.size_label import SizeLabel
+
+        if self.size_label_extents:
+            return self.size_label_extents.top
 
         if self.child_frames:
-            num_of_child_labels = max([_['coordinates']['y'] for _ in self.child_frames]) * Panel.LABELS_PER_FRAME
+            num_of_child_labels = self.payload_summary.max_child_frame_y * self.style.labels_per_frame
         elif self.child_panels:
             if self.orientation == 'horizontal':
-                num_of_child_labels = Panel.LABELS_PER_PANEL
+                num_of_child_labels = self.style.labels_per_panel
             else:
-                num_of_child_labels = len(self.child_panels) * Panel.LABELS_PER_PANEL
+                num_of_child_labels = self.payload_summary.child_panel_count * self.style.labels_per_panel
         else:
-            num_of_child_labels = Panel.LABELS_PER_PANEL
+            num_of_child_labels = self.style.labels_per_panel
+
+        total_number_of_labels = num_of_child_labels + self.style.labels_per_frame
+
+        total_length_of_labels = total_number_of_labels * self.style.size_label.side_length
+        # the text of the outermost label, beyond its line
+        length_of_first_text = self.style.size_label.text_offset + text_ascent(self.style.size_label.text_size)
 
-        total_number_of_labels = num_of_child_labels + Panel.LABELS_PER_FRAME
+        return self.style.size_label.offset + length_of_first_text + total_length_of_labels
 
-        total_length_of_labels = total_number_of_labels * SizeLabel.LABEL_SIDE_LENGTH
-        length_of_first_text = SizeLabel.TEXT_SIZE
+    @cached_property
+    def right_positioned_labels_width(self):
+        # the texts of the width labels running past the right side of the frame
+        if self.size_label_extents:
+            return self.size_label_extents.right
 
-        return SizeLabel.LABEL_OFFSET + length_of_first_text + total_length_of_labels
+        return 0
 
     @cached_property
     def scaled_frame_width(self):
@@ -283,15 +377,16 @@ class Canvas:
 
     @cached_property
     def scaled_framed_width_with_labels(self):
-        if self.draw_muntin_label and has_muntin_parts(self.raw_params):
+        if self.draw_muntin_label and self.payload_summary.has_muntin_parts:
             extra_padding = 80 * self.muntin_labels_count_x
         else:
             extra_padding = 0
-        return self.scaled_frame_width + self.left_positioned_labels_width + extra_padding
+        return self.scaled_frame_width + self.left_positioned_labels_width + self.right_positioned_labels_width + \
+            extra_padding
 
     @cached_property
     def scaled_framed_height_with_labels(self):
-        if self.draw_muntin_label and has_muntin_parts(self.raw_params):
+        if self.draw_muntin_label and self.payload_summary.has_muntin_parts:
             extra_padding = 40 * self.muntin_labels_count_y
         else:
             extra_padding = 0
@@ -322,33 +417,94 @@ class Canvas:
         from components.panel import Panel
 
         if self.child_panels:
-            return Panel.guess_orientation(self.frame_width, self.frame_height, self.child_panels)
+            if self.payload_spec is not None:
+                child_widths = [_.width for _ in self.payload_spec.panels]
+                child_heights = [_.height for _ in self.payload_spec.panels]
+            else:
+                child_widths = [_['width'] for _ in self.child_panels]
+                child_heights = [_['height'] for _ in self.child_panels]
+
+            return Panel.guess_orientation(self.frame_width, self.frame_height, child_widths, child_heights)
         else:
             return 'horizontal'
 
-    def __create_context(self):
+    def __create_recorder(self):
         """
-        Creates a context to draw onto
+        Creates a context recording the layout into self.scene
         :return: context
         """
-        self.__surface = cairo.SVGSurface(self.filename, self.canvas_width, self.canvas_height)
+        self.scene = Scene(self.canvas_width, self.canvas_height,
+                           background=None if self.is_transparent else Colors.WHITE,
+                           matrix=(1, 0, 0, -1, 0, self.canvas_height))
 
-        context = cairo.Context(self.__surface)
-        if self.is_transparent:
-            context.set_source_rgba(0, 0, 0, 0)
-        else:
-            context.set_source_rgba(*Colors.WHITE)
-        context.paint()
+        return SceneRecorder(self.scene)
+
+    def __render(self):
+        """
+        Draws self.scene onto the output surface
+        """
+        if self.svg_backend == 'direct':
+            self.__write_svg()
+            return
 
-        matrix = cairo.Matrix(yy=-1, y0=self.canvas_height)
-        context.transform(matrix)
+        if self.image_format == 'dxf':
+            self.__write_dxf()
+            return
 
-        return context
+        self.__surface = self.__create_surface()
+        with phase('cairo'):
+            CairoBackend(cairo.Context(self.__surface)).draw(self.scene)
 
-    def __draw_frame(self, context):
+        if self.image_format == 'png':
+            self.__write_png()
+
+        self.__close()
+
+    def __create_surface(self):
+        surface_factories = {
+            'png': self.__create_image_surface,
+        }
+
+        return surface_factories.get(self.image_format, self.__create_svg_surface)()
+
+    def __create_svg_surface(self):
+        return cairo.SVGSurface(self.filename if self.to_file else self.output, self.canvas_width, self.canvas_height)
+
+    def __create_image_surface(self):
+        # png jobs are drawn straight onto pixels, png_scale pixels per canvas unit
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, math.ceil(self.canvas_width * self.png_scale),
+                                     math.ceil(self.canvas_height * self.png_scale))
+        surface.set_device_scale(self.png_scale, self.png_scale)
+
+        return surface
+
+    @cached_property
+    def arranged_frame(self):
+        """
+        The root Panel with the whole tree of frames and panels arranged at the origin, until frame_layout moves it
+        """
         from components.panel import Panel
 
-        if self.draw_muntin_label and has_muntin_parts(self.raw_params):
+        panel = Panel(
+            x=0,
+            y=0,
+            parent_panel=None,
+            spec=self.payload_spec,
+            scale_factor=self.frame_scale_factor,
+            constructor_index=self.constructor_index,
+            style=self.style,
+            payload_summary=self.payload_summary
+        )
+
+        with phase('arrange'):
+            return panel.arrange()
+
+    @cached_property
+    def frame_layout(self):
+        """
+        The root Panel with the whole tree of frames and panels arranged at its place on the canvas, not drawn yet
+        """
+        if self.draw_muntin_label and self.payload_summary.has_muntin_parts:
             # the diagram min_x and min_y should be positioned to handle the extra width and height of canvas
             x = self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width + 15 * self.muntin_labels_count_x
             y = self.BORDER_BOTTOM_OFFSET + 30 * self.muntin_labels_count_y
@@ -356,15 +512,59 @@ class Canvas:
             x = self.BORDER_LEFT_OFFSET + self.left_positioned_labels_width
             y = self.BORDER_BOTTOM_OFFSET
 
-        initial_frame = Panel(
-            x=x,
-            y=y,
-            parent_panel=None,
-            raw_params=self.raw_params,
-            scale_factor=self.raw_params.get('scale_factor') or 5
-        ).set_context(context)
+        return self.arranged_frame.move_by(x, y)
 
-        initial_frame.draw()
+    def layout(self):
+        """
+        Rectangles of the frames and panels of the payload on the canvas, y down like the images, without drawing them
+        """
+        if self.is_top_view or self.raw_params.get('shape'):
+            raise ValueError('the layout is available for frames and panels only')
+
+        return [{**_, 'y': self.canvas_height - _['y'] - _['height']} for _ in self.frame_layout.layout()]
 
+    def __draw_frame(self, context):
+        self.frame_layout.set_context(context).draw()
+
+    @timed('svg')
+    def __write_svg(self):
+        if self.to_file:
+            with open(self.filename, 'wb') as f:
+                SvgBackend(f, precision=self.svg_precision).draw(self.scene)
+        else:
+            SvgBackend(self.output, precision=self.svg_precision).draw(self.scene)
+
+    @timed('dxf')
+    def __write_dxf(self):
+        # in the units of the payload
+        scale = self.scale_factor if self.is_top_view or self.raw_params.get('shape') else self.frame_scale_factor
+
+        if self.to_file:
+            with open(self.filename, 'wb') as f:
+                DxfBackend(f, scale=scale).draw(self.scene)
+        else:
+            DxfBackend(self.output, scale=scale).draw(self.scene)
+
+    @timed('png')
+    def __write_png(self):
+        self.__surface.write_to_png(self.filename if self.to_file else self.output)
+
+    @timed('finish')
     def __close(self):
         self.__surface.__exit__()
+
+    @timed('output')
+    def getvalue(self):
+        """
+        Returns the rendered drawing as bytes, call after draw() or draw_top_view()
+        """
+        if self.to_file:
+            with open(self.filename, 'rb') as f:
+                body = f.read()
+        else:
+            body = self.output.getvalue()
+
+        if self.image_format in ('png', 'dxf') or self.svg_backend == 'direct':
+            return body
+
+        return stable_svg_ids(body)
@@ -1,3 +1,5 @@
+import os
+
 SLIDING_DOOR_PRODUCT_CATEGORY_ID = 7
 
 NUMBER_OF_TRACKS_PARAM_NAME = "number of tracks"
@@ -10,3 +12,77 @@ POCKET_LOCATION_PARAM_NAME = "pocket location"
 PULL_TYPE_PARAM_NAME = "handle type"
 PULL_HANDLE_LOCATION_PARAM_NAME = "panel handle location"
 
+
+# Set CAD_RENDERER_LOOKUP_TRACE=1 (and DEBUG logging) to log a summary of every constructor_data parameter lookup
+LOOKUP_TRACE = os.environ.get('CAD_RENDERER_LOOKUP_TRACE', '').lower() in ('1', 'true', 'yes')
+
+# Set CAD_RENDERER_RENDER_TO_FILE=1 to render into /tmp files (kept for inspection) instead of memory
+RENDER_TO_FILE = os.environ.get('CAD_RENDERER_RENDER_TO_FILE', '').lower() in ('1', 'true', 'yes')
+
+# Chunk size of the streamed (?stream=1) responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Pixels per canvas unit of the png output, can be overridden per request with 'png_scale' (e.g. 2 for hi-dpi),
+# up to PNG_MAX_SCALE
+PNG_SCALE = 1
+PNG_MAX_SCALE = float(os.environ.get('CAD_RENDERER_PNG_MAX_SCALE', 4))
+
+# Panel shapes: the offset curves are sampled at fixed points or, with 'bezier_sampling': 'adaptive', flattened
+# within 'bezier_tolerance' pixels (BEZIER_TOLERANCE when missing, BEZIER_MIN_TOLERANCE at least)
+BEZIER_SAMPLINGS = ('fixed', 'adaptive')
+BEZIER_TOLERANCE = 0.25
+BEZIER_MIN_TOLERANCE = float(os.environ.get('CAD_RENDERER_BEZIER_MIN_TOLERANCE', 0.01))
+
+# HTTP server. 'gunicorn' pre-forks WORKERS processes, each one restarted after MAX_REQUESTS requests
+# (+ up to MAX_REQUESTS_JITTER so they don't all restart at once) and given GRACEFUL_TIMEOUT seconds to finish
+# in-flight renders on shutdown. 'wsgiref' is the single-threaded bottle default, handy for debugging.
+SERVER = os.environ.get('CAD_RENDERER_SERVER', 'gunicorn')
+HOST = os.environ.get('CAD_RENDERER_HOST', '0.0.0.0')
+PORT = int(os.environ.get('CAD_RENDERER_PORT', 5002))
+WORKERS = int(os.environ.get('CAD_RENDERER_WORKERS', 0)) or os.cpu_count() or 1
+MAX_REQUESTS = int(os.environ.get('CAD_RENDERER_MAX_REQUESTS', 1000))
+MAX_REQUESTS_JITTER = int(os.environ.get('CAD_RENDERER_MAX_REQUESTS_JITTER', 100))
+WORKER_TIMEOUT = int(os.environ.get('CAD_RENDERER_WORKER_TIMEOUT', 120))
+GRACEFUL_TIMEOUT = int(os.environ.get('CAD_RENDERER_GRACEFUL_TIMEOUT', 30))
+
+# /cad/batch: max number of jobs per batch and number of processes rendering them per server worker, by default
+# the cpus shared between the server workers. The jobs not rendered within BATCH_TIMEOUT seconds are reported as
+# failed, so that a batch ends before the server worker is killed for WORKER_TIMEOUT.
+BATCH_MAX_JOBS = int(os.environ.get('CAD_RENDERER_BATCH_MAX_JOBS', 500))
+BATCH_WORKERS = int(os.environ.get('CAD_RENDERER_BATCH_WORKERS', 0)) or \
+    max(1, (os.cpu_count() or 1) // (WORKERS if SERVER == 'gunicorn' else 1))
+BATCH_TIMEOUT = float(os.environ.get('CAD_RENDERER_BATCH_TIMEOUT', WORKER_TIMEOUT * 0.75))
+
+# Render cache: a memory LRU per process and a disk tier shared by the processes, both capped by size in bytes.
+# Off when rendering to files. RENDER_CACHE_DISK_BYTES=0 turns the disk tier off.
+RENDER_CACHE_ENABLED = not RENDER_TO_FILE and \
+    os.environ.get('CAD_RENDERER_RENDER_CACHE', '1').lower() in ('1', 'true', 'yes')
+RENDER_CACHE_MEMORY_BYTES = int(os.environ.get('CAD_RENDERER_RENDER_CACHE_MEMORY_BYTES', 64 * 1024 * 1024))
+RENDER_CACHE_DIR = os.environ.get('CAD_RENDERER_RENDER_CACHE_DIR', '/tmp/cad-renderer-cache')
+RENDER_CACHE_DISK_BYTES = int(os.environ.get('CAD_RENDERER_RENDER_CACHE_DISK_BYTES', 512 * 1024 * 1024))
+# payload numbers are rounded to this many digits for the cache key
+RENDER_CACHE_FLOAT_DIGITS = 6
+
+# Concurrent renders of the same payload run once, the other requests wait up to SINGLE_FLIGHT_TIMEOUT seconds
+# and get its result from the render cache. Needs the disk tier of the render cache.
+SINGLE_FLIGHT_ENABLED = RENDER_CACHE_ENABLED and RENDER_CACHE_DISK_BYTES > 0 and \
+    os.environ.get('CAD_RENDERER_SINGLE_FLIGHT', '1').lower() in ('1', 'true', 'yes')
+SINGLE_FLIGHT_DIR = os.environ.get('CAD_RENDERER_SINGLE_FLIGHT_DIR', '/tmp/cad-renderer-locks')
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get('CAD_RENDERER_SINGLE_FLIGHT_TIMEOUT', 30))
+
+# Backend of the svg output: 'cairo' (SVGSurface, text as glyph outlines) or 'direct' (components.backends.svg_backend,
+# real <text>, grouped styles, numbers with SVG_PRECISION decimals). Can be overridden per request with
+# 'svg_backend' and 'svg_precision' (up to SVG_MAX_PRECISION decimals).
+SVG_BACKEND = os.environ.get('CAD_RENDERER_SVG_BACKEND', 'cairo')
+SVG_PRECISION = int(os.environ.get('CAD_RENDERER_SVG_PRECISION', 2))
+SVG_MAX_PRECISION = 6
+
+# Label texts are measured with cairo (components.text_metrics), the widths of up to TEXT_METRICS_CACHE_SIZE texts
+# are kept per process. The label characters are measured at TEXT_METRICS_WARM_SIZES when the server starts.
+TEXT_METRICS_CACHE_SIZE = int(os.environ.get('CAD_RENDERER_TEXT_METRICS_CACHE_SIZE', 16384))
+TEXT_METRICS_WARM_SIZES = (10, 15)
+
+# Wall time of the phases of every request (json parsing, layout, drawing, encoding, ... see components.timing) is
+# sent back in a Server-Timing header, and logged as one JSON line per request with CAD_RENDERER_TIMING_LOG=1
+SERVER_TIMING = os.environ.get('CAD_RENDERER_SERVER_TIMING', '1').lower() in ('1', 'true', 'yes')
+TIMING_LOG = os.environ.get('CAD_RENDERER_TIMING_LOG', '').lower() in ('1', 'true', 'yes')
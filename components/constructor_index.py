@@ -0,0 +1,151 @@
+from bisect import bisect_left, bisect_right
+
+from components.config import PANEL_DIRECTION_PARAM_NAME
+from components.top_view.utils import get_frame_parameter_value
+
+
+class ConstructorIndex:
+    """
+    One-pass index over the constructor_data tree, built once per render.
+
+    Answers the per-panel lookups (panel node, panel direction, muntin shape, unit subtree, parameter values,
+    product category) without walking the whole tree again for every panel. Lookups are "first match wins"
+    in depth-first, pre-order, same as the tree searches in components.top_view.utils.
+    """
+
+    UNIT_PANEL_TYPES = ('unit', 'subunit')
+
+    def __init__(self, tree):
+        self.tree = tree or {}
+
+        # panel/frame/unit name -> nodes having it, in depth-first order (root excluded, 'children' links only)
+        self._nodes_by_name = {}
+        # name -> top level unit/subunit containing a node with this name
+        self._unit_by_name = {}
+        # id(node) -> (position, position of the last node of its subtree) for every dict in the tree
+        self._positions = {}
+        # lowercased parameter name -> positions, values and subtree ends of the nodes defining it
+        self._parameter_positions = {}
+        self._parameter_entries = {}
+
+        self._parameter_values_cache = {}
+
+        self.product_category_id = None
+
+        self._position = 0
+        self._index_node(self.tree, is_child=False, is_root=True, unit=None)
+
+    def _index_node(self, node, is_child, is_root, unit):
+        position = self._position
+        self._position += 1
+
+        if is_child and not is_root:
+            self._nodes_by_name.setdefault(node.get('name'), []).append(node)
+
+            if unit is not None:
+                self._unit_by_name.setdefault(node.get('name'), unit)
+
+        if (is_child or is_root) and self.product_category_id is None:
+            assembly_version = node.get('assembly_version') or {}
+            self.product_category_id = assembly_version.get('product_category_id') or None
+
+        # the first parameter with a given name wins, same as in get_frame_parameter_value
+        node_parameters = {}
+        if isinstance(node.get('parameters'), list):
+            for parameter in node['parameters']:
+                if isinstance(parameter, dict):
+                    node_parameters.setdefault((parameter.get('name') or '').lower(), parameter.get('value_name'))
+
+        entries = []
+        for name, value in node_parameters.items():
+            entry = [position, value, None]
+            self._parameter_positions.setdefault(name, []).append(position)
+            self._parameter_entries.setdefault(name, []).append(entry)
+            entries.append(entry)
+
+        for key, value in node.items():
+            if key == 'children' and (is_child or is_root) and isinstance(value, list):
+                for child in value:
+                    if not isinstance(child, dict):
+                        self._index_value(child, unit)
+                        continue
+
+                    child_unit = unit
+                    if is_root and child.get('panel_type', '') in self.UNIT_PANEL_TYPES:
+                        child_unit = child
+                    self._index_node(child, is_child=True, is_root=False, unit=child_unit)
+            else:
+                self._index_value(value, unit)
+
+        subtree_end = self._position - 1
+        for entry in entries:
+            entry[2] = subtree_end
+
+        self._positions[id(node)] = (position, subtree_end)
+
+    def _index_value(self, value, unit):
+        if isinstance(value, dict):
+            self._index_node(value, is_child=False, is_root=False, unit=unit)
+        elif isinstance(value, list):
+            for item in value:
+                self._index_value(item, unit)
+
+    def find_nodes(self, name):
+        """All nodes with the given name, in depth-first order"""
+        return self._nodes_by_name.get(name, [])
+
+    def panel_direction(self, panel_name):
+        """Movement direction of the first node with the given name that defines one"""
+        for node in self.find_nodes(panel_name):
+            for parameter in node.get('parameters', []):
+                if parameter.get('name') == PANEL_DIRECTION_PARAM_NAME:
+                    return parameter.get('value_name')
+
+        return None
+
+    def panel_muntin_shape(self, panel_name):
+        """Muntin shape of the first panel with the given name"""
+        for node in self.find_nodes(panel_name):
+            if node.get('panel_type', '') == 'panel':
+                return node.get('muntin_shape', {})
+
+        return None
+
+    def unit_subtree(self, panel_name):
+        """Same lookup as components.top_view.utils.find_unit_subtree_for_panel"""
+        return self._unit_by_name.get(panel_name, self.tree)
+
+    def parameter_value(self, param_name, tree=None):
+        """
+        Same lookup as components.top_view.utils.get_frame_parameter_value, for the whole tree
+        or for any subtree of it (e.g. the one returned by unit_subtree)
+        """
+        tree = self.tree if tree is None else tree
+
+        cache_key = (id(tree), param_name)
+        if cache_key not in self._parameter_values_cache:
+            self._parameter_values_cache[cache_key] = self._find_parameter_value(tree, param_name)
+
+        return self._parameter_values_cache[cache_key]
+
+    def _find_parameter_value(self, tree, param_name):
+        if id(tree) not in self._positions:
+            # not a part of the indexed tree
+            return get_frame_parameter_value(tree, param_name)
+
+        start, end = self._positions[id(tree)]
+
+        name = param_name.lower()
+        positions = self._parameter_positions.get(name, [])
+        entries = self._parameter_entries.get(name, [])
+
+        index = bisect_left(positions, start)
+        while index < len(positions) and positions[index] <= end:
+            position, value, subtree_end = entries[index]
+            if value or position == start:
+                return value
+
+            # a node with an empty value ends the search in its own subtree
+            index = bisect_right(positions, subtree_end, lo=index)
+
+        return None
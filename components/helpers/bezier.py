@@ -10,6 +10,21 @@ def compute_normal(tangent):
     return normal
 
 
+def compute_normals(tangents):
+    """
+    Vectorized version of compute_normal.
+
+    tangents: array of shape (..., 2)
+    returns unit normals of the same shape (tangent rotated by 90 degrees)
+    """
+    normals = np.stack([-tangents[..., 1], tangents[..., 0]], axis=-1)
+    lengths = np.linalg.norm(normals, axis=-1, keepdims=True)
+
+    # a degenerated tangent gives a nan normal, same as compute_normal does
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return normals / lengths
+
+
 # Function to compute the intersection of two lines (2D)
 def compute_intersection(p1, p2, p3, p4):
     # Returns the intersection point of two lines defined by points (p1, p2) and (p3, p4)
@@ -30,34 +45,66 @@ def compute_intersection(p1, p2, p3, p4):
         return np.array([x, y])
 
 
-# Function to evaluate a Bézier curve at parameter t using De Casteljau's algorithm
-def evaluate_bezier_curve(curve, t):
-    points = [curve["start"]] + curve["controls"] + [curve["end"]]
-    n = len(points) - 1  # Degree of the curve
-    temp_points = points.copy()
+def bernstein_basis(degree, t_values):
+    """
+    Builds the Bernstein basis matrix for the given degree.
 
-    for r in range(n):
-        for i in range(n - r):
-            temp_points[i] = (1 - t) * temp_points[i] + t * temp_points[i + 1]
+    Args:
+        degree (int): degree of the curve (3 for a cubic)
+        t_values (array): parameter values in [0, 1]
 
-    return temp_points[0]
+    Returns:
+        array of shape (len(t_values), degree + 1) where row i holds B_{j,degree}(t_i) for every j
+    """
+    t = np.asarray(t_values, dtype=float)[:, np.newaxis]
+    j = np.arange(degree + 1)
+    binomials = np.array([math.comb(degree, k) for k in j], dtype=float)
 
+    return binomials * t ** j * (1 - t) ** (degree - j)
 
-# Function to evaluate the derivative of a Bézier curve at parameter t
-def evaluate_bezier_derivative(curve, t):
-    points = [curve["start"]] + curve["controls"] + [curve["end"]]
-    n = len(points) - 1  # Degree of the curve
 
-    derivative_points = [(n * (points[i + 1] - points[i])) for i in range(n)]
+def curve_control_points(curve):
+    """Returns the control polygon of a raw cubic segment {p1, b1, b2, p2} as an array of shape (4, 2)"""
+    return np.array([curve['p1'], curve['b1'], curve['b2'], curve['p2']], dtype=float)
+
+
+def evaluate_bezier_curves(control_points, t_values):
+    """
+    Evaluates a stack of Bézier curves of the same degree for all t values at once.
+
+    Args:
+        control_points (array): shape (segments, degree + 1, 2)
+        t_values (array): parameter values in [0, 1]
+
+    Returns:
+        points, tangents - arrays of shape (segments, len(t_values), 2)
+    """
+    control_points = np.asarray(control_points, dtype=float)
+    degree = control_points.shape[1] - 1
+
+    points = np.einsum('tj,sjd->std', bernstein_basis(degree, t_values), control_points)
 
-    temp_points = derivative_points.copy()
-    n_derivative = n - 1
+    # the derivative of a degree n curve is a degree n - 1 curve over the scaled control point differences
+    derivative_points = degree * np.diff(control_points, axis=1)
+    tangents = np.einsum('tj,sjd->std', bernstein_basis(degree - 1, t_values), derivative_points)
 
-    for r in range(n_derivative):
-        for i in range(n_derivative - r):
-            temp_points[i] = (1 - t) * temp_points[i] + t * temp_points[i + 1]
+    return points, tangents
 
-    return temp_points[0]
+
+# Function to evaluate a Bézier curve at parameter t
+def evaluate_bezier_curve(curve, t):
+    points = np.array([curve["start"]] + curve["controls"] + [curve["end"]], dtype=float)
+    curve_points, _ = evaluate_bezier_curves(points[np.newaxis], [t])
+
+    return curve_points[0, 0]
+
+
+# Function to evaluate the derivative of a Bézier curve at parameter t
+def evaluate_bezier_derivative(curve, t):
+    points = np.array([curve["start"]] + curve["controls"] + [curve["end"]], dtype=float)
+    _, tangents = evaluate_bezier_curves(points[np.newaxis], [t])
+
+    return tangents[0, 0]
 
 
 # Helper function to determine the number of sampling points based on curve length
@@ -70,35 +117,118 @@ def distance_between_points(p1, p2):
     return math.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2)
 
 
-# Function to offset a Bézier curve of any degree
-def offset_bezier_curve(curve, offset, num_points):
-    curve = {
-        "start": np.array(curve['p1']),
-        "controls": [np.array(curve['b1']), np.array(curve['b2'])],
-        "end": np.array(curve['p2'])
-    }
+def offset_bezier_curves(curves, offsets, num_points):
+    """
+    Offsets a stack of cubic Bézier segments in a single NumPy pass.
+
+    Args:
+        curves (list): raw segments with p1, b1, b2 and p2
+        offsets (list): offset distance per segment
+        num_points (int): number of samples per segment
+
+    Returns:
+        array of shape (segments, num_points, 2) with the offset points
+    """
+    control_points = np.array([curve_control_points(curve) for curve in curves], dtype=float)
+    t_values = np.linspace(0, 1, num_points)
 
+    points, tangents = evaluate_bezier_curves(control_points, t_values)
+    normals = compute_normals(tangents)
+
+    return points + normals * np.asarray(offsets, dtype=float)[:, np.newaxis, np.newaxis]
+
+
+# Function to offset a Bézier curve
+def offset_bezier_curve(curve, offset, num_points):
     # # Calculate the distance from start to end of the curve
     # distance = distance_between_points(curve["start"], curve["end"])
     #
     # # Determine the number of points based on the distance
     # num_points = determine_num_points(distance)
 
-    t_values = np.linspace(0, 1, num_points)
-    offset_points = []
+    return offset_bezier_curves([curve], [offset], num_points)[0]
+
+
+def flatten_offset_bezier_curve(curve, offset, tolerance, t_start=0.0, t_end=1.0, min_segments=8, max_depth=16):
+    """
+    Adaptively flattens the offset of a cubic Bézier segment.
+
+    Starts from min_segments uniform intervals and keeps splitting only the intervals whose offset curve
+    deviates from the chord by more than the tolerance, so flat parts stay coarse and tight bends get refined.
+
+    Args:
+        curve (dict): raw segment with p1, b1, b2 and p2
+        offset (float): offset distance
+        tolerance (float): max allowed distance between the curve and its polyline, in curve units
+        t_start, t_end (float): parameter range to flatten
+        min_segments (int): number of uniform intervals to start from
+        max_depth (int): max number of refinement passes
+
+    Returns:
+        array of shape (points, 2) with the offset polyline from t_start to t_end
+    """
+    control_points = curve_control_points(curve)[np.newaxis]
+
+    def offset_at(t_values):
+        points, tangents = evaluate_bezier_curves(control_points, t_values)
+        return (points + compute_normals(tangents) * offset)[0]
+
+    t_values = np.linspace(t_start, t_end, min_segments + 1)
+    points = offset_at(t_values)
+
+    for _ in range(max_depth):
+        mid_t_values = (t_values[:-1] + t_values[1:]) / 2
+        mid_points = offset_at(mid_t_values)
+
+        # deviation of the curve from the chord, measured at the middle of every interval
+        errors = np.linalg.norm(mid_points - (points[:-1] + points[1:]) / 2, axis=1)
+        to_split = np.nonzero(errors > tolerance)[0]
+
+        if not len(to_split):
+            break
+
+        t_values = np.insert(t_values, to_split + 1, mid_t_values[to_split])
+        points = np.insert(points, to_split + 1, mid_points[to_split], axis=0)
+
+    return points
+
+
+def offset_bezier_segments(segments, default_num_points=1000, tolerance=None):
+    """
+    Offsets every segment that has an 'offset_value' and trims it to its 'intersection_indices'.
+
+    intersection_indices point into a uniform sampling of 'sample_points' samples. With no tolerance that
+    sampling is used as is, batching segments that share the same sample count. With a tolerance, the same
+    parameter range is flattened adaptively instead (see flatten_offset_bezier_curve).
+
+    Returns a list aligned with segments: an array of offset points, or None for segments without offset.
+    """
+    offset_points = [None] * len(segments)
+    groups = {}
+
+    for index, segment in enumerate(segments):
+        if not segment.get('offset_value', None):
+            continue
+
+        num_points = segment.get('sample_points', default_num_points)
 
-    for t in t_values:
-        # Compute the point on the curve
-        point = evaluate_bezier_curve(curve, t)
+        if tolerance is None:
+            groups.setdefault(num_points, []).append(index)
+            continue
 
-        # Compute the derivative at t (tangent vector)
-        derivative = evaluate_bezier_derivative(curve, t)
+        intersection_indices = segment['intersection_indices']
+        last_index = max(num_points - 1, 1)
+        t_start = min(min(intersection_indices), last_index) / last_index
+        t_end = min(max(intersection_indices), last_index) / last_index
 
-        # Compute normal vector
-        normal = compute_normal(derivative)
+        offset_points[index] = flatten_offset_bezier_curve(segment, segment['offset_value'], tolerance,
+                                                           t_start=t_start, t_end=t_end)
 
-        # Offset the point
-        offset_point = point + normal * offset
-        offset_points.append(offset_point)
+    for num_points, indices in groups.items():
+        batch = offset_bezier_curves([segments[_] for _ in indices],
+                                     [segments[_]['offset_value'] for _ in indices], num_points)
+        for index, points in zip(indices, batch):
+            intersection_indices = segments[index]['intersection_indices']
+            offset_points[index] = points[min(intersection_indices):max(intersection_indices) + 1]
 
     return offset_points
@@ -0,0 +1,116 @@
+import itertools
+from bisect import bisect_left
+
+HORIZONTAL_TYPES = ('width', 'dlo_width')
+VERTICAL_TYPES = ('height', 'dlo_height')
+
+
+class _Levels:
+    """
+    Highest level reached by the labels over every stretch of a side: raise(start, end, level) and
+    highest(start, end) in O(log n), a segment tree over the n span ends of the labels. Spans touching at an end
+    don't overlap.
+    """
+
+    def __init__(self, points):
+        self.points = sorted(set(points))
+        self.size = max(len(self.points) - 1, 1)
+        # level given to the whole stretch of a node, highest level anywhere in it
+        self.whole = [float('-inf')] * (4 * self.size)
+        self.highest_in = [float('-inf')] * (4 * self.size)
+
+    def _range(self, start, end):
+        return bisect_left(self.points, start), bisect_left(self.points, end)
+
+    def raise_to(self, start, end, level):
+        low, high = self._range(start, end)
+        if low < high:
+            self._raise(1, 0, self.size, low, high, level)
+
+    def _raise(self, node, node_low, node_high, low, high, level):
+        self.highest_in[node] = max(self.highest_in[node], level)
+        if low <= node_low and node_high <= high:
+            self.whole[node] = max(self.whole[node], level)
+            return
+
+        middle = (node_low + node_high) // 2
+        if low < middle:
+            self._raise(2 * node, node_low, middle, low, high, level)
+        if middle < high:
+            self._raise(2 * node + 1, middle, node_high, low, high, level)
+
+    def highest(self, start, end):
+        low, high = self._range(start, end)
+        if low >= high:
+            return float('-inf')
+
+        return self._highest(1, 0, self.size, low, high)
+
+    def _highest(self, node, node_low, node_high, low, high):
+        if low <= node_low and node_high <= high:
+            return self.highest_in[node]
+
+        highest = self.whole[node]
+        middle = (node_low + node_high) // 2
+        if low < middle:
+            highest = max(highest, self._highest(2 * node, node_low, middle, low, high))
+        if middle < high:
+            highest = max(highest, self._highest(2 * node + 1, middle, node_high, low, high))
+
+        return highest
+
+
+def _stack(labels, span, obstacle_span, level, base, direction):
+    """
+    Stacks the labels along one side of the frame, side_length apart.
+
+    Each label goes one side_length past the highest of the labels before it whose span it overlaps, or of the
+    side of the frame (base): labels are taken by stacking_key, so the labels of a key go past the ones of the
+    previous keys they overlap only, and in their order in the list within a key. Labels that are placed already
+    only block.
+
+    :param span: label -> (start, end) the label line covers along the side
+    :param obstacle_span: label -> (start, end) it blocks for the next ones, its text included
+    :param level: placed label -> its distance from the frame
+    :param direction: 1 to stack up (width labels), -1 to stack left (height labels)
+    """
+    placed = [_ for _ in labels if _.stacked_at is not None]
+    pending = sorted((_ for _ in labels if _.stacked_at is None), key=lambda _: _.stacking_key)
+    if not pending:
+        return
+
+    levels = _Levels(itertools.chain.from_iterable([*span(_), *obstacle_span(_)] for _ in labels))
+    for label in placed:
+        levels.raise_to(*obstacle_span(label), direction * level(label))
+
+    for label in pending:
+        floor = max(levels.highest(*span(label)), direction * base)
+        label.stacked_at = direction * (floor + label.style.side_length)
+        levels.raise_to(*obstacle_span(label), direction * level(label))
+
+
+def place_labels(labels):
+    """
+    Sets stacked_at (y2 of the width labels, x2 of the height labels) of the labels of a root frame that don't
+    have it yet, O(n log n) in the number of labels
+    """
+    if not labels:
+        return
+
+    root_frame = labels[0].root_frame
+    horizontal = [_ for _ in labels if _.type in HORIZONTAL_TYPES]
+    vertical = [_ for _ in labels if _.type in VERTICAL_TYPES]
+
+    _stack(horizontal,
+           span=lambda _: (_.x2, _.x3),
+           obstacle_span=lambda _: (_.x2, max(_.x3, _.text_x2)),
+           level=lambda _: max(_.y2, _.y3),
+           base=root_frame.y + root_frame.scaled_height,
+           direction=1)
+
+    _stack(vertical,
+           span=lambda _: (_.y2, _.y3),
+           obstacle_span=lambda _: (_.y2, max(_.y3, _.text_y2)),
+           level=lambda _: min(_.x2, _.x3),
+           base=root_frame.x,
+           direction=-1)
@@ -1,4 +1,10 @@
+import math
+
+import numpy as np
+
 from components.muntin_label import MuntinLabel
+from components.scene import LAYER_MUNTINS
+from components.timing import timed
 from components.utils import scale_point
 from enums.colors import Colors
 
@@ -8,121 +14,101 @@ class Muntin:
     def __init__(self, panel_object):
         self.panel_object = panel_object
 
-    def validate_muntin_x(self, x):
+    def clamp_to_dlo(self, lines):
         """
-        Args: x - int - x co-ordinate of a point
+        Args: lines - (n, 2, 2) array of ((x1, y1), (x2, y2)) points to draw lines bw
 
-        Function checks if the x falls in between minx and max x of dlo; if not clamp it to min or max
+        Clamps the points in place to the dlo area (overflow)
         """
-        if x < self.dlo_min_x:
-            x = self.dlo_min_x
-        elif x > self.dlo_max_x:
-            x = self.dlo_max_x
+        np.clip(lines[..., 0], self.dlo_min_x, self.dlo_max_x, out=lines[..., 0])
+        np.clip(lines[..., 1], self.dlo_min_y, self.dlo_max_y, out=lines[..., 1])
 
-        return x
+        return lines
 
-    def validate_muntin_y(self, y):
+    def draw_lines(self, lines):
         """
-        Args: y - int - y co-ordinate of a point
+        Args: lines - (n, 2, 2) array of ((x1, y1), (x2, y2)) points to draw lines bw
 
-        Function checks if the y falls in between min_y and max_y of dlo; if not clamp it to min or max
+        Draws the lines as one path, stroked once
         """
-        if y < self.dlo_min_y:
-            y = self.dlo_min_y
-        elif y > self.dlo_max_y:
-            y = self.dlo_max_y
+        if not len(lines):
+            return
 
-        return y
+        context = self.panel_object.context
+        for (x1, y1), (x2, y2) in self.clamp_to_dlo(lines).tolist():
+            context.move_to(x1, y1)
+            context.line_to(x2, y2)
+        context.stroke()
 
-    def validate_muntin_points(self, points):
+    def draw_bars(self, lines, thicknesses):
         """
-        Args: points - ((x,y),(x1,y1)) - tuple of points to draw line bw
+        Args: lines - (n, 2, 2) array of ((x, y), (x1, y1)) center lines of the bars
+              thicknesses - (n,) array of the thickness of each bar
 
-        Function checks if the points falls in the dlo area (check for overflow)
-        and returns the updated points
+        Draws the bars as rectangles of one path, filled once
         """
-        x1, y1 = points[0][0], points[0][1]
-        x2, y2 = points[1][0], points[1][1]
+        if not len(lines):
+            return
 
-        x1 = self.validate_muntin_x(x1)
-        x2 = self.validate_muntin_x(x2)
+        lines = self.clamp_to_dlo(lines)
+        x1, y1, x2, y2 = lines[:, 0, 0], lines[:, 0, 1], lines[:, 1, 0], lines[:, 1, 1]
 
-        y1 = self.validate_muntin_y(y1)
-        y2 = self.validate_muntin_y(y2)
+        x = np.minimum(x1, x2)
+        y = np.minimum(y1, y2)
+        width = thicknesses * self.panel_object.scale_factor
+        height = np.abs(y2 - y1)
 
-        return (x1, y1), (x2, y2)
+        # horizontal bars are as high as the thickness
+        horizontal = height == 0
+        width, height = np.where(horizontal, np.abs(x2 - x1), width), np.where(horizontal, width, height)
 
-    def draw_line(self, points, thickness=None):
+        # modify width and height such that it won't overflow the dlo_area
+        width = np.minimum(width, self.dlo_max_x - x)
+        height = np.minimum(height, self.dlo_max_y - y)
+
+        context = self.panel_object.context
+        for rectangle in np.stack([x, y, width, height], axis=1).tolist():
+            context.rectangle(*rectangle)
+        context.fill()
+
+    def muntin_part_lines(self, x, y):
         """
-        Args: points - ((x,y),(x1,y1)) - tuple of points to draw line bw
+        Args: x, y - bottom left of the dlo
 
+        Returns (lines, thicknesses) of every placement of the muntin parts: an (n, 2, 2) array of the scaled
+        ((x1, y1), (x2, y2)) of the parts and an (n,) array of their thickness, 0 for the parts drawn as lines
         """
-        # checks and invalidates if there is any overflow wrt dlo area
-        points = self.validate_muntin_points(points)
-
-        if thickness:
-            # draw as a rectangle
-            x1, y1 = points[0][0], points[0][1]
-            x2, y2 = points[1][0], points[1][1]
-
-            width = thickness * self.panel_object.scale_factor
-            height = abs(y2 - y1)
-
-            x = min(x1, x2)
-            y = min(y1, y2)
-
-            if height == 0:
-                # its a horizontal line
-                height = width
-                width = abs(x2 - x1)
-
-            # modify width and height such that it won't overflow the dlo_area
-            if x + width > self.dlo_max_x:
-                width = self.dlo_max_x - x
-
-            if y + height > self.dlo_max_y:
-                height = self.dlo_max_y - y
-
-            self.panel_object.context.rectangle(x, y, width, height)
-            self.panel_object.context.fill()
-        else:
-            # draw normal line
-            self.panel_object.context.move_to(points[0][0], points[0][1])
-            self.panel_object.context.line_to(points[1][0], points[1][1])
-            self.panel_object.context.stroke()
-
-    def draw_muntin_part_from_placements(self, part_data, x, y):
-        for position in part_data['placement_positions']:
-
-            if isinstance(position, (float, int)):
-                scaled_start = position * self.panel_object.scale_factor
-                scaled_part_length = part_data['length'] * self.panel_object.scale_factor
-
-                if part_data['orientation'] == 'vertical':
-                    start_point = (x + scaled_start, y)
-                    end_point = (x + scaled_start, y + scaled_part_length)
-                else:
-                    start_point = (x, y + scaled_start)
-                    end_point = (x + scaled_part_length, y + scaled_start)
-            else:
-                scaled_start_axis_1 = position[0] * self.panel_object.scale_factor
-                scaled_start_axis_2 = position[1] * self.panel_object.scale_factor
-
-                scaled_part_length = part_data['length'] * self.panel_object.scale_factor
-
-                if part_data['orientation'] == 'vertical':
-                    start_point = (x + scaled_start_axis_1, y + scaled_start_axis_2)
-                    end_point = (x + scaled_start_axis_1, y + scaled_start_axis_2 + scaled_part_length)
-                else:
-                    start_point = (x + scaled_start_axis_2, y + scaled_start_axis_1)
-                    end_point = (x + scaled_start_axis_2 + scaled_part_length, y + scaled_start_axis_1)
-
-            self.draw_line((start_point, end_point), thickness=part_data.get('thickness', None))
+        positions, lengths, thicknesses, vertical = [], [], [], []
+        for part in self.panel_object.spec.muntin_parts:
+            placements = part.placement_positions
+            positions.extend(placements)
+            lengths.extend([part.length] * len(placements))
+            thicknesses.extend([part.thickness] * len(placements))
+            vertical.extend([part.orientation == 'vertical'] * len(placements))
+
+        if not positions:
+            return np.empty((0, 2, 2)), np.empty(0)
 
+        scale_factor = self.panel_object.scale_factor
+        across, along = (np.array(positions, dtype=float) * scale_factor).T
+        lengths = np.array(lengths, dtype=float) * scale_factor
+        vertical = np.array(vertical)
+
+        start_x = np.where(vertical, x + across, x + along)
+        start_y = np.where(vertical, y + along, y + across)
+        end_x = np.where(vertical, start_x, start_x + lengths)
+        end_y = np.where(vertical, start_y + lengths, start_y)
+
+        lines = np.stack([np.stack([start_x, start_y], axis=1), np.stack([end_x, end_y], axis=1)], axis=1)
+
+        return lines, np.array(thicknesses, dtype=float)
+
+    @timed('muntins')
     def draw_muntin(self):
         muntin_parameters = self.panel_object.muntin_parameters
         context = self.panel_object.context
         context.save()
+        context.set_layer(LAYER_MUNTINS)
 
         muntin_shape = self.panel_object.muntin_shape
 
@@ -169,6 +155,7 @@ class Muntin:
                                       x + p2[0], y + p2[1])
                 context.stroke()
 
+            context.restore()
             return
 
         elif self.panel_object.muntin_parts:
@@ -176,8 +163,9 @@ class Muntin:
             context.set_source_rgba(*Colors.BLACK)
             context.set_line_width(0.5)
 
-            for part in self.panel_object.muntin_parts:
-                self.draw_muntin_part_from_placements(part, x, y)
+            lines, thicknesses = self.muntin_part_lines(x, y)
+            self.draw_lines(lines[thicknesses == 0])
+            self.draw_bars(lines[thicknesses != 0], thicknesses[thicknesses != 0])
 
             # DRAW MUNTIN LABELS
             if self.panel_object.draw_muntin_label:
@@ -206,6 +194,7 @@ class Muntin:
         pattern = muntin_parameters.get('pattern', '')
 
         if not pattern:
+            context.restore()
             return
 
         context.set_source_rgba(*Colors.BLACK)
@@ -215,35 +204,29 @@ class Muntin:
             rows = muntin_parameters['rows']
             columns = muntin_parameters['columns']
             if rows < 1 or columns < 1:
+                context.restore()
                 return
 
-            # draw vertical lines
-            # x co-ordinate for end of the dlo
-            terminate_x = x + dlo_width
-
-            while x < terminate_x:
-                x = x + dlo_width / columns
-                self.draw_line(((x, y), (x, y + dlo_height)))
-
-            # draw horizontal lines
-            # reset x to initial value
-            x = self.panel_object.x + dlo_x_offset
+            # the lines after each column and row, the last ones on the end of the dlo
+            xs = x + dlo_width * np.arange(1, math.ceil(columns) + 1) / columns
+            ys = y + dlo_height * np.arange(1, math.ceil(rows) + 1) / rows
 
-            # y co-ordinate for end of the dlo
-            terminate_y = y + dlo_height
+            vertical_lines = np.stack([np.stack([xs, np.full_like(xs, y)], axis=1),
+                                       np.stack([xs, np.full_like(xs, y + dlo_height)], axis=1)], axis=1)
+            horizontal_lines = np.stack([np.stack([np.full_like(ys, x), ys], axis=1),
+                                         np.stack([np.full_like(ys, x + dlo_width), ys], axis=1)], axis=1)
 
-            while y < terminate_y:
-                y = y + dlo_height / rows
-                self.draw_line(((x, y), (x + dlo_width, y)))
+            self.draw_lines(np.concatenate([vertical_lines, horizontal_lines]))
 
         elif pattern in ['brittany-6', 'brittany-9']:
-            self.draw_line(((x + b_offset, y), (x + b_offset, y + dlo_height)))
-            self.draw_line(((x + dlo_width - b_offset, y), (x + dlo_width - b_offset, y + dlo_height)))
+            lines = [((x + b_offset, y), (x + b_offset, y + dlo_height)),
+                     ((x + dlo_width - b_offset, y), (x + dlo_width - b_offset, y + dlo_height)),
+                     ((x, y + dlo_height - b_offset), (x + dlo_width, y + dlo_height - b_offset))]
 
-            self.draw_line(((x, y + dlo_height - b_offset), (x + dlo_width, y + dlo_height - b_offset)))
+            if pattern == 'brittany-9':
+                lines.append(((x, y + b_offset), (x + dlo_width, y + b_offset)))
 
-        if pattern == 'brittany-9':
-            self.draw_line(((x, y + b_offset), (x + dlo_width, y + b_offset)))
+            self.draw_lines(np.array(lines, dtype=float))
 
         context.restore()
 
@@ -2,19 +2,12 @@ from functools import cached_property
 
 import cairo
 
+from components.scene import LAYER_LABELS
+from components.text_metrics import text_width
 from enums.colors import Colors
 
 
 class MuntinLabel:
-    LABEL_SIDE_LENGTH = 20
-    LABEL_OFFSET = 0
-
-    STROKE_WIDTH = 0.5
-    STROKE_FORMAT = [3, 3]  # fill 3 pixels & skip 3 pixels
-
-    TEXT_SIZE = 10
-    TEXT_OFFSET = 6
-
     def __init__(self, index, part, muntin_object, previous_label):
         """
         :param part:
@@ -33,6 +26,10 @@ class MuntinLabel:
         self._draw_label()
         self._draw_text()
 
+    @cached_property
+    def style(self):
+        return self.panel.style.muntin_label
+
     def text(self):
         position = self.placement_position
 
@@ -56,9 +53,10 @@ class MuntinLabel:
 
     def _draw_label(self):
         self.context.save()
+        self.context.set_layer(LAYER_LABELS)
         self.context.set_source_rgba(*Colors.LIGHT_GREY)
-        self.context.set_line_width(self.STROKE_WIDTH)
-        self.context.set_dash(self.STROKE_FORMAT)
+        self.context.set_line_width(self.style.stroke_width)
+        self.context.set_dash(self.style.stroke_format)
 
         self.context.move_to(self.x1, self.y1)
         self.context.line_to(self.x2, self.y2)
@@ -69,8 +67,9 @@ class MuntinLabel:
 
     def _draw_text(self):
         self.context.save()
+        self.context.set_layer(LAYER_LABELS)
         self.context.set_source_rgba(*Colors.BLACK)
-        self.context.set_font_matrix(cairo.Matrix(xx=self.TEXT_SIZE, yy=-self.TEXT_SIZE))
+        self.context.set_font_matrix(cairo.Matrix(xx=self.style.text_size, yy=-self.style.text_size))
 
         self.context.move_to(self.text_x1, self.text_y1)
 
@@ -168,9 +167,9 @@ class MuntinLabel:
         if self.type == 'vertical':
             return self.x1
         elif self.type == 'horizontal':
-            offset_x = self.panel.raw_params.get('muntin_label_offset_multiplier_x', 1)
+            offset_x = self.panel.muntin_label_offset_multipliers[0]
             extra_padding = 0 if offset_x == 1 else offset_x * 15
-            return self.x1 + self.LABEL_SIDE_LENGTH * offset_x + extra_padding
+            return self.x1 + self.style.side_length * offset_x + extra_padding
 
     @cached_property
     def y2(self):
@@ -194,7 +193,7 @@ class MuntinLabel:
         """
 
         if self.type == 'vertical':
-            return self.y1 - self.LABEL_SIDE_LENGTH * self.panel.raw_params.get('muntin_label_offset_multiplier_y', 1)
+            return self.y1 - self.style.side_length * self.panel.muntin_label_offset_multipliers[1]
         elif self.type == 'horizontal':
             return self.y1
 
@@ -315,11 +314,11 @@ class MuntinLabel:
         """
         if self.type == 'vertical':
             if self.previous_label:
-                return self.x2 + abs(len(self.text()) * (self.TEXT_SIZE / 2) - self.scaled_gap_bw_prev_part()) / 2
+                return self.x2 + abs(text_width(self.text(), self.style.text_size) - self.scaled_gap_bw_prev_part()) / 2
             return self.x2 + abs(
-                len(self.text()) * (self.TEXT_SIZE / 2) - self.placement_position * self.panel.scale_factor) / 2
+                text_width(self.text(), self.style.text_size) - self.placement_position * self.panel.scale_factor) / 2
         elif self.type == 'horizontal':
-            return self.x2 + self.TEXT_OFFSET
+            return self.x2 + self.style.text_offset
 
     @cached_property
     def text_y1(self):
@@ -339,11 +338,11 @@ class MuntinLabel:
             ------
         """
         if self.type == 'vertical':
-            return self.y2 - self.TEXT_OFFSET / 2 - self.TEXT_SIZE
+            return self.y2 - self.style.text_offset / 2 - self.style.text_size
         elif self.type == 'horizontal':
             if self.previous_label:
-                return self.y2 + abs(self.scaled_gap_bw_prev_part()) / 2 - self.TEXT_SIZE / 3
-            return self.y2 + abs(self.placement_position * self.panel.scale_factor) / 2 - self.TEXT_SIZE / 3
+                return self.y2 + abs(self.scaled_gap_bw_prev_part()) / 2 - self.style.text_size / 3
+            return self.y2 + abs(self.placement_position * self.panel.scale_factor) / 2 - self.style.text_size / 3
 
     @cached_property
     def text_x2(self):
@@ -354,7 +353,7 @@ class MuntinLabel:
         (X1/Y1)PANEL A: 300 1/2'(X2/Y2)
         """
         if self.type == 'vertical':
-            return self.text_x1 + len(self.text()) * (self.TEXT_SIZE / 2)
+            return self.text_x1 + text_width(self.text(), self.style.text_size)
         elif self.type == 'horizontal':
             return self.text_x1
 
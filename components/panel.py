@@ -1,62 +1,59 @@
 import itertools
 import math
-from copy import deepcopy
 from functools import cached_property
 
 import cairo
 
-from components.config import SLIDING_DOOR_PRODUCT_CATEGORY_ID
+from components.config import SLIDING_DOOR_PRODUCT_CATEGORY_ID, PULL_TYPE_PARAM_NAME, PULL_HANDLE_LOCATION_PARAM_NAME
+from components.constructor_index import ConstructorIndex
 from components.helpers.arrow import Arrow
-from components.helpers.bezier import offset_bezier_curve
+from components.helpers.bezier import offset_bezier_segments
 from components.helpers.direction_angle import DirectionAngle
+from components.label_placement import place_labels
 from components.muntin import Muntin
-from components.top_view.utils import get_pull_type, get_pull_handle_location, find_unit_subtree_for_panel
-from components.utils import get_panel_direction_from_tree, find_shape_max_min_differences, scale_point, get_panel_muntin_shape_from_tree
+from components.payload_model import decode_bezier_sampling, decode_bezier_tolerance, decode_payload
+from components.payload_summary import PayloadSummary
+from components.render_style import RenderStyle
+from components.scene import LAYER_PANELS, LAYER_DLO
+from components.size_label import SizeLabel, SizeLabelExtents
+from components.text_metrics import text_ascent
+from components.timing import phase, timed
+from components.utils import find_shape_max_min_differences, scale_point
 from enums.colors import Colors
 
 
 class Panel:
-    LABELS_PER_FRAME = 1
-    LABELS_PER_PANEL = 2
-
-    def __init__(self, x=0.0, y=0.0, parent_panel=None, raw_params=None, scale_factor=5):
+    def __init__(self, x=0.0, y=0.0, parent_panel=None, raw_params=None, scale_factor=5, constructor_index=None,
+                 style=None, payload_summary=None, spec=None):
+        """
+        :param raw_params: the payload, decoded into spec when no spec is given
+        :param spec: PanelSpec/FrameSpec of the panel, see payload_model
+        """
         self._context = None
+        self._constructor_index = constructor_index
+        self._style = style
+        self._payload_summary = payload_summary
 
         self.x = x
         self.y = y
         self.parent_panel = parent_panel
-        self.raw_params = raw_params
+        self.spec = spec if spec is not None else decode_payload(raw_params)
+        self.raw_params = self.spec.params
 
-        self.panel_type = raw_params['panel_type']
+        self.panel_type = self.spec.panel_type
+        self.name = self.spec.name or self.panel_type
 
-        if raw_params.get('name'):
-            self.name = raw_params['name']
-        elif raw_params['panel_type'] == 'panel':
-            self.name = 'panel'
-        else:
-            self.name = 'frame'
+        self.width = self.spec.width
+        self.height = self.spec.height
+        self.dlo_width = self.spec.dlo_width
+        self.dlo_height = self.spec.dlo_height
 
-        self.move_direction = raw_params.get('move_direction')
+        self.move_direction = self.raw_params.get('move_direction')
         self.scale_factor = scale_factor
 
         self.child_panels = []
         self._size_labels = []
-
-    @property
-    def width(self):
-        return self.raw_params['width']
-
-    @property
-    def height(self):
-        return self.raw_params['height']
-
-    @property
-    def dlo_width(self):
-        return self.raw_params['dlo_width']
-
-    @property
-    def dlo_height(self):
-        return self.raw_params['dlo_height']
+        self._arranged = False
 
     @property
     def scaled_width(self):
@@ -74,14 +71,6 @@ class Panel:
     def scaled_dlo_height(self):
         return self.dlo_height * self.scale_factor
 
-    @property
-    def raw_child_panels(self):
-        return self.raw_params.get('panels') or []
-
-    @property
-    def raw_child_frames(self):
-        return self.raw_params.get('frames') or []
-
     @property
     def muntin_parameters(self):
         return self.raw_params.get('muntin_parameters') or {}
@@ -93,14 +82,48 @@ class Panel:
 
         return self.raw_params.get('constructor_data', {})
 
+    @property
+    def constructor_index(self) -> ConstructorIndex:
+        if self.parent_panel:
+            return self.parent_panel.constructor_index
+
+        if self._constructor_index is None:
+            self._constructor_index = ConstructorIndex(self.constructor_data)
+
+        return self._constructor_index
+
+    @property
+    def payload_summary(self) -> PayloadSummary:
+        if self.parent_panel:
+            return self.parent_panel.payload_summary
+
+        if self._payload_summary is None:
+            self._payload_summary = PayloadSummary(self.raw_params)
+
+        return self._payload_summary
+
+    @property
+    def muntin_label_offset_multipliers(self):
+        return self.payload_summary.muntin_label_offset_multipliers(self.raw_params)
+
+    @property
+    def style(self) -> RenderStyle:
+        if self.parent_panel:
+            return self.parent_panel.style
+
+        if self._style is None:
+            self._style = RenderStyle()
+
+        return self._style
+
     @cached_property
     def panel_direction(self):
-        return get_panel_direction_from_tree(self.constructor_data, self.name)
+        return self.constructor_index.panel_direction(self.name)
 
     @cached_property
     def pull_handle_size(self):
-        unit_tree = find_unit_subtree_for_panel(self.constructor_data, self.name)
-        pull_type = get_pull_type(unit_tree)
+        unit_tree = self.constructor_index.unit_subtree(self.name)
+        pull_type = self.constructor_index.parameter_value(PULL_TYPE_PARAM_NAME, unit_tree)
         if not pull_type:
             return ''
         elif pull_type.endswith('24"'):
@@ -114,28 +137,16 @@ class Panel:
 
     @cached_property
     def pull_handle_location(self):
-        unit_tree = find_unit_subtree_for_panel(self.constructor_data, self.name)
-        pull_handle_location = get_pull_handle_location(unit_tree, self)
+        unit_tree = self.constructor_index.unit_subtree(self.name)
+        pull_handle_location = self.constructor_index.parameter_value(PULL_HANDLE_LOCATION_PARAM_NAME, unit_tree)
         if pull_handle_location:
             return pull_handle_location.lower()
         else:
             return None
 
-    @property
+    @cached_property
     def is_sliding_assembly(self):
-        def find_product_category_id(node):
-            av = node.get("assembly_version") or {}
-            product_category_id = av.get("product_category_id")
-            if product_category_id:
-                return product_category_id
-            for child in node.get("children", []):
-                result = find_product_category_id(child)
-                if result:
-                    return result
-            return None
-
-        product_category_id = find_product_category_id(self.constructor_data)
-        return product_category_id == SLIDING_DOOR_PRODUCT_CATEGORY_ID
+        return self.constructor_index.product_category_id == SLIDING_DOOR_PRODUCT_CATEGORY_ID
 
     @property
     def muntin_parts(self):
@@ -154,7 +165,7 @@ class Panel:
     @property
     def muntin_shape(self):
         try:
-            return get_panel_muntin_shape_from_tree(self.constructor_data, self.name)
+            return self.constructor_index.panel_muntin_shape(self.name)
         except Exception:
             return None
 
@@ -165,40 +176,80 @@ class Panel:
 
         return self.raw_params.get('draw_muntin_label', False)
 
-    def group_by_rows(self, raw_panels):
-        sort_by = lambda _: f"{_['coordinates']['y']}_{_['coordinates']['x']}"
-        group_by = lambda _: _['coordinates']['y']
+    @property
+    def bezier_sampling(self):
+        """fixed - sample offset curves at 'sample_points'; adaptive - flatten them within bezier_tolerance"""
+        if self.parent_panel:
+            return self.parent_panel.bezier_sampling
+
+        return decode_bezier_sampling(self.raw_params)
 
-        _sorted = sorted(raw_panels, key=sort_by)
+    @property
+    def bezier_tolerance(self):
+        """Max distance in pixels between an offset curve and the polyline drawn for it"""
+        if self.parent_panel:
+            return self.parent_panel.bezier_tolerance
+
+        return decode_bezier_tolerance(self.raw_params)
+
+    def group_by_rows(self, specs):
+        sort_by = lambda _: f"{_.coordinates.y}_{_.coordinates.x}"
+        group_by = lambda _: _.coordinates.y
+
+        _sorted = sorted(specs, key=sort_by)
         return {k: list(v) for k, v in itertools.groupby(_sorted, key=group_by)}
 
-    def get_normalized_child_frame(self, raw_frame):
-        from services.normalization_service import NormalizationService
+    @cached_property
+    def are_child_coordinates_specified(self):
+        return any(_.coordinates for _ in self.spec.panels)
+
+    @cached_property
+    def scaled_child_frame_row_widths(self):
+        """
+        y coordinate -> scaled total width of the child frames of the row
+        """
+        row_widths = {}
+        for frame_spec in self.spec.frames:
+            y = frame_spec.coordinates.y
+            row_widths[y] = row_widths.get(y, 0) + frame_spec.width * self.scale_factor
+
+        return row_widths
 
-        siblings = [_ for _ in self.raw_child_frames if raw_frame['coordinates']['y'] == _['coordinates']['y']]
+    @cached_property
+    def scaled_child_panel_rows(self):
+        """
+        Computed once for all the child panels: (y coordinate -> scaled total width of the row, scaled total height of
+        the rows) with coordinates, (scaled total width, scaled total height) of the children without
+        """
+        if not self.are_child_coordinates_specified:
+            return (sum([_.width * self.scale_factor for _ in self.spec.panels]),
+                    sum([_.height * self.scale_factor for _ in self.spec.panels]))
 
-        scaled_total_child_width = sum([_['width'] * self.scale_factor for _ in siblings])
+        row_widths = {}
+        for panel_spec in self.spec.panels:
+            y = panel_spec.coordinates.y
+            row_widths[y] = row_widths.get(y, 0) + panel_spec.width * self.scale_factor
 
-        if self.scaled_width < scaled_total_child_width:
-            factor = self.scaled_width / scaled_total_child_width
-            service = NormalizationService(width_factor=factor, height_factor=1)
+        scaled_total_child_height = 0
+        for row, row_panels in self.group_by_rows(self.spec.panels).items():
+            scaled_total_child_height += max(_.height for _ in row_panels) * self.scale_factor
 
-            return service.run(deepcopy(raw_frame))
-        else:
-            return raw_frame
+        return row_widths, scaled_total_child_height
 
-    def get_normalized_child_panel(self, raw_panel):
-        from services.normalization_service import NormalizationService
+    def get_normalized_child_frame(self, frame_spec):
+        scaled_total_child_width = self.scaled_child_frame_row_widths[frame_spec.coordinates.y]
 
-        are_coordinates_specified = any(_['coordinates'] for _ in self.raw_child_panels if 'coordinates' in _)
+        if self.scaled_width < scaled_total_child_width:
+            factor = self.scaled_width / scaled_total_child_width
 
-        if are_coordinates_specified:
-            row_panels = [_ for _ in self.raw_child_panels if _['coordinates']['y'] == raw_panel['coordinates']['y']]
-            scaled_total_child_width = sum([_['width'] * self.scale_factor for _ in row_panels])
+            return frame_spec.normalized(width_factor=factor, height_factor=1)
+        else:
+            return frame_spec
 
-            scaled_total_child_height = 0
-            for row, row_panels in self.group_by_rows(self.raw_child_panels).items():
-                scaled_total_child_height += max(_['height'] for _ in row_panels) * self.scale_factor
+    def get_normalized_child_panel(self, panel_spec):
+        if self.are_child_coordinates_specified:
+            row_widths, scaled_total_child_height = self.scaled_child_panel_rows
+            scaled_total_child_width = row_widths[panel_spec.coordinates.y]
 
             invalid_condition_1 = self.scaled_dlo_width < scaled_total_child_width
             invalid_condition_2 = self.scaled_dlo_height < scaled_total_child_height
@@ -212,12 +263,9 @@ class Panel:
             if invalid_condition_2:
                 height_factor = self.scaled_height / scaled_total_child_height
 
-            service = NormalizationService(width_factor=width_factor, height_factor=height_factor)
-
-            return service.run(deepcopy(raw_panel))
+            return panel_spec.normalized(width_factor=width_factor, height_factor=height_factor)
         else:
-            scaled_total_child_width = sum([_['width'] * self.scale_factor for _ in self.raw_child_panels])
-            scaled_total_child_height = sum([_['height'] * self.scale_factor for _ in self.raw_child_panels])
+            scaled_total_child_width, scaled_total_child_height = self.scaled_child_panel_rows
 
             invalid_condition_1 = self.child_panels_layout == 'horizontal' and self.scaled_width < scaled_total_child_width
             invalid_condition_2 = self.child_panels_layout == 'vertical' and self.scaled_height < scaled_total_child_height
@@ -225,23 +273,23 @@ class Panel:
             if invalid_condition_1 or invalid_condition_2:
                 if self.child_panels_layout == 'horizontal':
                     factor = self.scaled_width / scaled_total_child_width
-                    service = NormalizationService(width_factor=factor, height_factor=1)
+                    return panel_spec.normalized(width_factor=factor, height_factor=1)
                 else:
                     factor = self.scaled_height / scaled_total_child_height
-                    service = NormalizationService(width_factor=1, height_factor=factor)
-
-                return service.run(deepcopy(raw_panel))
+                    return panel_spec.normalized(width_factor=1, height_factor=factor)
             else:
-                return raw_panel
+                return panel_spec
 
-    @property
+    @cached_property
     def child_panels_layout(self):
         return self.guess_orientation(
             frame_width=self.width,
             frame_height=self.height,
-            raw_child_panels=self.raw_child_panels
+            child_widths=[_.width for _ in self.spec.panels],
+            child_heights=[_.height for _ in self.spec.panels]
         )
 
+    @timed('bezier')
     def _draw_panel_beziers(self, outer_points, inner_points):
         if self.parent_panel:
             x = self.parent_panel.x
@@ -249,15 +297,17 @@ class Panel:
         else:
             return
 
-        for segment in outer_points:
-            if segment.get('offset_value', None):
-                offset_points = offset_bezier_curve(segment, segment.get('offset_value', 0),
-                                                    segment.get('sample_points', 1000))
+        # tolerance is set in pixels, convert it to curve units
+        tolerance = self.bezier_tolerance / self.scale_factor if self.bezier_sampling == 'adaptive' else None
+
+        # offset curves of all segments are computed in one batch
+        outer_offset_points = offset_bezier_segments(outer_points, tolerance=tolerance)
+
+        for segment, offset_points in zip(outer_points, outer_offset_points):
+            if offset_points is not None:
                 intersection_indices = segment['intersection_indices']
                 intersection_points = segment['intersection_points']
 
-                offset_points = offset_points[min(intersection_indices):max(intersection_indices) + 1]
-
                 self.context.move_to(x + self.scale_factor * offset_points[0][0],
                                      y + self.scale_factor * offset_points[0][1])
 
@@ -305,15 +355,11 @@ class Panel:
             x = self.parent_panel.x
             y = self.parent_panel.y
 
-        for segment in inner_points:
-
-            if segment.get('offset_value', None):
-                offset_points = offset_bezier_curve(segment, segment.get('offset_value', 0),
-                                                    segment.get('sample_points', 1000))
-                intersection_indices = segment['intersection_indices']
+        inner_offset_points = offset_bezier_segments(inner_points, tolerance=tolerance)
 
-                offset_points = offset_points[min(intersection_indices):max(intersection_indices) + 1]
+        for segment, offset_points in zip(inner_points, inner_offset_points):
 
+            if offset_points is not None:
                 self.context.move_to(x + self.scale_factor * offset_points[0][0],
                                      y + self.scale_factor * offset_points[0][1])
 
@@ -343,6 +389,7 @@ class Panel:
             return
 
         self.context.save()
+        self.context.set_layer(LAYER_PANELS)
         self.context.set_source_rgba(*Colors.BLACK)
 
         if self.name == 'opening':
@@ -355,16 +402,14 @@ class Panel:
             # max_x, max_y = find_shape_max_min_differences(self.assembly_sides)
 
             # Iterate over the sides and draw each line
-            for side in self.assembly_sides:
-
-                outer_points = side.get('segments', {}).get('outer_points', [])
+            for side, outer_segments in zip(self.assembly_sides, self.spec.outer_segments):
 
-                if outer_points:
-                    for segment in outer_points:
-                        p1 = scale_point(segment['p1'], self.scale_factor)
-                        p2 = scale_point(segment['p2'], self.scale_factor)
-                        b1 = scale_point(segment['b1'], self.scale_factor)
-                        b2 = scale_point(segment['b2'], self.scale_factor)
+                if outer_segments:
+                    for segment in outer_segments:
+                        p1 = scale_point(segment.p1, self.scale_factor)
+                        p2 = scale_point(segment.p2, self.scale_factor)
+                        b1 = scale_point(segment.b1, self.scale_factor)
+                        b2 = scale_point(segment.b2, self.scale_factor)
 
                         # Move to the start point
                         self.context.move_to(self.x + p1[0], self.y + p1[1])
@@ -419,6 +464,7 @@ class Panel:
 
     def _draw_panel(self):
         self.context.save()
+        self.context.set_layer(LAYER_PANELS)
 
         self.context.set_source_rgba(*Colors.BLACK)
         self.context.set_line_width(1)
@@ -525,6 +571,7 @@ class Panel:
 
     def _draw_panel_dlo(self):
         self.context.save()
+        self.context.set_layer(LAYER_DLO)
 
         dlo_x_offset = (self.scaled_width - self.scaled_dlo_width) / 2
         dlo_y_offset = (self.scaled_height - self.scaled_dlo_height) / 2
@@ -561,12 +608,8 @@ class Panel:
         # DRAW MUNTIN
         Muntin(panel_object=self).draw_muntin()
 
-    def _draw_child_frames(self):
-        sort_by = lambda _: f"{_['coordinates']['y']}_{_['coordinates']['x']}"
-        group_by = lambda _: _['coordinates']['y']
-
-        raw_frames = sorted(self.raw_child_frames, key=sort_by)
-        row__w__frames = {k: list(v) for k, v in itertools.groupby(raw_frames, key=group_by)}
+    def _arrange_child_frames(self):
+        row__w__frames = self.group_by_rows(self.spec.frames)
 
         initial_x_offset = (self.scaled_width - self.scaled_dlo_width) / 2
         initial_y_offset = (self.scaled_height - self.scaled_dlo_height) / 2
@@ -575,38 +618,32 @@ class Panel:
         for row, _frames in row__w__frames.items():
             x1 = self.x + initial_x_offset
 
-            normalized_raw_frames = [self.get_normalized_child_frame(raw_frame=_) for _ in _frames]
+            normalized_frames = [self.get_normalized_child_frame(frame_spec=_) for _ in _frames]
 
-            for raw_frame in normalized_raw_frames:
+            for frame_spec in normalized_frames:
                 frame = Panel(
                     x=x1,
                     y=y1,
                     parent_panel=self,
-                    raw_params=raw_frame
-                ).set_context(self.context).draw()
+                    spec=frame_spec
+                )
                 self.child_panels.append(frame)
 
                 x1 += frame.scaled_width
 
-            y1 += max([_['height'] * self.scale_factor for _ in _frames])
+            y1 += max([_.height * self.scale_factor for _ in _frames])
 
-    def _draw_child_panels(self):
-        are_coordinates_specified = any(_['coordinates'] for _ in self.raw_child_panels if 'coordinates' in _)
-        if are_coordinates_specified:
-            self._draw_child_panels__by_coordinates()
+    def _arrange_child_panels(self):
+        if self.are_child_coordinates_specified:
+            self._arrange_child_panels__by_coordinates()
         else:
-            self._draw_child_panels__by_names()
-
-    def _draw_child_panels__by_coordinates(self):
-        normalized_raw_child_panels = [self.get_normalized_child_panel(raw_panel=_) for _ in self.raw_child_panels]
-
-        sort_by = lambda _: f"{_['coordinates']['y']}_{_['coordinates']['x']}"
-        group_by = lambda _: _['coordinates']['y']
+            self._arrange_child_panels__by_names()
 
-        sorted_normalized_raw_child_panels = sorted(normalized_raw_child_panels, key=sort_by)
-        row__w__panels = {k: list(v) for k, v in itertools.groupby(sorted_normalized_raw_child_panels, key=group_by)}
+    def _arrange_child_panels__by_coordinates(self):
+        normalized_child_panels = [self.get_normalized_child_panel(panel_spec=_) for _ in self.spec.panels]
+        row__w__panels = self.group_by_rows(normalized_child_panels)
 
-        sum_of_max_heights = sum(max(_['height'] for _ in row_panels) for row_panels in row__w__panels.values())
+        sum_of_max_heights = sum(max(_.height for _ in row_panels) for row_panels in row__w__panels.values())
 
         # scaled_total_normalized_child_width = max_sum_of_widths_per_row * self.scale_factor
         scaled_total_normalized_child_height = sum_of_max_heights * self.scale_factor
@@ -616,30 +653,31 @@ class Panel:
 
         sum_of_max_heights = 0
         for row_number, row_panels in row__w__panels.items():
-            widths_sum = sum(_['width'] for _ in row_panels) * self.scale_factor
+            widths_sum = sum(_.width for _ in row_panels) * self.scale_factor
             x_offset = (self.scaled_dlo_width - widths_sum) / 2
 
             new_child_panel_instances = []
-            for panel in row_panels:
+            row_width = 0
+            for panel_spec in row_panels:
                 panel = Panel(
-                    x=self.x + x_offset + sum(_.scaled_width for _ in new_child_panel_instances),
+                    x=self.x + x_offset + row_width,
                     y=self.y + y_offset + sum_of_max_heights,
                     parent_panel=self,
-                    raw_params=panel
-                ).set_context(self.context).draw()
+                    spec=panel_spec
+                )
 
                 new_child_panel_instances.append(panel)
+                row_width += panel.scaled_width
 
             self.child_panels += new_child_panel_instances
 
             sum_of_max_heights += max(_.scaled_height for _ in new_child_panel_instances)
 
-    def _draw_child_panels__by_names(self):
-        normalized_raw_child_panels = [self.get_normalized_child_panel(raw_panel=_) for _ in self.raw_child_panels]
+    def _arrange_child_panels__by_names(self):
+        normalized_child_panels = [self.get_normalized_child_panel(panel_spec=_) for _ in self.spec.panels]
 
-        scaled_total_normalized_child_width = sum([_['width'] * self.scale_factor for _ in normalized_raw_child_panels])
-        scaled_total_normalized_child_height = sum(
-            [_['height'] * self.scale_factor for _ in normalized_raw_child_panels])
+        scaled_total_normalized_child_width = sum([_.width * self.scale_factor for _ in normalized_child_panels])
+        scaled_total_normalized_child_height = sum([_.height * self.scale_factor for _ in normalized_child_panels])
 
         x_offset, y_offset = 0, 0
         if self.child_panels_layout == 'horizontal':
@@ -648,12 +686,12 @@ class Panel:
             y_offset = (self.scaled_height - scaled_total_normalized_child_height) / 2
 
         previous_panel = None
-        for normalized_child_panel in sorted(normalized_raw_child_panels, key=lambda _: _['name'],
+        for normalized_child_panel in sorted(normalized_child_panels, key=lambda _: _.name or '',
                                              reverse=self.child_panels_layout == 'vertical'):
             if self.child_panels_layout == 'horizontal':
-                y_offset = (self.scaled_height - normalized_child_panel['height'] * self.scale_factor) / 2
+                y_offset = (self.scaled_height - normalized_child_panel.height * self.scale_factor) / 2
             elif self.child_panels_layout == 'vertical':
-                x_offset = (self.scaled_width - normalized_child_panel['width'] * self.scale_factor) / 2
+                x_offset = (self.scaled_width - normalized_child_panel.width * self.scale_factor) / 2
 
             if previous_panel:
                 if self.child_panels_layout == 'horizontal':
@@ -670,33 +708,92 @@ class Panel:
                 x=self.x + x_offset,
                 y=self.y + y_offset,
                 parent_panel=self,
-                raw_params=normalized_child_panel
-            ).set_context(self.context).draw()
+                spec=normalized_child_panel
+            )
 
             self.child_panels.append(panel)
 
             previous_panel = panel
 
-    def _draw_size_labels(self, _type='primary'):
+    def _new_size_labels(self, _type='primary'):
         """
         :param _type: primary/dlo
+        :return: the new labels, not added to the size labels of the panel
         """
-        from components.size_label import SizeLabel
-
         if _type == 'primary':
-            width_label = SizeLabel(panel=self, label_type='width')
-            height_label = SizeLabel(panel=self, label_type='height')
-            width_label.draw()
-            height_label.draw()
-            self._size_labels.append(width_label)
-            self._size_labels.append(height_label)
+            return [SizeLabel(panel=self, label_type='width'), SizeLabel(panel=self, label_type='height')]
         elif _type == 'dlo' and self.panel_type == 'panel':
-            dlo_width_label = SizeLabel(panel=self, label_type='dlo_width')
-            dlo_height_label = SizeLabel(panel=self, label_type='dlo_height')
-            dlo_width_label.draw()
-            dlo_height_label.draw()
-            self._size_labels.append(dlo_width_label)
-            self._size_labels.append(dlo_height_label)
+            return [SizeLabel(panel=self, label_type='dlo_width'), SizeLabel(panel=self, label_type='dlo_height')]
+
+        return []
+
+    def _create_size_labels(self, _type='primary'):
+        """
+        :param _type: primary/dlo
+        :return: the new labels, also added to the size labels of the panel
+        """
+        labels = self._new_size_labels(_type)
+        self._size_labels.extend(labels)
+
+        return labels
+
+    def _place_size_labels(self, create_labels):
+        """
+        Creates the size labels of the frame and of its children with create_labels(panel, _type) and places them
+        all at once
+        """
+        labels = []
+        for child_panel in self.child_panels:
+            labels.extend(create_labels(child_panel, 'dlo'))
+
+        for child_panel in self.child_panels:
+            labels.extend(create_labels(child_panel, 'primary'))
+
+        labels.extend(create_labels(self, 'primary'))
+
+        place_labels(labels)
+
+        return labels
+
+    @timed('size_labels')
+    def _draw_size_labels(self):
+        """
+        Draws the size labels of the frame and of its children, placed all at once
+        """
+        for label in self._place_size_labels(Panel._create_size_labels):
+            label.draw()
+
+    def size_label_extents(self) -> SizeLabelExtents:
+        """
+        How far the size labels of the frame and of its children reach past its sides, measured on labels placed
+        like _draw_size_labels places them, which are not drawn nor kept
+        """
+        self.arrange()
+
+        left, top, right = self.x, self.y + self.scaled_height, self.x + self.scaled_width
+        for label in self._place_size_labels(Panel._new_size_labels):
+            ascent = text_ascent(label.style.text_size)
+            if label.type in ['width', 'dlo_width']:
+                # the text stands on the line, from text_x1 to text_x2
+                top = max(top, label.y2, label.text_y1 + ascent)
+                right = max(right, label.x3, label.text_x2)
+            else:
+                # the text is turned a quarter, it rises to the left of text_x1 and runs up to text_y2
+                left = min(left, label.x2, label.text_x1 - ascent)
+                top = max(top, label.y3, label.text_y2)
+
+        return SizeLabelExtents(left=self.x - left, top=top - self.y - self.scaled_height,
+                                right=right - self.x - self.scaled_width)
+
+    def move_by(self, dx, dy):
+        """
+        Moves the arranged panel and all the panels under it, before anything is drawn
+        """
+        for panel in self.walk():
+            panel.x += dx
+            panel.y += dy
+
+        return self
 
     def _draw_move_direction(self):
         self.context.save()
@@ -779,19 +876,19 @@ class Panel:
     #         child_frame['height'] = child_frame['height'] * ratio
 
     @classmethod
-    def guess_orientation(cls, frame_width, frame_height, raw_child_panels):
+    def guess_orientation(cls, frame_width, frame_height, child_widths, child_heights):
         ###
         # Guesses if the panels layout is vertical or horizontal
         ###
 
         # this logic determines if the panel layout is vertical or horizontal
-        total_child_width = sum([_['width'] for _ in raw_child_panels])
-        total_child_height = sum([_['height'] for _ in raw_child_panels])
+        total_child_width = sum(child_widths)
+        total_child_height = sum(child_heights)
 
         delta__width_w_child_total = abs(frame_width - total_child_width)
         delta__height_w_child_total = abs(frame_height - total_child_height)
-        delta__width_w_child_max = abs(frame_width - max([_['width'] for _ in raw_child_panels]))
-        delta__height_w_child_max = abs(frame_height - max([_['height'] for _ in raw_child_panels]))
+        delta__width_w_child_max = abs(frame_width - max(child_widths))
+        delta__height_w_child_max = abs(frame_height - max(child_heights))
 
         meta_delta__width = abs(delta__width_w_child_total - delta__width_w_child_max)
         meta_delta__height = abs(delta__height_w_child_total - delta__height_w_child_max)
@@ -805,12 +902,59 @@ class Panel:
 
         return orientation
 
+    def arrange(self):
+        """
+        Layout pass: creates the children of the panel at their positions, and theirs down the whole tree, without
+        drawing anything. The sizes of the children are measured once per panel (scaled_child_panel_rows,
+        scaled_child_frame_row_widths) before they are placed.
+        """
+        if self._arranged:
+            return self
+
+        self._arranged = True
+
+        if self.spec.panels:
+            self._arrange_child_panels()
+        elif self.spec.frames:
+            self._arrange_child_frames()
+
+        for child_panel in self.child_panels:
+            child_panel.arrange()
+
+        return self
+
+    def walk(self):
+        """
+        The panel and all the panels under it, every panel after its children, like they are drawn
+        """
+        panels = []
+        stack = [self]
+        while stack:
+            panel = stack.pop()
+            panels.append(panel)
+            stack.extend(panel.child_panels)
+
+        return reversed(panels)
+
+    def layout(self):
+        """
+        The absolute rectangles of the panel and all the panels under it, in the order they are drawn
+        """
+        self.arrange()
+
+        return [{'name': _.name, 'panel_type': _.panel_type, 'x': _.x, 'y': _.y, 'width': _.scaled_width,
+                 'height': _.scaled_height} for _ in self.walk()]
+
     def draw(self):
-        if self.raw_params.get('panels', []):
-            self._draw_child_panels()
-        elif self.raw_params.get('frames', []):
-            self._draw_child_frames()
+        self.arrange()
+
+        with phase('panels'):
+            for panel in self.walk():
+                panel._draw_self()
 
+        return self
+
+    def _draw_self(self):
         if self.panel_type == 'frame':
             self._draw_frame()
         elif self.panel_type == 'panel':
@@ -819,21 +963,16 @@ class Panel:
                 self._draw_panel_dlo()
 
         if not self.parent_panel:
-            for child_panel in self.child_panels:
-                child_panel._draw_size_labels(_type='dlo')
-
-            for child_panel in self.child_panels:
-                child_panel._draw_size_labels(_type='primary')
-
-            self._draw_size_labels(_type='primary')
+            self._draw_size_labels()
 
         if self.move_direction:
             self._draw_move_direction()
 
-        return self
-
     @property
     def context(self) -> cairo.Context:
+        if self.parent_panel:
+            return self.parent_panel.context
+
         if not self._context:
             raise NotImplementedError
 
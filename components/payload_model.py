@@ -0,0 +1,296 @@
+import math
+from collections import namedtuple
+
+from components.config import BEZIER_SAMPLINGS, BEZIER_TOLERANCE, BEZIER_MIN_TOLERANCE, PNG_SCALE, PNG_MAX_SCALE, \
+    SVG_PRECISION, SVG_MAX_PRECISION
+from services.normalization_service import NormalizedParams
+
+# Typed view of the frames and panels of a /cad payload, decoded and validated in one pass by decode_payload before
+# anything is drawn. The layout and drawing code read these attributes in its loops instead of looking the keys up
+# in the raw params, which are kept (params) for everything else (label texts, constructor lookups, ...).
+
+Coordinates = namedtuple('Coordinates', 'x y')
+
+
+class BezierSegment(namedtuple('BezierSegment', 'p1 b1 b2 p2')):
+    """
+    Cubic Bézier curve of a side of a panel_shape, (x, y) points in payload units
+    """
+
+    __slots__ = ()
+
+
+class MuntinPart(namedtuple('MuntinPart', 'orientation length thickness placement_positions')):
+    """
+    :param orientation: vertical/horizontal
+    :param thickness: 0 for a part drawn as a line
+    :param placement_positions: (position across the part, start along the part) of each placement
+    """
+
+    __slots__ = ()
+
+
+_SPEC_FIELDS = 'params name width height dlo_width dlo_height coordinates muntin_parts outer_segments frames panels'
+
+
+class _Spec(namedtuple('_Spec', _SPEC_FIELDS)):
+    """
+    :param params: the raw params of the panel (a NormalizedParams view once normalized)
+    :param coordinates: Coordinates in the parent, or None
+    :param outer_segments: BezierSegments of the outer points of each side of the panel_shape, () for a straight side
+    :param frames: FrameSpecs of the child frames
+    :param panels: PanelSpecs of the child panels
+    """
+
+    __slots__ = ()
+
+    panel_type = None
+
+    def normalized(self, width_factor, height_factor):
+        """
+        The spec with the dimensions of the panel and all its children multiplied by the factors, the same ones
+        NormalizedParams gives its params
+        """
+        return self._replace(
+            params=NormalizedParams(self.params, width_factor, height_factor),
+            width=self.width * width_factor,
+            height=self.height * height_factor,
+            dlo_width=self.dlo_width * width_factor if self.panel_type == 'panel' else self.dlo_width,
+            dlo_height=self.dlo_height * height_factor if self.panel_type == 'panel' else self.dlo_height,
+            frames=tuple(_.normalized(width_factor, height_factor) for _ in self.frames),
+            panels=tuple(_.normalized(width_factor, height_factor) for _ in self.panels),
+        )
+
+
+class FrameSpec(_Spec):
+    __slots__ = ()
+
+    panel_type = 'frame'
+
+
+class PanelSpec(_Spec):
+    __slots__ = ()
+
+    panel_type = 'panel'
+
+
+class PayloadError(ValueError):
+    def __init__(self, path, message):
+        super().__init__(f'{path}: {message}' if path else message)
+
+
+def _number(raw, key, path, required=True):
+    value = raw.get(key)
+    if value is None and not required:
+        return None
+
+    if not _is_number(value):
+        raise PayloadError(f'{path}.{key}' if path else key, 'expected a number')
+
+    return value
+
+
+def _is_number(value) -> bool:
+    return not isinstance(value, bool) and isinstance(value, (int, float)) and math.isfinite(value)
+
+
+def _point(value, path):
+    if not isinstance(value, (list, tuple)) or len(value) != 2 or not all(_is_number(_) for _ in value):
+        raise PayloadError(path, 'expected an [x, y] point')
+
+    return tuple(value)
+
+
+def _list(raw, key, path):
+    value = raw.get(key)
+    if value is None:
+        return []
+
+    if not isinstance(value, list) or not all(isinstance(_, dict) for _ in value):
+        raise PayloadError(f'{path}.{key}' if path else key, 'expected a list of objects')
+
+    return value
+
+
+def _decode_muntin_part(raw, path) -> MuntinPart:
+    if raw.get('orientation') not in ('vertical', 'horizontal'):
+        raise PayloadError(f'{path}.orientation', 'expected vertical or horizontal')
+
+    positions = raw.get('placement_positions')
+    if not isinstance(positions, list):
+        raise PayloadError(f'{path}.placement_positions', 'expected a list')
+
+    placement_positions = []
+    for index, position in enumerate(positions):
+        if _is_number(position):
+            placement_positions.append((position, 0))
+        else:
+            # extra values after (across, along) are not used
+            placement_positions.append(_point(position[:2] if isinstance(position, list) else position,
+                                              f'{path}.placement_positions[{index}]'))
+
+    return MuntinPart(raw['orientation'], _number(raw, 'length', path), _number(raw, 'thickness', path, False) or 0,
+                      tuple(placement_positions))
+
+
+def _decode_outer_segments(raw, prefix):
+    panel_shape = raw.get('panel_shape')
+    if not isinstance(panel_shape, dict):
+        return ()
+
+    sides = []
+    for index, side in enumerate(_list(panel_shape, 'sides', f'{prefix}panel_shape')):
+        side_path = f'{prefix}panel_shape.sides[{index}]'
+        segments = side.get('segments') or {}
+        if not isinstance(segments, dict):
+            raise PayloadError(f'{side_path}.segments', 'expected an object')
+
+        for key in ('inner_points', 'outer_points'):
+            for segment_index, segment in enumerate(_list(segments, key, f'{side_path}.segments')):
+                for point in BezierSegment._fields:
+                    _point(segment.get(point), f'{side_path}.segments.{key}[{segment_index}].{point}')
+
+        sides.append(tuple(BezierSegment(*(tuple(segment[_]) for _ in BezierSegment._fields))
+                           for segment in _list(segments, 'outer_points', f'{side_path}.segments')))
+
+    return tuple(sides)
+
+
+def _decode_coordinates(raw, prefix, required):
+    coordinates = raw.get('coordinates')
+    if not coordinates:
+        if required:
+            raise PayloadError(f'{prefix}coordinates', 'expected an object with x and y')
+        return None
+
+    if not isinstance(coordinates, dict):
+        raise PayloadError(f'{prefix}coordinates', 'expected an object')
+
+    return Coordinates(_number(coordinates, 'x', f'{prefix}coordinates'),
+                       _number(coordinates, 'y', f'{prefix}coordinates'))
+
+
+def _decode(raw, path, coordinates_required=False):
+    """
+    :param coordinates_required: child frames are laid out by their coordinates, child panels are when any of
+    them has coordinates
+    """
+    prefix = f'{path}.' if path else ''
+
+    panel_type = raw.get('panel_type')
+    if panel_type not in ('frame', 'panel'):
+        raise PayloadError(f'{prefix}panel_type', 'expected frame or panel')
+
+    name = raw.get('name')
+    if name is not None and not isinstance(name, str):
+        raise PayloadError(f'{prefix}name', 'expected a string')
+
+    coordinates = _decode_coordinates(raw, prefix, coordinates_required)
+
+    spec_class = PanelSpec if panel_type == 'panel' else FrameSpec
+    frames = _list(raw, 'frames', path)
+    panels = _list(raw, 'panels', path)
+    panel_coordinates_required = any(_.get('coordinates') for _ in panels)
+
+    return spec_class(
+        params=raw,
+        name=name,
+        width=_number(raw, 'width', path),
+        height=_number(raw, 'height', path),
+        # the size labels and the layout of the children read the dlo of frames too
+        dlo_width=_number(raw, 'dlo_width', path),
+        dlo_height=_number(raw, 'dlo_height', path),
+        coordinates=coordinates,
+        muntin_parts=tuple(_decode_muntin_part(_, f'{prefix}muntin_parts[{index}]')
+                           for index, _ in enumerate(_list(raw, 'muntin_parts', path))),
+        outer_segments=_decode_outer_segments(raw, prefix),
+        frames=tuple(_decode(_, f'{prefix}frames[{index}]', coordinates_required=True)
+                     for index, _ in enumerate(frames)),
+        panels=tuple(_decode(_, f'{prefix}panels[{index}]', coordinates_required=panel_coordinates_required)
+                     for index, _ in enumerate(panels)),
+    )
+
+
+def decode_png_scale(raw_params):
+    """
+    Pixels per canvas unit of the png output: the png_scale of the payload (PNG_SCALE when missing), PNG_MAX_SCALE
+    at most
+    :raises PayloadError: when it is not a positive number
+    """
+    if raw_params.get('png_scale') is None:
+        return PNG_SCALE
+
+    png_scale = _number(raw_params, 'png_scale', '')
+    if png_scale <= 0:
+        raise PayloadError('png_scale', 'expected a positive number')
+
+    return min(png_scale, PNG_MAX_SCALE)
+
+
+def decode_svg_precision(raw_params) -> int:
+    """
+    Decimals of the numbers of the direct svg output: the svg_precision of the payload, SVG_PRECISION when missing
+    :raises PayloadError: when it is not a whole number from 0 to SVG_MAX_PRECISION
+    """
+    if raw_params.get('svg_precision') is None:
+        return SVG_PRECISION
+
+    svg_precision = _number(raw_params, 'svg_precision', '')
+    if svg_precision != int(svg_precision) or not 0 <= svg_precision <= SVG_MAX_PRECISION:
+        raise PayloadError('svg_precision', f'expected a whole number from 0 to {SVG_MAX_PRECISION}')
+
+    return int(svg_precision)
+
+
+def decode_bezier_sampling(raw_params) -> str:
+    """
+    How the offset curves of the panel shapes are drawn: the bezier_sampling of the payload, fixed when missing
+    :raises PayloadError: when it is not one of BEZIER_SAMPLINGS
+    """
+    bezier_sampling = raw_params.get('bezier_sampling')
+    if bezier_sampling is None:
+        return BEZIER_SAMPLINGS[0]
+
+    if bezier_sampling not in BEZIER_SAMPLINGS:
+        raise PayloadError('bezier_sampling', f"expected one of {', '.join(BEZIER_SAMPLINGS)}")
+
+    return bezier_sampling
+
+
+def decode_bezier_tolerance(raw_params):
+    """
+    Max distance in pixels between an adaptively flattened offset curve and its polyline: the bezier_tolerance of the
+    payload, BEZIER_TOLERANCE when missing
+    :raises PayloadError: when it is not a number of BEZIER_MIN_TOLERANCE at least, smaller ones would flatten the
+    curves into far too many points
+    """
+    if raw_params.get('bezier_tolerance') is None:
+        return BEZIER_TOLERANCE
+
+    bezier_tolerance = _number(raw_params, 'bezier_tolerance', '')
+    if bezier_tolerance < BEZIER_MIN_TOLERANCE:
+        raise PayloadError('bezier_tolerance', f'expected a number of {BEZIER_MIN_TOLERANCE:g} at least')
+
+    return bezier_tolerance
+
+
+def decode_options(raw_params):
+    """
+    Validates the output and drawing options of a payload, see the decode_* functions
+    :raises PayloadError: on the first invalid option
+    """
+    decode_png_scale(raw_params)
+    decode_svg_precision(raw_params)
+    decode_bezier_sampling(raw_params)
+    decode_bezier_tolerance(raw_params)
+
+
+def decode_payload(raw_params) -> _Spec:
+    """
+    Validates the frames and panels of a /cad payload and decodes them into FrameSpec/PanelSpec trees
+    :raises PayloadError: on the first invalid value, with its path in the payload (e.g. frames[0].panels[1].width)
+    """
+    if not isinstance(raw_params, dict):
+        raise PayloadError('', 'expected an object')
+
+    return _decode(raw_params, '')
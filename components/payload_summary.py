@@ -0,0 +1,84 @@
+from services.normalization_service import NormalizedParams
+
+
+class PayloadSummary:
+    """
+    What the canvas and the panels need to know about the whole payload, found in one walk over its frames and
+    panels. constructor_data is not walked and the payload is not changed.
+    """
+
+    def __init__(self, raw_params):
+        self.has_muntin_parts = False
+
+        # counts of muntin labels stacked along x and y, for the extra padding of the canvas
+        self.muntin_labels_count_x = 1
+        self.muntin_labels_count_y = 1
+
+        root_frames = raw_params.get('frames') or []
+        self.max_child_frame_x = max([(_.get('coordinates') or {}).get('x', 0) for _ in root_frames], default=0)
+        self.max_child_frame_y = max([(_.get('coordinates') or {}).get('y', 0) for _ in root_frames], default=0)
+        self.child_panel_count = len(raw_params.get('panels') or [])
+
+        # id of a raw panel -> (x, y) muntin label offset multipliers
+        self._muntin_label_offset_multipliers = {}
+
+        self._walk(raw_params)
+
+    def _walk(self, raw_params):
+        # (node, whether it is the root or a frame of frames of the root), like the labels rank them
+        stack = [(raw_params, True)]
+        while stack:
+            node, is_ranked = stack.pop()
+            frames = node.get('frames') or []
+            panels = node.get('panels') or []
+
+            if not self.has_muntin_parts:
+                self.has_muntin_parts = any(_.get('muntin_parts') for _ in frames) or \
+                    any(_.get('muntin_parts') for _ in panels)
+
+            if is_ranked:
+                self._rank_muntin_labels(panels)
+
+            stack.extend((_, is_ranked) for _ in frames)
+            stack.extend((_, False) for _ in panels)
+
+    def _rank_muntin_labels(self, panels):
+        """
+        The labels of the panels with more than one muntin part are stacked one rank further for every column
+        (and row) of such panels
+        """
+        panels = [_ for _ in panels if len(_.get('muntin_parts') or []) > 1]
+        if not panels:
+            return
+
+        ranks_x = self._ranks(panels, 'x')
+        ranks_y = self._ranks(panels, 'y')
+        for panel, rank_x, rank_y in zip(panels, ranks_x, ranks_y):
+            self._muntin_label_offset_multipliers[id(panel)] = (rank_x, rank_y)
+
+        self.muntin_labels_count_x = max(self.muntin_labels_count_x, *ranks_x)
+        self.muntin_labels_count_y = max(self.muntin_labels_count_y, *ranks_y)
+
+    @staticmethod
+    def _ranks(panels, axis):
+        """
+        :return: rank of each of the panels, 1 for the lowest coordinate along the axis and + 1 for every higher one
+        """
+        ranks = [0] * len(panels)
+        previous, rank = 0, 0
+        for index in sorted(range(len(panels)), key=lambda _: panels[_]['coordinates'][axis]):
+            if panels[index]['coordinates'][axis] > previous:
+                rank += 1
+            previous = panels[index]['coordinates'][axis]
+            ranks[index] = rank
+
+        return ranks
+
+    def muntin_label_offset_multipliers(self, raw_panel):
+        """
+        :return: (x, y) multipliers of the offset of the muntin labels of the panel
+        """
+        while isinstance(raw_panel, NormalizedParams):
+            raw_panel = raw_panel.raw_panel
+
+        return self._muntin_label_offset_multipliers.get(id(raw_panel), (1, 1))
@@ -0,0 +1,38 @@
+class LabelStyle:
+    def __init__(self, side_length=20, offset=0, stroke_width=0.5, stroke_format=(3, 3), text_size=10, text_offset=2):
+        self.side_length = side_length
+        self.offset = offset
+
+        self.stroke_width = stroke_width
+        self.stroke_format = list(stroke_format)  # fill 3 pixels & skip 3 pixels
+
+        self.text_size = text_size
+        self.text_offset = text_offset
+
+
+class TopViewStyle:
+    def __init__(self, panel_height=10, enforcement_size=15, track_wrap_thickness=10, text_size=10):
+        self.panel_height = panel_height
+        self.enforcement_size = enforcement_size
+        self.track_wrap_thickness = track_wrap_thickness
+        self.text_size = text_size
+
+
+class RenderStyle:
+    """
+    Sizes used while drawing one image.
+
+    Created by Canvas for every render and passed down to the panels, shapes, labels, muntins and the top view,
+    so nothing render specific is kept on the classes and renders can't leak settings into each other.
+    """
+
+    def __init__(self, image_format='svg'):
+        self.labels_per_frame = 1
+        self.labels_per_panel = 2
+
+        self.size_label = LabelStyle()
+        # shape labels are easier to read a bit bigger on png images
+        self.shape_label = LabelStyle(text_size=15 if image_format == 'png' else 10)
+        self.muntin_label = LabelStyle(text_offset=6)
+
+        self.top_view = TopViewStyle()
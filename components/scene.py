@@ -0,0 +1,390 @@
+import math
+from collections import namedtuple
+
+from components.text_metrics import text_width
+
+# Backend neutral description of a drawing, produced by the layout pass (see SceneRecorder) and drawn by the
+# backends in components.backends.
+#
+# Path segments, in the user space of the scene:
+#   ('M', x, y)                        move to
+#   ('L', x, y)                        line to
+#   ('C', x1, y1, x2, y2, x, y)        cubic Bézier to
+#   ('A', xc, yc, radius, a1, a2)      arc, joined to the current point by a line like cairo's arc
+#   ('R', x, y, width, height)         closed rectangle
+#   ('N',)                             new sub path, no current point
+#   ('Z',)                             close path
+
+Style = namedtuple('Style', 'rgba line_width dash line_join line_cap font_size')
+
+# op: stroke/fill; style and clip are ids in Scene.styles and Scene.clips; layer is one of LAYERS.
+# segments is a list, strokes drawn one after another are appended to it (see SceneRecorder._emit_path)
+PathItem = namedtuple('PathItem', 'style op segments clip layer')
+
+# text run starting at x, y, rotated by angle (radians) around it
+TextItem = namedtuple('TextItem', 'style x y text angle clip layer')
+
+# parent: id of the clip this one is intersected with, or None
+Clip = namedtuple('Clip', 'parent segments')
+
+DEFAULT_STYLE = Style(rgba=(0.0, 0.0, 0.0, 1.0), line_width=2.0, dash=(), line_join='miter', line_cap='butt',
+                      font_size=10.0)
+
+LINE_JOINS = ('miter', 'round', 'bevel')
+LINE_CAPS = ('butt', 'round', 'square')
+
+# what the items are, for the backends that keep them apart (e.g. dxf layers); set with SceneRecorder.set_layer
+LAYER_PANELS = 'PANELS'
+LAYER_DLO = 'DLO'
+LAYER_MUNTINS = 'MUNTINS'
+LAYER_LABELS = 'LABELS'
+LAYERS = (LAYER_PANELS, LAYER_DLO, LAYER_MUNTINS, LAYER_LABELS)
+
+
+class Scene:
+    def __init__(self, width, height, background=None, matrix=(1, 0, 0, 1, 0, 0)):
+        """
+        :param background: rgba painted under everything, None for none
+        :param matrix: (xx, yx, xy, yy, x0, y0) from the scene user space to the output, like cairo.Matrix
+        """
+        self.width = width
+        self.height = height
+        self.background = background
+        self.matrix = matrix
+
+        self.styles = []
+        self.clips = []
+        self.items = []
+
+        self._style_ids = {}
+
+    def style_id(self, style: Style) -> int:
+        if style not in self._style_ids:
+            self._style_ids[style] = len(self.styles)
+            self.styles.append(style)
+
+        return self._style_ids[style]
+
+    def clip_id(self, parent, segments) -> int:
+        self.clips.append(Clip(parent, tuple(segments)))
+
+        return len(self.clips) - 1
+
+
+class _State:
+    def __init__(self):
+        self.style = DEFAULT_STYLE
+        self.matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+        self.clip = None
+        self.layer = LAYER_PANELS
+
+    def copy(self):
+        state = _State()
+        state.style, state.matrix, state.clip, state.layer = self.style, self.matrix, self.clip, self.layer
+
+        return state
+
+
+def _bounds(segments, margin=0.0):
+    """
+    (min_x, min_y, max_x, max_y) containing the segments, grown by margin, None when they have no points (e.g. a
+    lone close_path)
+    """
+    xs, ys = [], []
+    for segment in segments:
+        kind = segment[0]
+        if kind in ('M', 'L', 'C'):
+            xs.extend(segment[1::2])
+            ys.extend(segment[2::2])
+        elif kind == 'R':
+            x, y, width, height = segment[1:]
+            xs.extend((x, x + width))
+            ys.extend((y, y + height))
+        elif kind == 'A':
+            xc, yc, radius = segment[1:4]
+            xs.extend((xc - radius, xc + radius))
+            ys.extend((yc - radius, yc + radius))
+
+    if not xs:
+        return None
+
+    return min(xs) - margin, min(ys) - margin, max(xs) + margin, max(ys) + margin
+
+
+def _overlap(bounds1, bounds2) -> bool:
+    return bounds1[0] <= bounds2[2] and bounds2[0] <= bounds1[2] and \
+        bounds1[1] <= bounds2[3] and bounds2[1] <= bounds1[3]
+
+
+def _multiply(m1, m2):
+    """m1 applied first, then m2, same as cairo_matrix_multiply"""
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+
+    return (a1 * a2 + b1 * c2, a1 * b2 + b1 * d2,
+            c1 * a2 + d1 * c2, c1 * b2 + d1 * d2,
+            e1 * a2 + f1 * c2 + e2, e1 * b2 + f1 * d2 + f2)
+
+
+class SceneRecorder:
+    """
+    Records the drawing calls of the layout code into a Scene.
+
+    Takes the place of the cairo.Context for the subset of its API used by the panels, shapes, labels, muntins
+    and the top view, with the same semantics (current point, save/restore, clip), so the layout code doesn't
+    know whether it is recorded or drawn.
+
+    Opaque strokes are coalesced: a stroke with the style, clip and layer of one of the last COALESCE_WINDOW items
+    is appended to that item when nothing drawn since overlaps it, so e.g. the segments of a frame, the DLO rects
+    or the muntin bars become one path stroked once however the layout code strokes them.
+    """
+
+    COALESCE_WINDOW = 256
+
+    # how far a stroke can reach beyond its path, in line widths (miter joins up to the default miter limit)
+    STROKE_REACH = 5
+
+    def __init__(self, scene: Scene):
+        self.scene = scene
+
+        # bounds of scene.items and (style, clip, layer) -> index of the last stroke item with them
+        self._bounds = []
+        self._strokes = {}
+
+        self._state = _State()
+        self._saved = []
+
+        self._segments = []
+        self._current_point = None
+        self._sub_path_start = None
+
+    # state
+
+    def save(self):
+        self._saved.append(self._state.copy())
+
+    def restore(self):
+        self._state = self._saved.pop()
+
+    def set_layer(self, layer):
+        """
+        Not a cairo call: the layer of what is drawn next, saved and restored with the rest of the state
+        """
+        self._state.layer = layer
+
+    def _set_style(self, **kwargs):
+        self._state.style = self._state.style._replace(**kwargs)
+
+    def set_source_rgba(self, red, green, blue, alpha=1.0):
+        self._set_style(rgba=(float(red), float(green), float(blue), float(alpha)))
+
+    def set_source_rgb(self, red, green, blue):
+        self.set_source_rgba(red, green, blue)
+
+    def set_line_width(self, width):
+        self._set_style(line_width=float(width))
+
+    def set_dash(self, dashes, offset=0):
+        self._set_style(dash=tuple(float(_) for _ in dashes))
+
+    def set_line_join(self, line_join):
+        self._set_style(line_join=LINE_JOINS[int(line_join)])
+
+    def set_line_cap(self, line_cap):
+        self._set_style(line_cap=LINE_CAPS[int(line_cap)])
+
+    def set_font_matrix(self, matrix):
+        xx, yx, xy, yy, x0, y0 = matrix
+        self._set_style(font_size=float(abs(xx)))
+
+    def set_font_size(self, size):
+        self._set_style(font_size=float(size))
+
+    # transformations
+
+    def transform(self, matrix):
+        self._state.matrix = _multiply(tuple(matrix), self._state.matrix)
+
+    def translate(self, tx, ty):
+        self.transform((1, 0, 0, 1, tx, ty))
+
+    def scale(self, sx, sy):
+        self.transform((sx, 0, 0, sy, 0, 0))
+
+    def rotate(self, angle):
+        cos, sin = math.cos(angle), math.sin(angle)
+        self.transform((cos, sin, -sin, cos, 0, 0))
+
+    def _to_scene(self, x, y):
+        xx, yx, xy, yy, x0, y0 = self._state.matrix
+        return xx * x + xy * y + x0, yx * x + yy * y + y0
+
+    def _distance_to_scene(self, dx, dy):
+        xx, yx, xy, yy, _, _ = self._state.matrix
+        return xx * dx + xy * dy, yx * dx + yy * dy
+
+    def _is_translation(self):
+        xx, yx, xy, yy, _, _ = self._state.matrix
+        return (xx, yx, xy, yy) == (1, 0, 0, 1)
+
+    # path
+
+    def new_path(self):
+        self._segments = []
+        self._current_point = None
+
+    def new_sub_path(self):
+        self._segments.append(('N',))
+        self._current_point = None
+
+    def move_to(self, x, y):
+        point = self._to_scene(x, y)
+        self._segments.append(('M',) + point)
+        self._current_point = self._sub_path_start = point
+
+    def line_to(self, x, y):
+        if self._current_point is None:
+            return self.move_to(x, y)
+
+        point = self._to_scene(x, y)
+        self._segments.append(('L',) + point)
+        self._current_point = point
+
+    def curve_to(self, x1, y1, x2, y2, x3, y3):
+        if self._current_point is None:
+            self.move_to(x1, y1)
+
+        end = self._to_scene(x3, y3)
+        self._segments.append(('C',) + self._to_scene(x1, y1) + self._to_scene(x2, y2) + end)
+        self._current_point = end
+
+    def rel_move_to(self, dx, dy):
+        dx, dy = self._distance_to_scene(dx, dy)
+        point = (self._current_point[0] + dx, self._current_point[1] + dy)
+        self._segments.append(('M',) + point)
+        self._current_point = self._sub_path_start = point
+
+    def rel_line_to(self, dx, dy):
+        dx, dy = self._distance_to_scene(dx, dy)
+        point = (self._current_point[0] + dx, self._current_point[1] + dy)
+        self._segments.append(('L',) + point)
+        self._current_point = point
+
+    def rectangle(self, x, y, width, height):
+        if self._is_translation():
+            self._segments.append(('R',) + self._to_scene(x, y) + (width, height))
+            self._current_point = self._sub_path_start = self._to_scene(x, y)
+            return
+
+        self.move_to(x, y)
+        self.line_to(x + width, y)
+        self.line_to(x + width, y + height)
+        self.line_to(x, y + height)
+        self.close_path()
+
+    def arc(self, xc, yc, radius, angle1, angle2):
+        if not self._is_translation():
+            # an 'A' segment is a circle in the scene, a rotated or scaled arc is recorded as curves
+            self._arc_to_curves(xc, yc, radius, angle1, angle2)
+            return
+
+        center = self._to_scene(xc, yc)
+        if self._current_point is None:
+            # with no current point the arc starts a new sub path
+            self._sub_path_start = (center[0] + radius * math.cos(angle1), center[1] + radius * math.sin(angle1))
+
+        self._segments.append(('A',) + center + (radius, angle1, angle2))
+        self._current_point = (center[0] + radius * math.cos(angle2), center[1] + radius * math.sin(angle2))
+
+    def _arc_to_curves(self, xc, yc, radius, angle1, angle2):
+        """
+        The arc as Bézier curves of a quarter turn at most, joined to the current point by a line like cairo's arc
+        """
+        while angle2 < angle1:
+            angle2 += 2 * math.pi
+
+        self.line_to(xc + radius * math.cos(angle1), yc + radius * math.sin(angle1))
+
+        count = math.ceil((angle2 - angle1) / (math.pi / 2))
+        if not count:
+            return
+
+        step = (angle2 - angle1) / count
+        # distance of the control points from the ends, along the tangents
+        k = radius * 4 / 3 * math.tan(step / 4)
+        for i in range(count):
+            a1 = angle1 + i * step
+            a2 = a1 + step
+            cos1, sin1, cos2, sin2 = math.cos(a1), math.sin(a1), math.cos(a2), math.sin(a2)
+            self.curve_to(xc + radius * cos1 - k * sin1, yc + radius * sin1 + k * cos1,
+                          xc + radius * cos2 + k * sin2, yc + radius * sin2 - k * cos2,
+                          xc + radius * cos2, yc + radius * sin2)
+
+    def close_path(self):
+        self._segments.append(('Z',))
+        self._current_point = self._sub_path_start
+
+    # drawing
+
+    def _emit_path(self, op):
+        segments = self._segments
+        self.new_path()
+
+        # a path of moves only draws nothing
+        if all(_[0] in ('M', 'N') for _ in segments):
+            return
+
+        style = self._state.style
+        bounds = _bounds(segments, self.STROKE_REACH * style.line_width if op == 'stroke' else 0.0)
+        # nor does a path without points, e.g. a lone close_path
+        if bounds is None:
+            return
+
+        items = self.scene.items
+        style_id = self.scene.style_id(style)
+
+        # overlapping parts of a translucent stroke would be painted once instead of twice
+        if op == 'stroke' and style.rgba[3] == 1:
+            key = (style_id, self._state.clip, self._state.layer)
+            index = self._strokes.get(key)
+            if index is not None and len(items) - index <= self.COALESCE_WINDOW and \
+                    not any(_overlap(bounds, _) for _ in self._bounds[index + 1:]):
+                # a sub path of its own, not joined to the end of the item by the line of an arc
+                if segments[0][0] not in ('M', 'R', 'N'):
+                    items[index].segments.append(('N',))
+                items[index].segments.extend(segments)
+                self._bounds[index] = (min(self._bounds[index][0], bounds[0]), min(self._bounds[index][1], bounds[1]),
+                                       max(self._bounds[index][2], bounds[2]), max(self._bounds[index][3], bounds[3]))
+                return
+
+            self._strokes[key] = len(items)
+
+        items.append(PathItem(style_id, op, segments, self._state.clip, self._state.layer))
+        self._bounds.append(bounds)
+
+    def stroke(self):
+        self._emit_path('stroke')
+
+    def fill(self):
+        self._emit_path('fill')
+
+    def show_text(self, text):
+        if self._current_point is None or not text:
+            return
+
+        xx, yx, _, _, _, _ = self._state.matrix
+        x, y = self._current_point
+        style = self.scene.style_id(self._state.style)
+        self.scene.items.append(TextItem(style, x, y, text, math.atan2(yx, xx), self._state.clip,
+                                          self._state.layer))
+
+        # the text fits in a circle around its start, whatever the angle
+        reach = (text_width(text, self._state.style.font_size) + self._state.style.font_size) * math.hypot(xx, yx)
+        self._bounds.append((x - reach, y - reach, x + reach, y + reach))
+
+    def clip(self):
+        self._state.clip = self.scene.clip_id(self._state.clip, self._segments)
+        self.new_path()
+
+    def reset_clip(self):
+        self._state.clip = None
@@ -2,17 +2,21 @@ import math
 
 import cairo
 
+from components.render_style import RenderStyle
+from components.scene import LAYER_PANELS, LAYER_MUNTINS
 from components.shapes.shape_label import ShapeLabel
+from components.timing import timed
 from components.utils import find_asin
 from enums.colors import Colors
 import logging
 
 
 class Arch:
-    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True):
+    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, style=None):
         self._context = None
         self.parent_panel = None
         self.draw_label = draw_label
+        self.style = style or RenderStyle()
 
         self.x = x
         self.y = y
@@ -242,6 +246,7 @@ class Arch:
 
         return center_x, center_y, radius, start_angle
 
+    @timed('shape')
     def draw_shape(self):
         total_width = self.scaled_width
         center_x, center_y, radius, start_angle = self.calculate_arc_parameters(self.scaled_height,
@@ -255,9 +260,9 @@ class Arch:
                 "x1": self.x,
                 "y1": self.y + self.scaled_height,
                 "x2": self.x,
-                "y2": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y2": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x3": self.x + self.scaled_width,
-                "y3": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y3": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x4": self.x + self.scaled_width,
                 "y4": self.y + self.scaled_height
             }
@@ -266,9 +271,9 @@ class Arch:
             height_label_cords = {
                 "x1": self.x,
                 "y1": self.y,
-                "x2": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x2": self.x - 2 * self.style.shape_label.side_length,
                 "y2": self.y,
-                "x3": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x3": self.x - 2 * self.style.shape_label.side_length,
                 "y3": self.y + self.scaled_height,
                 "x4": self.x,
                 "y4": self.y + self.scaled_height
@@ -293,7 +298,7 @@ class Arch:
 
             child_panel = Arch(x=self.x + x_offset, y=self.y + y_offset,
                                      raw_params=panel, scale_factor=self.scale_factor,
-                                     draw_label=self.draw_label)
+                                     draw_label=self.draw_label, style=self.style)
 
             self.child_labels.append(child_panel)
 
@@ -320,7 +325,9 @@ class Arch:
             # draw muntins
             pattern_name = self.raw_params.get('muntin_pattern', None)
             if pattern_name:
+                self.context.set_layer(LAYER_MUNTINS)
                 self.draw_muntin(pattern_name, radius, (center_x, self.y), y_offset, x_offset)
+                self.context.set_layer(LAYER_PANELS)
 
             self.x = self.x + y_offset
             self.y = self.y + y_offset
@@ -330,9 +337,9 @@ class Arch:
                     "x1": self.x,
                     "y1": self.y + self.scaled_height,
                     "x2": self.x,
-                    "y2": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y2": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x3": self.x + self.scaled_width,
-                    "y3": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y3": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x4": self.x + self.scaled_width,
                     "y4": self.y + self.scaled_height
                 }
@@ -341,9 +348,9 @@ class Arch:
                 height_label_cords = {
                     "x1": self.x,
                     "y1": self.y,
-                    "x2": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x2": self.x - self.style.shape_label.side_length,
                     "y2": self.y,
-                    "x3": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x3": self.x - self.style.shape_label.side_length,
                     "y3": self.y + self.scaled_height - y_offset,
                     "x4": self.x,
                     "y4": self.y + self.scaled_height - y_offset
@@ -1,15 +1,18 @@
 import cairo
 import math
 
+from components.render_style import RenderStyle
 from components.shapes.shape_label import ShapeLabel
+from components.timing import timed
 from enums.colors import Colors
 
 
 class Circle:
-    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True):
+    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, style=None):
         self._context = None
         self.parent_panel = None
         self.draw_label = draw_label
+        self.style = style or RenderStyle()
 
         self.x = x
         self.y = y
@@ -83,6 +86,7 @@ class Circle:
         self.context.stroke()
         self.context.restore()
 
+    @timed('shape')
     def draw_shape(self):
         # draw frame    
         outer_radius = self.scaled_width / 2
@@ -95,9 +99,9 @@ class Circle:
                 "x1": self.x,
                 "y1": self.y + self.scaled_height,
                 "x2": self.x,
-                "y2": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y2": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x3": self.x + self.scaled_width,
-                "y3": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y3": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x4": self.x + self.scaled_width,
                 "y4": self.y + self.scaled_height
             }
@@ -106,9 +110,9 @@ class Circle:
             height_label_cords = {
                 "x1": self.x,
                 "y1": self.y,
-                "x2": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x2": self.x - 2 * self.style.shape_label.side_length,
                 "y2": self.y,
-                "x3": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x3": self.x - 2 * self.style.shape_label.side_length,
                 "y3": self.y + self.scaled_height,
                 "x4": self.x,
                 "y4": self.y + self.scaled_height
@@ -125,7 +129,7 @@ class Circle:
 
             child_panel = Circle(x=self.x + x_offset, y=self.y + x_offset,
                                  raw_params=panel, scale_factor=self.scale_factor,
-                                 draw_label=self.draw_label)
+                                 draw_label=self.draw_label, style=self.style)
 
             self.child_labels.append(child_panel)
 
@@ -151,9 +155,9 @@ class Circle:
                     "x1": self.x,
                     "y1": self.y + self.scaled_height,
                     "x2": self.x,
-                    "y2": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y2": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x3": self.x + self.scaled_width,
-                    "y3": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y3": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x4": self.x + self.scaled_width,
                     "y4": self.y + self.scaled_height
                 }
@@ -162,9 +166,9 @@ class Circle:
                 height_label_cords = {
                     "x1": self.x,
                     "y1": self.y,
-                    "x2": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x2": self.x - self.style.shape_label.side_length,
                     "y2": self.y,
-                    "x3": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x3": self.x - self.style.shape_label.side_length,
                     "y3": self.y + self.scaled_height - x_offset,
                     "x4": self.x,
                     "y4": self.y + self.scaled_height - x_offset
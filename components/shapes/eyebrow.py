@@ -1,16 +1,20 @@
 import cairo
 import math
 
+from components.render_style import RenderStyle
+from components.scene import LAYER_PANELS, LAYER_MUNTINS
 from components.shapes.shape_label import ShapeLabel
+from components.timing import timed
 from components.utils import find_asin
 from enums.colors import Colors
 
 
 class Eyebrow:
-    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True):
+    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, style=None):
         self._context = None
         self.parent_panel = None
         self.draw_label = draw_label
+        self.style = style or RenderStyle()
 
         self.x = x
         self.y = y
@@ -237,6 +241,7 @@ class Eyebrow:
 
         return center_x, center_y, radius, start_angle
 
+    @timed('shape')
     def draw_shape(self):
         # difference between frame height 1 and height 2 should be equal to panel's
         height2_offset = self.height - self.height_2
@@ -264,9 +269,9 @@ class Eyebrow:
                 "x1": self.x,
                 "y1": self.y + self.scaled_height,
                 "x2": self.x,
-                "y2": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y2": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x3": self.x + self.scaled_width,
-                "y3": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y3": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x4": self.x + self.scaled_width,
                 "y4": self.y + self.scaled_height
             }
@@ -275,9 +280,9 @@ class Eyebrow:
             height_label_cords = {
                 "x1": self.x,
                 "y1": self.y,
-                "x2": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x2": self.x - 2 * self.style.shape_label.side_length,
                 "y2": self.y,
-                "x3": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x3": self.x - 2 * self.style.shape_label.side_length,
                 "y3": self.y + self.scaled_height,
                 "x4": self.x,
                 "y4": self.y + self.scaled_height
@@ -297,7 +302,7 @@ class Eyebrow:
 
             child_panel = Eyebrow(x=self.x, y=self.y,
                                   raw_params=panel, scale_factor=self.scale_factor,
-                                  draw_label=self.draw_label)
+                                  draw_label=self.draw_label, style=self.style)
 
             self.child_labels.append(child_panel)
 
@@ -337,16 +342,18 @@ class Eyebrow:
             # draw muntins
             pattern_name = self.raw_params.get('muntin_pattern', None)
             if pattern_name:
+                self.context.set_layer(LAYER_MUNTINS)
                 self.draw_muntin(pattern_name, radius, (center_x, self.y))
+                self.context.set_layer(LAYER_PANELS)
 
             if self.draw_label:
                 width_label_cords = {
                     "x1": self.x,
                     "y1": self.y + self.scaled_height,
                     "x2": self.x,
-                    "y2": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y2": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x3": self.x + self.scaled_width,
-                    "y3": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y3": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x4": self.x + self.scaled_width,
                     "y4": self.y + self.scaled_height
                 }
@@ -355,9 +362,9 @@ class Eyebrow:
                 height_label_cords = {
                     "x1": self.x,
                     "y1": self.y,
-                    "x2": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x2": self.x - self.style.shape_label.side_length,
                     "y2": self.y,
-                    "x3": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x3": self.x - self.style.shape_label.side_length,
                     "y3": self.y + self.scaled_height,
                     "x4": self.x,
                     "y4": self.y + self.scaled_height
@@ -2,16 +2,20 @@ import math
 
 import cairo
 
+from components.render_style import RenderStyle
+from components.scene import LAYER_PANELS, LAYER_MUNTINS
 from components.shapes.shape_label import ShapeLabel
+from components.timing import timed
 from components.utils import find_asin
 from enums.colors import Colors
 
 
 class HalfCircle:
-    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True):
+    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, style=None):
         self._context = None
         self.parent_panel = None
         self.draw_label = draw_label
+        self.style = style or RenderStyle()
 
         self.x = x
         self.y = y
@@ -222,6 +226,7 @@ class HalfCircle:
 
             self.draw_line((center_x - x, center_y + y), (center_x + x, center_y + y))
 
+    @timed('shape')
     def draw_shape(self):
         # draw frame
         outer_radius = self.scaled_width / 2
@@ -233,9 +238,9 @@ class HalfCircle:
                 "x1": self.x,
                 "y1": self.y + self.scaled_height,
                 "x2": self.x,
-                "y2": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y2": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x3": self.x + self.scaled_width,
-                "y3": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y3": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x4": self.x + self.scaled_width,
                 "y4": self.y + self.scaled_height
             }
@@ -244,9 +249,9 @@ class HalfCircle:
             height_label_cords = {
                 "x1": self.x,
                 "y1": self.y,
-                "x2": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x2": self.x - 2 * self.style.shape_label.side_length,
                 "y2": self.y,
-                "x3": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x3": self.x - 2 * self.style.shape_label.side_length,
                 "y3": self.y + self.scaled_height,
                 "x4": self.x,
                 "y4": self.y + self.scaled_height
@@ -263,7 +268,7 @@ class HalfCircle:
 
             child_panel = HalfCircle(x=self.x + x_offset, y=self.y + x_offset,
                                      raw_params=panel, scale_factor=self.scale_factor,
-                                     draw_label=self.draw_label)
+                                     draw_label=self.draw_label, style=self.style)
 
             self.child_labels.append(child_panel)
 
@@ -285,7 +290,9 @@ class HalfCircle:
             # draw muntins
             pattern_name = self.raw_params.get('muntin_pattern', None)
             if pattern_name:
+                self.context.set_layer(LAYER_MUNTINS)
                 self.draw_muntin(pattern_name, radius, (self.x + self.scaled_height + x_offset, self.y), x_offset)
+                self.context.set_layer(LAYER_PANELS)
 
             self.x = self.x + x_offset
             self.y = self.y + x_offset
@@ -295,9 +302,9 @@ class HalfCircle:
                     "x1": self.x,
                     "y1": self.y + self.scaled_height,
                     "x2": self.x,
-                    "y2": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y2": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x3": self.x + self.scaled_width,
-                    "y3": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y3": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x4": self.x + self.scaled_width,
                     "y4": self.y + self.scaled_height
                 }
@@ -306,9 +313,9 @@ class HalfCircle:
                 height_label_cords = {
                     "x1": self.x,
                     "y1": self.y,
-                    "x2": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x2": self.x - self.style.shape_label.side_length,
                     "y2": self.y,
-                    "x3": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x3": self.x - self.style.shape_label.side_length,
                     "y3": self.y + self.scaled_height - x_offset,
                     "x4": self.x,
                     "y4": self.y + self.scaled_height - x_offset
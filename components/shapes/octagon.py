@@ -1,15 +1,18 @@
 import math
 import cairo
 
+from components.render_style import RenderStyle
 from components.shapes.shape_label import ShapeLabel
+from components.timing import timed
 from enums.colors import Colors
 
 
 class Octagon:
-    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True):
+    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, style=None):
         self._context = None
         self.parent_panel = None
         self.draw_label = draw_label
+        self.style = style or RenderStyle()
 
         self.x = x
         self.y = y
@@ -101,6 +104,7 @@ class Octagon:
         self.context.stroke()
         self.context.restore()
 
+    @timed('shape')
     def draw_shape(self):
         # Draw frame
         outer_side_length =  self.scaled_width / 2
@@ -112,9 +116,9 @@ class Octagon:
                 "x1": self.vertices[3][0],
                 "y1": self.y + self.scaled_height,
                 "x2": self.vertices[3][0],
-                "y2": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y2": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x3": self.vertices[0][0],
-                "y3": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y3": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x4": self.vertices[0][0],
                 "y4": self.y + self.scaled_height
             }
@@ -123,9 +127,9 @@ class Octagon:
             height_label_cords = {
                 "x1": self.x,
                 "y1": self.vertices[5][1],
-                "x2": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x2": self.x - 2 * self.style.shape_label.side_length,
                 "y2": self.vertices[5][1],
-                "x3": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x3": self.x - 2 * self.style.shape_label.side_length,
                 "y3": self.vertices[1][1],
                 "x4": self.x,
                 "y4": self.vertices[1][1]
@@ -142,7 +146,7 @@ class Octagon:
 
             child_panel = Octagon(x=self.x + x_offset, y=self.y + x_offset,
                                   raw_params=panel, scale_factor=self.scale_factor,
-                                  draw_label=self.draw_label)
+                                  draw_label=self.draw_label, style=self.style)
 
             self.child_labels.append(child_panel)
 
@@ -167,9 +171,9 @@ class Octagon:
                     "x1": self.vertices[3][0],
                     "y1": self.y + self.scaled_height,
                     "x2": self.vertices[3][0],
-                    "y2": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y2": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x3": self.vertices[0][0],
-                    "y3": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y3": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x4": self.vertices[0][0],
                     "y4": self.y + self.scaled_height
                 }
@@ -178,9 +182,9 @@ class Octagon:
                 height_label_cords = {
                     "x1": self.x,
                     "y1": self.vertices[5][1],
-                    "x2": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x2": self.x - self.style.shape_label.side_length,
                     "y2": self.vertices[5][1],
-                    "x3": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x3": self.x - self.style.shape_label.side_length,
                     "y3": self.vertices[1][1],
                     "x4": self.x,
                     "y4": self.vertices[1][1],
@@ -2,15 +2,18 @@ import math
 
 import cairo
 
+from components.render_style import RenderStyle
 from components.shapes.shape_label import ShapeLabel
+from components.timing import timed
 from enums.colors import Colors
 
 
 class QuarterCircle:
-    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, direction="left"):
+    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, direction="left", style=None):
         self._context = None
         self.parent_panel = None
         self.draw_label = draw_label
+        self.style = style or RenderStyle()
 
         self.x = x
         self.y = y
@@ -103,6 +106,7 @@ class QuarterCircle:
         self.context.stroke()
         self.context.restore()
 
+    @timed('shape')
     def draw_shape(self):
         # draw frame    
         self.draw_quarter_circle(x=self.x, y=self.y, radius=self.scaled_height, thickness=2)
@@ -112,9 +116,9 @@ class QuarterCircle:
                 "x1": self.x,
                 "y1": self.y + self.scaled_height,
                 "x2": self.x,
-                "y2": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y2": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x3": self.x + self.scaled_width,
-                "y3": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y3": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x4": self.x + self.scaled_width,
                 "y4": self.y + self.scaled_height
             }
@@ -123,9 +127,9 @@ class QuarterCircle:
             height_label_cords = {
                 "x1": self.x,
                 "y1": self.y,
-                "x2": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x2": self.x - 2 * self.style.shape_label.side_length,
                 "y2": self.y,
-                "x3": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x3": self.x - 2 * self.style.shape_label.side_length,
                 "y3": self.y + self.scaled_height,
                 "x4": self.x,
                 "y4": self.y + self.scaled_height
@@ -142,7 +146,7 @@ class QuarterCircle:
 
             child_panel = QuarterCircle(x=self.x + y_offset, y=self.y + y_offset,
                                         raw_params=panel, scale_factor=self.scale_factor,
-                                        draw_label=self.draw_label)
+                                        draw_label=self.draw_label, style=self.style)
 
             self.child_labels.append(child_panel)
 
@@ -164,9 +168,9 @@ class QuarterCircle:
                     "x1": self.x,
                     "y1": self.y + self.scaled_height,
                     "x2": self.x,
-                    "y2": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y2": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x3": self.x + self.scaled_width,
-                    "y3": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y3": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x4": self.x + self.scaled_width,
                     "y4": self.y + self.scaled_height
                 }
@@ -175,9 +179,9 @@ class QuarterCircle:
                 height_label_cords = {
                     "x1": self.x,
                     "y1": self.y,
-                    "x2": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x2": self.x - self.style.shape_label.side_length,
                     "y2": self.y,
-                    "x3": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x3": self.x - self.style.shape_label.side_length,
                     "y3": self.y + self.scaled_height,
                     "x4": self.x,
                     "y4": self.y + self.scaled_height
@@ -3,19 +3,13 @@ from functools import cached_property
 import cairo
 import math
 
+from components.label_placement import place_labels
+from components.scene import LAYER_LABELS
+from components.text_metrics import text_width
 from enums.colors import Colors
 
 
 class ShapeLabel:
-    LABEL_SIDE_LENGTH = 20
-    LABEL_OFFSET = 0
-
-    STROKE_WIDTH = 0.5
-    STROKE_FORMAT = [3, 3]  # fill 3 pixels & skip 3 pixels
-
-    TEXT_SIZE = 10
-    TEXT_OFFSET = 2
-
     def __init__(self, panel, label_type: str, coordinates=None):
         """
         :param panel:
@@ -27,10 +21,25 @@ class ShapeLabel:
         self.type = label_type
         self.coordinates = coordinates
 
+        # y2 of a width label or x2 of a height label, set by place_labels
+        self.stacked_at = None
+
     def draw(self):
         self._draw_label()
         self._draw_text()
 
+    @cached_property
+    def style(self):
+        return self.panel.style.shape_label
+
+    @cached_property
+    def stacking_key(self):
+        # dlo labels are stacked closest to the frame, then the labels of the children, then the frame's own
+        if self.type in ['dlo_width', 'dlo_height']:
+            return 0
+
+        return 1 if self.panel.parent_panel else 2
+
     @cached_property
     def text(self):
         text = f"{self.panel.name.upper()}"
@@ -58,9 +67,10 @@ class ShapeLabel:
 
     def _draw_label(self):
         self.context.save()
+        self.context.set_layer(LAYER_LABELS)
         self.context.set_source_rgba(*Colors.LIGHT_GREY)
-        self.context.set_line_width(self.STROKE_WIDTH)
-        self.context.set_dash(self.STROKE_FORMAT)
+        self.context.set_line_width(self.style.stroke_width)
+        self.context.set_dash(self.style.stroke_format)
 
         self.context.move_to(self.x1, self.y1)
         self.context.line_to(self.x2, self.y2)
@@ -71,8 +81,9 @@ class ShapeLabel:
 
     def _draw_text(self):
         self.context.save()
+        self.context.set_layer(LAYER_LABELS)
         self.context.set_source_rgba(*Colors.BLACK)
-        self.context.set_font_matrix(cairo.Matrix(xx=self.TEXT_SIZE, yy=-self.TEXT_SIZE))
+        self.context.set_font_matrix(cairo.Matrix(xx=self.style.text_size, yy=-self.style.text_size))
 
         self.context.move_to(self.text_x1, self.text_y1)
 
@@ -119,7 +130,7 @@ class ShapeLabel:
             offset = (self.panel.scaled_width - self.panel.scaled_dlo_width) / 2
             return self.panel.x + offset
         elif self.type in ['height', 'dlo_height']:
-            return self.root_frame.x - self.LABEL_OFFSET
+            return self.root_frame.x - self.style.offset
 
     @cached_property
     def y1(self):
@@ -145,7 +156,7 @@ class ShapeLabel:
         if self.coordinates:
             return self.coordinates['y1']
         if self.type in ['width', 'dlo_width']:
-            return self.root_frame.y + self.root_frame.scaled_height + self.LABEL_OFFSET
+            return self.root_frame.y + self.root_frame.scaled_height + self.style.offset
         elif self.type == 'height':
             return self.panel.y
         elif self.type == 'dlo_height':
@@ -178,15 +189,8 @@ class ShapeLabel:
         if self.type in ['width', 'dlo_width']:
             return self.x1
         elif self.type in ['height', 'dlo_height']:
-            vertical_labels = [_ for _ in self.root_frame.size_labels if _.type in ['height', 'dlo_height']]
-            intersected_labels = [_ for _ in vertical_labels if self.__has_overlap([self.y2, self.y3], [_.y2, max(_.y3, _.text_y2)])]
-
-            if intersected_labels:
-                min_x_point = min([min(_.x2, _.x3) for _ in intersected_labels])
-            else:
-                min_x_point = self.root_frame.x
-
-            return min_x_point - self.LABEL_SIDE_LENGTH
+            self.__stack()
+            return self.stacked_at
 
     @cached_property
     def y2(self):
@@ -212,16 +216,8 @@ class ShapeLabel:
         if self.coordinates:
             return self.coordinates['y2']
         if self.type in ['width', 'dlo_width']:
-            horizontal_labels = [_ for _ in self.root_frame.size_labels if _.type in ['width', 'dlo_width']]
-
-            intersected_labels = [_ for _ in horizontal_labels if self.__has_overlap([self.x2, self.x3], [_.x2, max(_.x3, _.text_x2)])]
-
-            if intersected_labels:
-                max_y_point = max([max(_.y2, _.y3) for _ in intersected_labels])
-            else:
-                max_y_point = self.root_frame.y + self.root_frame.scaled_height
-
-            return max_y_point + self.LABEL_SIDE_LENGTH
+            self.__stack()
+            return self.stacked_at
         elif self.type in ['height', 'dlo_height']:
             return self.y1
 
@@ -350,9 +346,9 @@ class ShapeLabel:
         |                          |
         """
         if self.type in ['width', 'dlo_width']:
-            return self.x2 + self.TEXT_OFFSET
+            return self.x2 + self.style.text_offset
         elif self.type in ['height', 'dlo_height']:
-            return self.x2 - self.TEXT_OFFSET
+            return self.x2 - self.style.text_offset
 
     @cached_property
     def text_y1(self):
@@ -372,9 +368,9 @@ class ShapeLabel:
             ------
         """
         if self.type in ['width', 'dlo_width']:
-            return self.y2 + self.TEXT_OFFSET
+            return self.y2 + self.style.text_offset
         elif self.type in ['height', 'dlo_height']:
-            return self.y2 + self.TEXT_OFFSET
+            return self.y2 + self.style.text_offset
 
     @cached_property
     def text_x2(self):
@@ -385,7 +381,7 @@ class ShapeLabel:
         |                          |
         """
         if self.type in ['width', 'dlo_width']:
-            return self.text_x1 + len(self.text) * (self.TEXT_SIZE / 2)
+            return self.text_x1 + text_width(self.text, self.style.text_size)
         elif self.type in ['height', 'dlo_height']:
             return self.text_x1
 
@@ -409,7 +405,7 @@ class ShapeLabel:
         if self.type in ['width', 'dlo_width']:
             return self.text_y1
         elif self.type in ['height', 'dlo_height']:
-            return self.text_y1 + len(self.text) * (self.TEXT_SIZE / 2)
+            return self.text_y1 + text_width(self.text, self.style.text_size)
 
     @staticmethod
     def __convert_to_fraction(original_number: float) -> str:
@@ -429,6 +425,9 @@ class ShapeLabel:
             else:
                 return f"{natural_number} {fraction[0]}/{fraction[1]}"
 
-    @staticmethod
-    def __has_overlap(interval1, interval2) -> bool:
-        return bool(max(0, min(interval1[1], interval2[1]) - max(interval1[0], interval2[0])))
+    def __stack(self):
+        """
+        Places the label if it is drawn on its own, Panel places all the labels of a frame at once
+        """
+        if self.stacked_at is None:
+            place_labels([_ for _ in self.root_frame.size_labels if _ is not self] + [self])
@@ -1,16 +1,20 @@
 import cairo
 import math
 
+from components.render_style import RenderStyle
+from components.scene import LAYER_PANELS, LAYER_MUNTINS
 from components.shapes.shape_label import ShapeLabel
+from components.timing import timed
 from components.utils import find_asin
 from enums.colors import Colors
 
 
 class Tombstone:
-    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True):
+    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, style=None):
         self._context = None
         self.parent_panel = None
         self.draw_label = draw_label
+        self.style = style or RenderStyle()
 
         self.x = x
         self.y = y
@@ -311,6 +315,7 @@ class Tombstone:
             self.draw_sun_rays(radius, sun_radius, sun_width, sun_height, center, 3)
             self.draw_horizontal_lines(1)
 
+    @timed('shape')
     def draw_shape(self):
         self.draw_line((self.x, self.y), (self.x + self.scaled_width, self.y), 2)
         self.draw_line((self.x, self.y), (self.x, self.y + self.scaled_height_2), 2)
@@ -335,9 +340,9 @@ class Tombstone:
                 "x1": self.x,
                 "y1": self.y + self.scaled_height,
                 "x2": self.x,
-                "y2": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y2": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x3": self.x + self.scaled_width,
-                "y3": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y3": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x4": self.x + self.scaled_width,
                 "y4": self.y + self.scaled_height
             }
@@ -346,9 +351,9 @@ class Tombstone:
             height_label_cords = {
                 "x1": self.x,
                 "y1": self.y,
-                "x2": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x2": self.x - 2 * self.style.shape_label.side_length,
                 "y2": self.y,
-                "x3": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x3": self.x - 2 * self.style.shape_label.side_length,
                 "y3": self.y + self.scaled_height,
                 "x4": self.x,
                 "y4": self.y + self.scaled_height
@@ -368,7 +373,7 @@ class Tombstone:
 
             child_panel = Tombstone(x=self.x, y=self.y,
                                     raw_params=panel, scale_factor=self.scale_factor,
-                                    draw_label=self.draw_label)
+                                    draw_label=self.draw_label, style=self.style)
 
             self.child_labels.append(child_panel)
 
@@ -404,16 +409,18 @@ class Tombstone:
             # draw muntins
             pattern_name = self.raw_params.get('muntin_pattern', None)
             if pattern_name:
+                self.context.set_layer(LAYER_MUNTINS)
                 self.draw_muntin(pattern_name, radius, (center_x, self.y))
+                self.context.set_layer(LAYER_PANELS)
 
             if self.draw_label:
                 width_label_cords = {
                     "x1": self.x,
                     "y1": self.y + self.scaled_height,
                     "x2": self.x,
-                    "y2": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y2": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x3": self.x + self.scaled_width,
-                    "y3": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y3": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x4": self.x + self.scaled_width,
                     "y4": self.y + self.scaled_height
                 }
@@ -422,9 +429,9 @@ class Tombstone:
                 height_label_cords = {
                     "x1": self.x,
                     "y1": self.y,
-                    "x2": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x2": self.x - self.style.shape_label.side_length,
                     "y2": self.y,
-                    "x3": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x3": self.x - self.style.shape_label.side_length,
                     "y3": self.y + self.scaled_height,
                     "x4": self.x,
                     "y4": self.y + self.scaled_height
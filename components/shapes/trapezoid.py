@@ -2,15 +2,18 @@ import math
 
 import cairo
 
+from components.render_style import RenderStyle
 from components.shapes.shape_label import ShapeLabel
+from components.timing import timed
 from enums.colors import Colors
 
 
 class Trapezoid:
-    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, direction='left'):
+    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, direction='left', style=None):
         self._context = None
         self.parent_panel = None
         self.draw_label = draw_label
+        self.style = style or RenderStyle()
 
         self.x = x
         self.y = y
@@ -124,6 +127,7 @@ class Trapezoid:
         self.raw_params['height'] = larger_height
         self.raw_params['height_2'] = smaller_height
 
+    @timed('shape')
     def draw_shape(self):
         # if height 2 is zero, return false
         if not self.height_2:
@@ -146,9 +150,9 @@ class Trapezoid:
                 "x1": self.x,
                 "y1": self.y + self.scaled_height,
                 "x2": self.x,
-                "y2": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y2": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x3": self.x + self.scaled_width,
-                "y3": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y3": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                 "x4": self.x + self.scaled_width,
                 "y4": self.y + self.scaled_height
             }
@@ -157,9 +161,9 @@ class Trapezoid:
             height_label_cords = {
                 "x1": self.x,
                 "y1": self.y,
-                "x2": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x2": self.x - 2 * self.style.shape_label.side_length,
                 "y2": self.y,
-                "x3": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x3": self.x - 2 * self.style.shape_label.side_length,
                 "y3": self.y + self.scaled_height,
                 "x4": self.x,
                 "y4": self.y + self.scaled_height
@@ -183,7 +187,7 @@ class Trapezoid:
 
             child_panel = Trapezoid(x=self.x + x_offset, y=self.y + y_offset,
                                     raw_params=panel, scale_factor=self.scale_factor,
-                                    draw_label=self.draw_label)
+                                    draw_label=self.draw_label, style=self.style)
 
             self.child_labels.append(child_panel)
 
@@ -204,9 +208,9 @@ class Trapezoid:
                     "x1": self.x,
                     "y1": self.y + self.scaled_height,
                     "x2": self.x,
-                    "y2": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y2": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x3": self.x + self.scaled_width,
-                    "y3": self.y + self.scaled_height + ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y3": self.y + self.scaled_height + self.style.shape_label.side_length,
                     "x4": self.x + self.scaled_width,
                     "y4": self.y + self.scaled_height
                 }
@@ -215,9 +219,9 @@ class Trapezoid:
                 height_label_cords = {
                     "x1": self.x,
                     "y1": self.y,
-                    "x2": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x2": self.x - self.style.shape_label.side_length,
                     "y2": self.y,
-                    "x3": self.x - ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x3": self.x - self.style.shape_label.side_length,
                     "y3": self.y + self.scaled_height,
                     "x4": self.x,
                     "y4": self.y + self.scaled_height
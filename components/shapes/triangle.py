@@ -2,15 +2,18 @@ import math
 
 import cairo
 
+from components.render_style import RenderStyle
 from components.shapes.shape_label import ShapeLabel
+from components.timing import timed
 from enums.colors import Colors
 
 
 class Triangle:
-    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, direction="left"):
+    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, direction="left", style=None):
         self._context = None
         self.parent_panel = None
         self.draw_label = draw_label
+        self.style = style or RenderStyle()
 
         self.x = x
         self.y = y
@@ -107,6 +110,7 @@ class Triangle:
         self.context.stroke()
         self.context.restore()
 
+    @timed('shape')
     def draw_shape(self):
         #  find the base angles
         top_angle = math.atan(self.scaled_width / self.scaled_height)
@@ -121,9 +125,9 @@ class Triangle:
                 "x1": self.x,
                 "y1": self.y + self.scaled_height,
                 "x2": self.x,
-                "y2": self.y + self.scaled_height + 3 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y2": self.y + self.scaled_height + 3 * self.style.shape_label.side_length,
                 "x3": self.x + self.scaled_width,
-                "y3": self.y + self.scaled_height + 3 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "y3": self.y + self.scaled_height + 3 * self.style.shape_label.side_length,
                 "x4": self.x + self.scaled_width,
                 "y4": self.y + self.scaled_height
             }
@@ -132,9 +136,9 @@ class Triangle:
             height_label_cords = {
                 "x1": self.x,
                 "y1": self.y,
-                "x2": self.x - 3 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x2": self.x - 3 * self.style.shape_label.side_length,
                 "y2": self.y,
-                "x3": self.x - 3 * ShapeLabel.LABEL_SIDE_LENGTH,
+                "x3": self.x - 3 * self.style.shape_label.side_length,
                 "y3": self.y + self.scaled_height,
                 "x4": self.x,
                 "y4": self.y + self.scaled_height
@@ -165,7 +169,7 @@ class Triangle:
 
             child_panel = Triangle(x=self.x + x_offset, y=self.y + y_offset,
                                    raw_params=panel, scale_factor=self.scale_factor,
-                                   draw_label=self.draw_label)
+                                   draw_label=self.draw_label, style=self.style)
 
             self.child_labels.append(child_panel)
 
@@ -188,9 +192,9 @@ class Triangle:
                     "x1": x1,
                     "y1": self.y + self.scaled_height,
                     "x2": x1,
-                    "y2": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y2": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                     "x3": x3,
-                    "y3": self.y + self.scaled_height + 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                    "y3": self.y + self.scaled_height + 2 * self.style.shape_label.side_length,
                     "x4": x3,
                     "y4": self.y + self.scaled_height
                 }
@@ -199,9 +203,9 @@ class Triangle:
                 height_label_cords = {
                     "x1": self.x,
                     "y1": self.y,
-                    "x2": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x2": self.x - 2 * self.style.shape_label.side_length,
                     "y2": self.y,
-                    "x3": self.x - 2 * ShapeLabel.LABEL_SIDE_LENGTH,
+                    "x3": self.x - 2 * self.style.shape_label.side_length,
                     "y3": self.y + self.scaled_height,
                     "x4": self.x,
                     "y4": self.y + self.scaled_height
@@ -0,0 +1,73 @@
+import string
+import threading
+from functools import lru_cache
+
+import cairo
+
+from components.config import TEXT_METRICS_CACHE_SIZE, TEXT_METRICS_WARM_SIZES
+
+# cairo's default font face, the one the labels are drawn with (they don't select one)
+DEFAULT_FONT = ''
+
+# what the label texts are made of: panel names, "<x, y>" of the child frames and the dimensions (30 1/2')
+LABEL_CHARACTERS = string.ascii_uppercase + string.digits + " :/'<>,.-"
+
+# the scratch context the texts are measured with, shared by the threads of the process
+_lock = threading.Lock()
+_context = None
+
+
+def _measuring_context(font, size):
+    global _context
+
+    if _context is None:
+        _context = cairo.Context(cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1))
+        # unhinted metrics, the same on every surface and scale the text ends up on
+        font_options = cairo.FontOptions()
+        font_options.set_hint_metrics(cairo.HINT_METRICS_OFF)
+        _context.set_font_options(font_options)
+
+    if font:
+        _context.select_font_face(font)
+    else:
+        _context.set_font_face(None)
+    _context.set_font_size(size)
+
+    return _context
+
+
+@lru_cache(maxsize=None)
+def _glyph_advance(character, size, font):
+    with _lock:
+        return _measuring_context(font, size).text_extents(character).x_advance
+
+
+@lru_cache(maxsize=TEXT_METRICS_CACHE_SIZE)
+def text_width(text, size, font=DEFAULT_FONT) -> float:
+    """
+    Length of the baseline of the text drawn with show_text at the font size.
+
+    cairo's show_text doesn't kern, so it is the sum of the advances of the characters, measured once per
+    (character, size, font) for the process.
+    """
+    return sum(_glyph_advance(_, size, font) for _ in text)
+
+
+@lru_cache(maxsize=None)
+def text_ascent(size, font=DEFAULT_FONT) -> float:
+    """
+    How far the text rises from its baseline at the font size
+    """
+    with _lock:
+        return _measuring_context(font, size).font_extents()[0]
+
+
+def warm_text_metrics(sizes=TEXT_METRICS_WARM_SIZES):
+    """
+    Measures the characters of the label texts at the label sizes, so that the first renders of the process
+    don't measure them
+    """
+    for size in sizes:
+        text_ascent(size)
+        for character in LABEL_CHARACTERS:
+            _glyph_advance(character, size, DEFAULT_FONT)
@@ -0,0 +1,99 @@
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+
+# the PhaseTimer of the request being served, None outside of a timed request (batch jobs, scripts)
+_current_timer = contextvars.ContextVar('phase_timer', default=None)
+
+
+class PhaseTimer:
+    """
+    Wall time spent in the phases of one request, see phase() and timed().
+
+    A phase entered many times (e.g. the muntins of every panel) adds up, phases can be nested (bezier is part of
+    panels), so they don't sum up to the total.
+    """
+
+    def __init__(self):
+        self.started = None
+        self.stopped = None
+        # name -> [seconds, count], in the order the phases are first entered
+        self.phases = {}
+        self._token = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._token = _current_timer.set(self)
+
+        return self
+
+    def stop(self):
+        self.stopped = time.perf_counter()
+        if self._token is not None:
+            _current_timer.reset(self._token)
+            self._token = None
+
+        return self
+
+    def add(self, name, seconds):
+        if name in self.phases:
+            self.phases[name][0] += seconds
+            self.phases[name][1] += 1
+        else:
+            self.phases[name] = [seconds, 1]
+
+    @property
+    def total(self):
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def server_timing(self) -> str:
+        """
+        Value of the Server-Timing header, durations in milliseconds
+        """
+        metrics = [f'{name};dur={seconds * 1000:.2f}' for name, (seconds, count) in self.phases.items()]
+        metrics.append(f'total;dur={self.total * 1000:.2f}')
+
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total * 1000, 2),
+            'phases': {name: {'ms': round(seconds * 1000, 2), 'count': count}
+                       for name, (seconds, count) in self.phases.items()},
+        }
+
+
+@contextmanager
+def phase(name):
+    """
+    Adds the time spent in the block to the phase of the current request, does nothing outside of a timed request
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+def timed(name):
+    """
+    Decorator timing every call of the function as the phase
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _current_timer.get() is None:
+                return function(*args, **kwargs)
+
+            with phase(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
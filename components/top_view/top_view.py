@@ -3,21 +3,20 @@ from functools import cached_property
 import cairo
 
 from components.config import SLIDING_DOOR_PRODUCT_CATEGORY_ID
+from components.render_style import RenderStyle
+from components.scene import LAYER_LABELS
+from components.timing import timed
 from components.top_view.utils import get_dimensions_from_layers, get_frames_with_panels, get_number_of_tracks_value, \
     get_track_number_of_panel, get_frame_category, get_pocket_width, get_pocket_location
 from enums.colors import Colors
 
 
 class TopView:
-    PANEL_HEIGHT = 10
-    ENFORCEMENT_SIZE = 15
-    TRACK_WRAP_THICKNESS = 10
-    TEXT_SIZE = 10
-
-    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True):
+    def __init__(self, x=0, y=0, raw_params=None, scale_factor=1, draw_label=True, style=None):
         self._context = None
         self.parent_panel = None
         self.draw_label = draw_label
+        self.style = style or RenderStyle()
 
         self.x = x
         self.y = y
@@ -30,6 +29,10 @@ class TopView:
         self._size_labels = []
         self.child_labels = []
 
+    @cached_property
+    def sizes(self):
+        return self.style.top_view
+
     @cached_property
     def number_of_tracks(self):
         number_of_tracks = get_number_of_tracks_value(self.raw_params.get('constructor_data', {}))
@@ -129,13 +132,17 @@ class TopView:
         return self
 
     def draw_text(self, x, y, text):
+        self.context.save()
+        self.context.set_layer(LAYER_LABELS)
         self.context.set_source_rgba(*Colors.BLACK)
-        self.context.set_font_matrix(cairo.Matrix(xx=self.TEXT_SIZE, yy=-self.TEXT_SIZE))
+        self.context.set_font_matrix(cairo.Matrix(xx=self.sizes.text_size, yy=-self.sizes.text_size))
 
         self.context.move_to(x, y)
         self.context.show_text(text)
         self.context.stroke()
+        self.context.restore()
 
+    @timed('top_view')
     def draw(self):
 
         self.context.save()
@@ -144,7 +151,7 @@ class TopView:
         if self.frame_category.startswith('pck'):
             self.x = self.x + self.pocket_width * self.scale_factor + 10
 
-        self.y = self.y + (self.number_of_tracks - 1) * TopView.ENFORCEMENT_SIZE
+        self.y = self.y + (self.number_of_tracks - 1) * self.sizes.enforcement_size
 
         self.context.set_source_rgba(*Colors.BLACK)
         self.context.set_line_width(2)
@@ -173,8 +180,8 @@ class TopView:
 
             # Initialize variables to track position
             x_offset = 5  # Initial x offset
-            og_y_offset = (self.scaled_frame_height - 5 * (
-                    self.number_of_tracks - 1) - 1.5 * TopView.ENFORCEMENT_SIZE * self.number_of_tracks) / 2  # Initial y offset
+            og_y_offset = (self.scaled_frame_height - 5 * (self.number_of_tracks - 1) -
+                           1.5 * self.sizes.enforcement_size * self.number_of_tracks) / 2  # Initial y offset
 
             # filter screens, normal panel will have z index as 1
             filtered_panels = [panel for panel in frame['children'] if panel['position']['z'] == 1]
@@ -197,9 +204,9 @@ class TopView:
                 track_number = self.number_of_tracks - get_track_number_of_panel(child) + 1
 
                 if panel_index != 0 and track_number != prev_track_number:
-                    x_offset = x_offset - TopView.ENFORCEMENT_SIZE - 1
+                    x_offset = x_offset - self.sizes.enforcement_size - 1
 
-                y_offset = og_y_offset + (track_number - 1) * 1.25 * TopView.ENFORCEMENT_SIZE + 2 * (
+                y_offset = og_y_offset + (track_number - 1) * 1.25 * self.sizes.enforcement_size + 2 * (
                         track_number - 1) - 1 if track_number != 1 else og_y_offset
 
                 dimensions = get_dimensions_from_layers(child.get('layers', []))
@@ -208,20 +215,20 @@ class TopView:
 
                 # draw panel name
                 self.draw_text(self.x + x_offset + width / 2 - 16,
-                               self.y + self.number_of_tracks * 2.5 * TopView.PANEL_HEIGHT,
+                               self.y + self.number_of_tracks * 2.5 * self.sizes.panel_height,
                                f'Panel {child.get("name", "").upper()}')
 
                 # Draw the start enforcement square
-                self.context.rectangle(self.x + x_offset, self.y + y_offset - 2, TopView.ENFORCEMENT_SIZE,
-                                       TopView.ENFORCEMENT_SIZE)
+                self.context.rectangle(self.x + x_offset, self.y + y_offset - 2, self.sizes.enforcement_size,
+                                       self.sizes.enforcement_size)
 
                 # Draw the panel
-                self.context.rectangle(self.x + x_offset + TopView.ENFORCEMENT_SIZE, self.y + y_offset + 1,
-                                       width - 2 * TopView.ENFORCEMENT_SIZE, TopView.PANEL_HEIGHT)
+                self.context.rectangle(self.x + x_offset + self.sizes.enforcement_size, self.y + y_offset + 1,
+                                       width - 2 * self.sizes.enforcement_size, self.sizes.panel_height)
 
                 # Draw the end enforcement square
-                self.context.rectangle(self.x + x_offset + width - TopView.ENFORCEMENT_SIZE, self.y + y_offset - 2,
-                                       TopView.ENFORCEMENT_SIZE, TopView.ENFORCEMENT_SIZE)
+                self.context.rectangle(self.x + x_offset + width - self.sizes.enforcement_size, self.y + y_offset - 2,
+                                       self.sizes.enforcement_size, self.sizes.enforcement_size)
                 self.context.stroke()
 
                 # check max x
@@ -234,11 +241,12 @@ class TopView:
 
             self.context.set_line_width(2)
 
-            track_y = self.y + og_y_offset - 0.3 * TopView.ENFORCEMENT_SIZE
+            track_y = self.y + og_y_offset - 0.3 * self.sizes.enforcement_size
 
             # draw exterior and interior
             text_start_x = (panel_min_x + panel_max_x) / 2 - 18
-            self.draw_text(text_start_x, self.y + self.number_of_tracks * 2.5 * TopView.PANEL_HEIGHT + 20, 'INTERIOR')
+            self.draw_text(text_start_x, self.y + self.number_of_tracks * 2.5 * self.sizes.panel_height + 20,
+                           'INTERIOR')
             self.draw_text(text_start_x, self.y - 20, 'EXTERIOR')
 
             # draw track extremes
@@ -250,38 +258,38 @@ class TopView:
                     self.draw_text(panel_min_x - 45, track_y + 7.5, f'Track {self.number_of_tracks - track_index}')
 
                 if not self.frame_category.startswith('pck'):
-                    self.context.move_to(panel_min_x + TopView.TRACK_WRAP_THICKNESS, track_y)
+                    self.context.move_to(panel_min_x + self.sizes.track_wrap_thickness, track_y)
                     self.context.line_to(panel_min_x, track_y)
-                    self.context.line_to(panel_min_x, track_y + 2 * TopView.PANEL_HEIGHT + 1)
-                    self.context.line_to(panel_min_x + TopView.TRACK_WRAP_THICKNESS,
-                                         track_y + 2 * TopView.PANEL_HEIGHT + 1)
+                    self.context.line_to(panel_min_x, track_y + 2 * self.sizes.panel_height + 1)
+                    self.context.line_to(panel_min_x + self.sizes.track_wrap_thickness,
+                                         track_y + 2 * self.sizes.panel_height + 1)
 
                 if not self.frame_category.endswith('pck'):
-                    self.context.move_to(panel_max_x - TopView.TRACK_WRAP_THICKNESS, track_y)
+                    self.context.move_to(panel_max_x - self.sizes.track_wrap_thickness, track_y)
                     self.context.line_to(panel_max_x, track_y)
-                    self.context.line_to(panel_max_x, track_y + 2 * TopView.PANEL_HEIGHT + 1)
-                    self.context.line_to(panel_max_x - TopView.TRACK_WRAP_THICKNESS,
-                                         track_y + 2 * TopView.PANEL_HEIGHT + 1)
+                    self.context.line_to(panel_max_x, track_y + 2 * self.sizes.panel_height + 1)
+                    self.context.line_to(panel_max_x - self.sizes.track_wrap_thickness,
+                                         track_y + 2 * self.sizes.panel_height + 1)
 
                 self.context.stroke()
 
                 first_track_y = track_y
-                track_y = track_y + 1.25 * TopView.ENFORCEMENT_SIZE + 1
+                track_y = track_y + 1.25 * self.sizes.enforcement_size + 1
 
             # draw pocket on right side 'STD-PCK' or 'PCK-PCK'
             if self.frame_category.endswith('pck') and first_track_y:
                 rect_x = panel_max_x
                 # if pocket location is exterior, draw inside above first track else below last track
                 if self.pocket_location == 'out':
-                    rect_y = first_track_y + 2 * TopView.PANEL_HEIGHT
+                    rect_y = first_track_y + 2 * self.sizes.panel_height
                 else:
-                    rect_y = last_track_y - 2 * TopView.PANEL_HEIGHT
+                    rect_y = last_track_y - 2 * self.sizes.panel_height
 
                 rect_width, rect_height = int(
-                    self.pocket_width) * self.scale_factor, 2 * TopView.PANEL_HEIGHT  # Rectangle size
+                    self.pocket_width) * self.scale_factor, 2 * self.sizes.panel_height  # Rectangle size
 
                 self.draw_text(panel_max_x + rect_width / 2 - 20,
-                               self.y + self.number_of_tracks * 2.5 * TopView.PANEL_HEIGHT + 20,
+                               self.y + self.number_of_tracks * 2.5 * self.sizes.panel_height + 20,
                                'POCKET')
 
                 self.draw_pocket(rect_x, rect_y, rect_width, rect_height)
@@ -291,26 +299,26 @@ class TopView:
                 if self.pocket_location == 'out':
                     inner_part_y = rect_y
                 else:
-                    inner_part_y = rect_y - 0.75 * TopView.PANEL_HEIGHT
-                self.context.rectangle(rect_x - TopView.TRACK_WRAP_THICKNESS, inner_part_y,
-                                       TopView.TRACK_WRAP_THICKNESS, 2.75 * TopView.PANEL_HEIGHT)
+                    inner_part_y = rect_y - 0.75 * self.sizes.panel_height
+                self.context.rectangle(rect_x - self.sizes.track_wrap_thickness, inner_part_y,
+                                       self.sizes.track_wrap_thickness, 2.75 * self.sizes.panel_height)
                 self.context.stroke()
 
             # draw pocket on left side 'PCK-PCK' or 'PCK-STD'
             if self.frame_category.startswith('pck') and first_track_y:
                 # if pocket location is exterior, draw inside above first track else below last track
                 if self.pocket_location == 'out':
-                    rect_y = first_track_y + 2 * TopView.PANEL_HEIGHT
+                    rect_y = first_track_y + 2 * self.sizes.panel_height
                 else:
-                    rect_y = last_track_y - 2 * TopView.PANEL_HEIGHT
+                    rect_y = last_track_y - 2 * self.sizes.panel_height
 
                 rect_width, rect_height = int(
-                    self.pocket_width) * self.scale_factor, 2 * TopView.PANEL_HEIGHT  # Rectangle size
+                    self.pocket_width) * self.scale_factor, 2 * self.sizes.panel_height  # Rectangle size
 
                 rect_x = panel_min_x - rect_width
 
                 self.draw_text(rect_x + rect_width / 2 - 20,
-                               self.y + self.number_of_tracks * 2.5 * TopView.PANEL_HEIGHT + 20,
+                               self.y + self.number_of_tracks * 2.5 * self.sizes.panel_height + 20,
                                'POCKET')
 
                 self.draw_pocket(rect_x, rect_y, rect_width, rect_height)
@@ -320,9 +328,9 @@ class TopView:
                 if self.pocket_location == 'out':
                     inner_part_y = rect_y
                 else:
-                    inner_part_y = rect_y - 0.75 * TopView.PANEL_HEIGHT
+                    inner_part_y = rect_y - 0.75 * self.sizes.panel_height
                 self.context.rectangle(rect_x + rect_width, inner_part_y,
-                                       TopView.TRACK_WRAP_THICKNESS, 2.75 * TopView.PANEL_HEIGHT)
+                                       self.sizes.track_wrap_thickness, 2.75 * self.sizes.panel_height)
                 self.context.stroke()
 
             # draw only one frame
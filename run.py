@@ -1,25 +1,181 @@
+import functools
+import json
+import logging
+import os
+
 import bottle
-from bottle import run, request, static_file, post
+from bottle import run, request, response, static_file, post, get
 
-from components.canvas import Canvas
+from components.config import LOOKUP_TRACE, STREAM_CHUNK_SIZE, SERVER, HOST, PORT, WORKERS, MAX_REQUESTS, \
+    MAX_REQUESTS_JITTER, WORKER_TIMEOUT, GRACEFUL_TIMEOUT, SERVER_TIMING, TIMING_LOG
+from components.payload_model import PayloadError
+from components.text_metrics import warm_text_metrics
+from components.timing import PhaseTimer, phase
+from services.batch_render_service import BatchRenderService
+from services.render_cache import get_render_cache
+from services.render_service import RenderService
+from services.single_flight import get_single_flight
 
 bottle.BaseRequest.MEMFILE_MAX = 16 * 1024 * 1024
 
+logging.basicConfig(level=logging.DEBUG if LOOKUP_TRACE else logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+
+timing_logger = logging.getLogger('cad_renderer.timing')
+
+# run by every server process when it imports the app, before its first render
+warm_text_metrics()
+
+
+def server_timing(callback):
+    """
+    Plugin timing the phases of every request (see components.timing), sent back in the Server-Timing header and
+    logged as a JSON line with TIMING_LOG. The time spent streaming the body out is not part of it.
+    """
+    @functools.wraps(callback)
+    def wrapper(*args, **kwargs):
+        timer = PhaseTimer().start()
+        try:
+            body = callback(*args, **kwargs)
+        finally:
+            timer.stop()
+
+        # static_file returns its own response, with its own headers
+        headers = body if isinstance(body, bottle.HTTPResponse) else response
+        if SERVER_TIMING:
+            headers.set_header('Server-Timing', timer.server_timing())
+
+        if TIMING_LOG:
+            timing_logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': headers.status_code,
+                'cache': response.get_header('X-Cache'),
+                **timer.as_dict(),
+            }))
+
+        return body
+
+    return wrapper
+
+
+def send_body(body, content_type, filename):
+    """
+    Sends the body back as an attachment, in chunks if the request asks for ?stream=1
+    """
+    response.content_type = content_type
+    response.set_header('Content-Disposition', f'attachment; filename="{filename}"')
+
+    if request.query.get('stream'):
+        return (body[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(body), STREAM_CHUNK_SIZE))
+
+    response.content_length = len(body)
+    return body
+
+
+def etag_matches(etag):
+    if_none_match = request.get_header('If-None-Match')
+    if not if_none_match:
+        return False
+
+    return if_none_match.strip() == '*' or etag in [_.strip() for _ in if_none_match.split(',')]
+
+
+def parse_json():
+    with phase('parse'):
+        return request.json
+
+
+def render(is_top_view=False):
+    try:
+        service = RenderService(parse_json(), is_top_view=is_top_view)
+    except PayloadError as e:
+        response.status = 400
+        return {'error': str(e)}
+
+    # the same payload always renders to the same bytes, so the client's copy can be confirmed without drawing
+    response.set_header('ETag', service.etag)
+    if etag_matches(service.etag):
+        response.status = 304
+        return b''
+
+    result = service.run()
+
+    if service.cache_status:
+        response.set_header('X-Cache', service.cache_status.upper())
+
+    with phase('serve'):
+        if result.path:
+            return static_file(result.path, root='/', download=True)
+
+        return send_body(result.body, result.content_type, result.filename)
+
 
 @post('/cad')
 def index():
-    canvas = Canvas(request.json)
-    canvas.draw()
-
-    return static_file(canvas.filename, root='/', download=True)
+    return render()
 
 
 @post('/top-view')
 def top_view():
-    canvas = Canvas(request.json, is_top_view=True)
-    canvas.draw_top_view()
+    return render(is_top_view=True)
+
+
+@post('/cad/layout')
+def layout():
+    """
+    Rectangles of the frames and panels of a /cad payload, without rendering it
+    """
+    try:
+        return RenderService(parse_json()).layout()
+    except ValueError as e:
+        response.status = 400
+        return {'error': str(e)}
+
+
+@get('/cache-stats')
+def cache_stats():
+    """
+    Render cache and single flight counters of the worker process serving this request
+    """
+    render_cache = get_render_cache()
+    single_flight = get_single_flight()
+
+    return {
+        'pid': os.getpid(),
+        'enabled': bool(render_cache),
+        **(render_cache.stats() if render_cache else {}),
+        'single_flight': single_flight.stats() if single_flight else None,
+    }
+
+
+@post('/cad/batch')
+def batch():
+    """
+    Renders a list of /cad and /top-view jobs in parallel, see BatchRenderService.
+    Sends a zip, or a multipart/mixed stream with ?format=multipart
+    """
+    try:
+        service = BatchRenderService(parse_json())
+    except ValueError as e:
+        response.status = 400
+        return {'error': str(e)}
+
+    if request.query.get('format') == 'multipart':
+        response.content_type = f'multipart/mixed; boundary={service.boundary}'
+        return service.iter_multipart()
+
+    return send_body(service.zip(), 'application/zip', 'batch.zip')
+
 
-    return static_file(canvas.filename, root='/', download=True)
+app = bottle.default_app()
+app.install(server_timing)
 
 
-run(host='0.0.0.0', port=5002)
+if __name__ == '__main__':
+    if SERVER == 'gunicorn':
+        # rendering is CPU bound and holds the GIL, so requests are served by pre-forked processes
+        run(app, server='gunicorn', host=HOST, port=PORT, workers=WORKERS, max_requests=MAX_REQUESTS,
+            max_requests_jitter=MAX_REQUESTS_JITTER, timeout=WORKER_TIMEOUT, graceful_timeout=GRACEFUL_TIMEOUT)
+    else:
+        run(app, server=SERVER, host=HOST, port=PORT)
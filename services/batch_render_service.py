@@ -0,0 +1,190 @@
+import io
+import json
+import re
+import time
+import uuid
+import zipfile
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict
+
+from components.config import BATCH_MAX_JOBS, BATCH_WORKERS, BATCH_TIMEOUT
+from components.payload_model import decode_options, decode_payload, PayloadError
+from services.render_service import RenderService
+
+_pool = None
+
+
+def get_pool():
+    """
+    Process pool shared by the batches of this (gunicorn worker) process, created on the first batch
+    """
+    global _pool
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+
+    return _pool
+
+
+def reset_pool():
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+    _pool = None
+
+
+def render_job(job: Dict):
+    """
+    Renders one batch job in a pool process
+    :return: (RenderResult, None) or (None, error message)
+    """
+    try:
+        result = RenderService(job['payload'], is_top_view=job['type'] == 'top-view').run()
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+    return result, None
+
+
+class BatchRenderService:
+    """
+    Renders many /cad and /top-view payloads at once, in parallel across a process pool.
+
+    Takes a list of jobs (or {"jobs": [...]}) where a job is {"type": "cad"/"top-view", "name": ..., "payload": {...}}.
+    A job without "payload" is taken as a /cad payload itself. A job that fails is reported in the output
+    instead of failing the whole batch, so are the jobs not rendered within BATCH_TIMEOUT seconds.
+    """
+
+    JOB_TYPES = ('cad', 'top-view')
+
+    def __init__(self, raw_jobs):
+        if isinstance(raw_jobs, dict):
+            raw_jobs = raw_jobs.get('jobs')
+
+        if not isinstance(raw_jobs, list) or not raw_jobs:
+            raise ValueError('expected a non empty list of jobs')
+
+        if len(raw_jobs) > BATCH_MAX_JOBS:
+            raise ValueError(f'too many jobs: {len(raw_jobs)}, max {BATCH_MAX_JOBS}')
+
+        self.jobs = [self._get_job(index, raw_job) for index, raw_job in enumerate(raw_jobs)]
+        self.boundary = uuid.uuid4().hex
+        self.deadline = time.monotonic() + BATCH_TIMEOUT
+
+    def _get_job(self, index, raw_job) -> Dict:
+        job = {'index': index, 'type': 'cad', 'name': None, 'payload': None, 'error': None}
+
+        if not isinstance(raw_job, dict):
+            job['error'] = 'job must be an object'
+            return job
+
+        if 'payload' not in raw_job:
+            raw_job = {'payload': raw_job}
+
+        job['type'] = raw_job.get('type') or 'cad'
+        job['name'] = raw_job.get('name')
+        job['payload'] = raw_job['payload']
+
+        if job['type'] not in self.JOB_TYPES:
+            job['error'] = f"unknown job type: {job['type']}"
+        elif not isinstance(job['payload'], dict):
+            job['error'] = 'payload must be an object'
+        else:
+            # a malformed payload is reported without sending it to the pool
+            try:
+                if job['type'] == 'cad':
+                    decode_payload(job['payload'])
+                decode_options(job['payload'])
+            except PayloadError as e:
+                job['error'] = f'{type(e).__name__}: {e}'
+
+        return job
+
+    def iter_results(self):
+        """
+        Yields (job, RenderResult or None, error message or None) in the order of the jobs
+        """
+        pool = get_pool()
+        futures = {}
+        for job in self.jobs:
+            if not job['error']:
+                futures[job['index']] = pool.submit(render_job, job)
+
+        for job in self.jobs:
+            if job['error']:
+                yield job, None, job['error']
+                continue
+
+            # the futures left in futures are the ones not collected yet
+            future = futures.pop(job['index'])
+            try:
+                result, error = future.result(timeout=max(0, self.deadline - time.monotonic()))
+            except BrokenProcessPool:
+                # a pool process died (e.g. crashed in cairo), the pool can't be used anymore
+                reset_pool()
+                result, error = None, 'render process crashed'
+            except (FutureTimeoutError, CancelledError):
+                # the jobs not started yet are dropped (cancelled), the ones done by now are still sent
+                future.cancel()
+                for pending_future in futures.values():
+                    pending_future.cancel()
+                result, error = None, f'batch timed out after {BATCH_TIMEOUT:g} s'
+
+            yield job, result, error
+
+    def entry_name(self, job, result) -> str:
+        name = re.sub(r'[^\w.-]+', '_', str(job['name'] or job['type']))
+        extension = result.filename.rsplit('.', 1)[-1] if result else 'json'
+
+        return f"{job['index']:03d}-{name}.{extension}"
+
+    def zip(self) -> bytes:
+        """
+        Zip with one file per rendered job and a manifest.json listing every job with its file or error
+        """
+        manifest = []
+        output = io.BytesIO()
+
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for job, result, error in self.iter_results():
+                item = {'index': job['index'], 'name': job['name'], 'type': job['type']}
+
+                if error:
+                    item['error'] = error
+                else:
+                    item['file'] = self.entry_name(job, result)
+                    archive.writestr(item['file'], result.body)
+
+                manifest.append(item)
+
+            archive.writestr('manifest.json', json.dumps(manifest, indent=2))
+
+        return output.getvalue()
+
+    def iter_multipart(self):
+        """
+        multipart/mixed body, one part per job, sent as soon as the job is rendered.
+        Failed jobs are sent as application/json parts with the error.
+        """
+        for job, result, error in self.iter_results():
+            if error:
+                content_type = 'application/json'
+                body = json.dumps({'index': job['index'], 'name': job['name'], 'error': error}).encode()
+            else:
+                content_type = result.content_type
+                body = result.body
+
+            headers = (
+                f'--{self.boundary}\r\n'
+                f'Content-Type: {content_type}\r\n'
+                f'Content-Disposition: attachment; filename="{self.entry_name(job, result)}"\r\n'
+                f"X-Batch-Index: {job['index']}\r\n"
+                f"X-Batch-Status: {'error' if error else 'ok'}\r\n"
+                f'\r\n'
+            )
+
+            yield headers.encode() + body + b'\r\n'
+
+        yield f'--{self.boundary}--\r\n'.encode()
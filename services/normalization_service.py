@@ -1,35 +1,55 @@
+from collections.abc import Mapping
 from typing import Dict
 
 
-class NormalizationService:
+class NormalizedParams(Mapping):
     """
-    Changes dimensions of raw params so child panels are fit into a frame
-    in case a frame width < total width of child panels
+    Read only view of the raw params of a panel with its dimensions and the ones of all its children multiplied by
+    the factors, the original ones kept as original_*. Nothing is copied, the views of the children are made when
+    they are read.
     """
 
-    def __init__(self, width_factor: float, height_factor: float):
+    CHILD_KEYS = ('frames', 'panels')
+
+    def __init__(self, raw_panel: Dict, width_factor: float, height_factor: float):
+        self.raw_panel = raw_panel
         self.width_factor = width_factor
         self.height_factor = height_factor
 
-    def run(self, raw_panel: Dict):
-        self._normalize(raw_panel)
+        self._overrides = {
+            'original_width': raw_panel['width'],
+            'original_height': raw_panel['height'],
+            'width': raw_panel['width'] * width_factor,
+            'height': raw_panel['height'] * height_factor,
+        }
+
+        if raw_panel['panel_type'] == 'panel':
+            self._overrides.update({
+                'original_dlo_width': raw_panel['dlo_width'],
+                'original_dlo_height': raw_panel['dlo_height'],
+                'dlo_width': raw_panel['dlo_width'] * width_factor,
+                'dlo_height': raw_panel['dlo_height'] * height_factor,
+            })
 
-        return raw_panel
+        self._children = {}
 
-    def _normalize(self, raw_panel: Dict) -> None:
-        raw_panel['original_width'] = raw_panel['width']
-        raw_panel['original_height'] = raw_panel['height']
-        raw_panel['width'] = raw_panel['width'] * self.width_factor
-        raw_panel['height'] = raw_panel['height'] * self.height_factor
+    def __getitem__(self, key):
+        if key in self._overrides:
+            return self._overrides[key]
 
-        if raw_panel['panel_type'] == 'panel':
-            raw_panel['original_dlo_width'] = raw_panel['dlo_width']
-            raw_panel['original_dlo_height'] = raw_panel['dlo_height']
-            raw_panel['dlo_width'] = raw_panel['dlo_width'] * self.width_factor
-            raw_panel['dlo_height'] = raw_panel['dlo_height'] * self.height_factor
+        value = self.raw_panel[key]
+        if key in self.CHILD_KEYS and value:
+            if key not in self._children:
+                self._children[key] = [NormalizedParams(_, self.width_factor, self.height_factor) for _ in value]
+
+            return self._children[key]
+
+        return value
+
+    def __iter__(self):
+        yield from self._overrides
+        yield from (_ for _ in self.raw_panel if _ not in self._overrides)
 
-        for child_frame in raw_panel.get('frames') or []:
-            self._normalize(child_frame)
+    def __len__(self):
+        return len(self.raw_panel) + sum(1 for _ in self._overrides if _ not in self.raw_panel)
 
-        for child_panel in raw_panel.get('panels') or []:
-            self._normalize(child_panel)
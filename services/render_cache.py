@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from components.config import BEZIER_TOLERANCE, PNG_MAX_SCALE, PNG_SCALE, RENDER_CACHE_ENABLED, \
+    RENDER_CACHE_MEMORY_BYTES, RENDER_CACHE_DIR, RENDER_CACHE_DISK_BYTES, RENDER_CACHE_FLOAT_DIGITS, SVG_BACKEND, \
+    SVG_PRECISION
+
+# bump when a change in the drawing code changes the output for the same payload
+RENDER_VERSION = 7
+
+# options changing the output, with the defaults Canvas uses when they are missing
+OUTPUT_OPTIONS = {
+    'image_format': 'svg',
+    'draw_label': True,
+    'draw_muntin_label': False,
+    'max_canvas_width': None,
+    'is_transparent': False,
+    'direction': 'left',
+    'scale_factor': None,
+    'png_scale': None,
+    'bezier_sampling': None,
+    'bezier_tolerance': None,
+    'svg_backend': SVG_BACKEND,
+    'svg_precision': SVG_PRECISION,
+}
+
+# server settings changing the output, the disk tier outlives the process that wrote it and is shared by the workers
+OUTPUT_SETTINGS = {
+    'png_scale': PNG_SCALE,
+    'png_max_scale': PNG_MAX_SCALE,
+    'svg_backend': SVG_BACKEND,
+    'svg_precision': SVG_PRECISION,
+    'bezier_tolerance': BEZIER_TOLERANCE,
+}
+
+
+def canonicalize(value, float_digits=RENDER_CACHE_FLOAT_DIGITS):
+    """
+    Returns a copy of the payload where floats are rounded to float_digits and -0.0 is 0.0, so that payloads
+    differing only by float noise serialize the same way. Ints stay ints: 5 and 5.0 can be drawn differently.
+    Key order is handled by json.dumps(sort_keys=True).
+    """
+    if isinstance(value, dict):
+        return {str(k): canonicalize(v, float_digits) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(_, float_digits) for _ in value]
+
+    if isinstance(value, float):
+        return round(value, float_digits) + 0.0
+
+    return value
+
+
+def payload_key(raw_params, is_top_view=False) -> str:
+    """
+    Content address of a render: sha256 of the canonical payload, the output options, the output settings of the
+    server and the render version
+    """
+    options = {name: raw_params.get(name, default) for name, default in OUTPUT_OPTIONS.items()}
+    document = {
+        'version': RENDER_VERSION,
+        'top_view': bool(is_top_view),
+        'options': options,
+        'settings': OUTPUT_SETTINGS,
+        'payload': {k: v for k, v in raw_params.items() if k not in OUTPUT_OPTIONS},
+    }
+    canonical = json.dumps(canonicalize(document), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class MemoryTier:
+    """
+    LRU of rendered results bounded by the total size of their bodies
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        result = self._items.get(key)
+        if result is not None:
+            self._items.move_to_end(key)
+
+        return result
+
+    def put(self, key, result):
+        if len(result.body) > self.max_bytes:
+            return 0
+
+        if key in self._items:
+            self.size -= len(self._items.pop(key).body)
+
+        self._items[key] = result
+        self.size += len(result.body)
+
+        evicted = 0
+        while self.size > self.max_bytes:
+            _, old_result = self._items.popitem(last=False)
+            self.size -= len(old_result.body)
+            evicted += 1
+
+        return evicted
+
+
+class DiskTier:
+    """
+    Rendered results stored as files under a directory, capped by total size; the least recently used files
+    (by mtime, touched on every hit) are removed first. The directory can be shared by several processes.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        from services.render_service import RenderResult
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        return RenderResult(body=body, content_type=meta['content_type'], filename=meta['filename'])
+
+    def put(self, key, result):
+        if len(result.body) > self.max_bytes:
+            return 0
+
+        path = self._path(key)
+        meta = json.dumps({'content_type': result.content_type, 'filename': result.filename}).encode()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(meta + b'\n' + result.body)
+        os.replace(tmp_path, path)
+
+        if self._size is None:
+            self._size = self._scan_size()
+        self._size += len(meta) + 1 + len(result.body)
+
+        return self._evict() if self._size > self.max_bytes else 0
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith('.tmp'):
+                    yield os.path.join(root, name)
+
+    def _scan_size(self):
+        return sum(os.path.getsize(_) for _ in self._files())
+
+    def _evict(self):
+        # other processes write here too, so look at what is actually on disk
+        files = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        self._size = sum(_[1] for _ in files)
+
+        # evict down to 90% of the cap so that the next few puts don't scan again
+        evicted = 0
+        for _, size, path in sorted(files):
+            if self._size <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+            evicted += 1
+
+        return evicted
+
+
+class RenderCache:
+    """
+    Rendered results by payload_key: memory LRU first, then disk. Counts hits, misses and evictions
+    of this process (see stats)
+    """
+
+    def __init__(self, memory_bytes=RENDER_CACHE_MEMORY_BYTES, directory=RENDER_CACHE_DIR,
+                 disk_bytes=RENDER_CACHE_DISK_BYTES):
+        self.memory = MemoryTier(memory_bytes)
+        self.disk = DiskTier(directory, disk_bytes) if directory and disk_bytes else None
+
+        self._lock = threading.Lock()
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+        }
+
+    def get(self, key):
+        """
+        :return: (result, 'memory'/'disk') or (None, 'miss')
+        """
+        with self._lock:
+            result = self.memory.get(key)
+            if result is not None:
+                self.counters['memory_hits'] += 1
+                return result, 'memory'
+
+        result = self.disk.get(key) if self.disk else None
+
+        with self._lock:
+            if result is None:
+                self.counters['misses'] += 1
+                return None, 'miss'
+
+            self.counters['disk_hits'] += 1
+            self.counters['memory_evictions'] += self.memory.put(key, result)
+
+        return result, 'disk'
+
+    def put(self, key, result):
+        with self._lock:
+            self.counters['stores'] += 1
+            self.counters['memory_evictions'] += self.memory.put(key, result)
+
+        if self.disk:
+            try:
+                evicted = self.disk.put(key, result)
+            except OSError:
+                evicted = 0
+
+            with self._lock:
+                self.counters['disk_evictions'] += evicted
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['memory_items'] = len(self.memory)
+            stats['memory_bytes'] = self.memory.size
+
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_ratio'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+
+        return stats
+
+
+_render_cache = None
+
+
+def get_render_cache():
+    """
+    The render cache of this process, None when caching is off
+    """
+    global _render_cache
+
+    if _render_cache is None and RENDER_CACHE_ENABLED:
+        _render_cache = RenderCache()
+
+    return _render_cache
@@ -0,0 +1,104 @@
+from typing import Dict
+
+from components.canvas import Canvas
+from components.payload_model import decode_options, decode_payload
+from components.timing import phase
+from services.render_cache import get_render_cache, payload_key, canonicalize
+from services.single_flight import get_single_flight
+
+
+class RenderResult:
+    def __init__(self, body: bytes, content_type: str, filename: str, path=None):
+        """
+        :param body: rendered image
+        :param content_type: mime type of the image
+        :param filename: name to send the image under
+        :param path: file the image was rendered to, if rendered to file
+        """
+        self.body = body
+        self.content_type = content_type
+        self.filename = filename
+        self.path = path
+
+
+class RenderService:
+    """
+    Renders one /cad or /top-view payload, going through the render cache when it is on.
+
+    The payload is drawn with its floats quantized (see canonicalize), so all payloads with the same key
+    render to the same bytes and the key can be used as a strong ETag.
+
+    A /cad payload and the output options are decoded and validated up front, a malformed one raises PayloadError
+    before anything is drawn.
+    """
+
+    def __init__(self, raw_params: Dict, is_top_view=False, cache=None, single_flight=None):
+        with phase('payload'):
+            # a copy: drawing may change raw_params
+            self.raw_params = canonicalize(raw_params)
+            self.is_top_view = is_top_view
+            self.payload_spec = None if is_top_view else decode_payload(self.raw_params)
+            # the output options are checked before anything is drawn too
+            decode_options(self.raw_params)
+            self.key = payload_key(self.raw_params, is_top_view)
+        self.cache = cache if cache is not None else get_render_cache()
+        self.single_flight = single_flight if single_flight is not None else get_single_flight()
+
+        # memory/disk when served from the render cache, coalesced when rendered by a concurrent request
+        # for the same payload, miss when rendered and cached, None when not cached
+        self.cache_status = None
+
+    def run(self) -> RenderResult:
+        if not self.cache:
+            return self.render()
+
+        with phase('cache'):
+            result, self.cache_status = self.cache.get(self.key)
+        if result is not None:
+            return result
+
+        # the result is handed over to the followers in other processes through the disk tier
+        if self.single_flight and self.cache.disk:
+            result, coalesced = self.single_flight.run(self.key, self._render_and_store,
+                                                       lambda: self.cache.get(self.key)[0])
+            if coalesced:
+                self.cache_status = 'coalesced'
+
+            return result
+
+        return self._render_and_store()
+
+    def _render_and_store(self):
+        result = self.render()
+        with phase('cache'):
+            self.cache.put(self.key, result)
+
+        return result
+
+    def render(self) -> RenderResult:
+        canvas = Canvas(self.raw_params, is_top_view=self.is_top_view, name=self.key[:16],
+                        payload_spec=self.payload_spec)
+
+        if self.is_top_view:
+            canvas.draw_top_view()
+        else:
+            canvas.draw()
+
+        return RenderResult(
+            body=canvas.getvalue(),
+            content_type=canvas.content_type,
+            filename=canvas.download_filename,
+            path=canvas.filename
+        )
+
+    @property
+    def etag(self):
+        return f'"{self.key}"'
+
+    def layout(self) -> Dict:
+        """
+        The canvas size and the rectangles of the frames and panels, without rendering, see Canvas.layout
+        """
+        canvas = Canvas(self.raw_params, is_top_view=self.is_top_view, to_file=False, payload_spec=self.payload_spec)
+
+        return {'width': canvas.canvas_width, 'height': canvas.canvas_height, 'nodes': canvas.layout()}
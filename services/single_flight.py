@@ -0,0 +1,166 @@
+import fcntl
+import os
+import threading
+import time
+
+from components.config import SINGLE_FLIGHT_ENABLED, SINGLE_FLIGHT_DIR, SINGLE_FLIGHT_TIMEOUT
+
+
+class SingleFlight:
+    """
+    Makes concurrent renders of the same key, in any process or thread, run only once.
+
+    The first caller (leader) takes an exclusive flock on a file named after the key and renders; the others
+    (followers) wait for the lock up to timeout seconds and then take the leader's result from the render cache.
+    A follower that gives up waiting, or doesn't find the result (the leader failed, or its result didn't make it
+    to the disk tier), renders itself without holding the lock, so the followers don't render one after another.
+
+    The lock files left behind by leaders that died are removed, at most every CLEANUP_INTERVAL seconds.
+    """
+
+    POLL_INTERVAL = 0.01
+    MAX_POLL_INTERVAL = 0.1
+    CLEANUP_INTERVAL = 60
+
+    def __init__(self, directory=SINGLE_FLIGHT_DIR, timeout=SINGLE_FLIGHT_TIMEOUT):
+        self.directory = directory
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._next_cleanup = 0
+        self.counters = {
+            'leaders': 0,
+            'coalesced': 0,
+            'wait_timeouts': 0,
+            'fallbacks': 0,
+            'stale_locks_removed': 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def run(self, key, render, lookup):
+        """
+        :param key: render key
+        :param render: renders and stores the result so that lookup can find it
+        :param lookup: returns the stored result or None
+        :return: (result, True if it was rendered by another caller)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._cleanup()
+        path = os.path.join(self.directory, key)
+
+        fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            is_leader = self._try_lock(fd)
+            if not is_leader and not self._wait_for_lock(fd):
+                self._count('wait_timeouts')
+                return render(), False
+
+            # also when leading: a leader may have stored the result and let the lock go just before it was taken
+            result = lookup()
+            if result is not None:
+                self._count('coalesced')
+                return result, True
+
+            if not is_leader:
+                # the leader failed or its result wasn't stored, the lock is let go before rendering so that the
+                # other followers don't wait for this render too
+                self._count('fallbacks')
+                self._unlink(fd, path)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                return render(), False
+
+            self._count('leaders')
+            result = render()
+
+            # the next renders of this key make a new lock file, the ones waiting on this one see the result
+            self._unlink(fd, path)
+
+            return result, False
+        finally:
+            os.close(fd)
+
+    def _try_lock(self, fd):
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+
+        return True
+
+    def _wait_for_lock(self, fd):
+        deadline = time.monotonic() + self.timeout
+        interval = self.POLL_INTERVAL
+
+        while not self._try_lock(fd):
+            if time.monotonic() >= deadline:
+                return False
+
+            time.sleep(interval)
+            interval = min(interval * 2, self.MAX_POLL_INTERVAL)
+
+        return True
+
+    @staticmethod
+    def _unlink(fd, path):
+        # only if the path is still our file, it may have been replaced already
+        try:
+            if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                os.unlink(path)
+                return True
+        except OSError:
+            pass
+
+        return False
+
+    def _cleanup(self):
+        """
+        Removes the lock files older than the wait timeout that nobody holds, left by leaders that died
+        """
+        now = time.time()
+        with self._lock:
+            if now < self._next_cleanup:
+                return
+            self._next_cleanup = now + self.CLEANUP_INTERVAL
+
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.stat(path).st_mtime < self.timeout:
+                    continue
+
+                fd = os.open(path, os.O_RDWR)
+            except OSError:
+                continue
+
+            try:
+                if self._try_lock(fd) and self._unlink(fd, path):
+                    self._count('stale_locks_removed')
+            finally:
+                os.close(fd)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+_single_flight = None
+
+
+def get_single_flight():
+    """
+    The single flight of this process, None when it is off
+    """
+    global _single_flight
+
+    if _single_flight is None and SINGLE_FLIGHT_ENABLED:
+        _single_flight = SingleFlight()
+
+    return _single_flight